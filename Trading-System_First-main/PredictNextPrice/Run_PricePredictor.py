@@ -15,7 +15,6 @@ import MetaTrader5 as mt5
 import pandas as pd
 import numpy as np
 import joblib
-import lightgbm as lgb
 from sklearn.preprocessing import StandardScaler
 import os
 import sys
@@ -28,6 +27,11 @@ warnings.filterwarnings('ignore')
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CandleStore, append_csv_candles
+from streaming_indicators import PriceFeatureStream
+from tree_predictor import compiled_path, export_model, load_predictor
 
 # ==================== CONFIGURATION ====================
 SYMBOL = 'XAUUSDm'
@@ -44,18 +48,24 @@ ENABLE_SOUND_ALERT = True
 ENABLE_LOG_FILE = True
 PRICE_CHANGE_THRESHOLD = 0.5  # Alert if predicted change > 0.5%
 
+# Features
+STREAMING_FEATURES = True  # Continuous mode updates the features per new candle instead of recomputing them
+
 
 class PricePredictionSystem:
-    def __init__(self):
-        self.script_dir = os.path.dirname(os.path.abspath(__file__))
+    def __init__(self, streaming=False, symbol=SYMBOL, script_dir=None):
+        self.symbol = symbol  # Broker symbol of the fetched and stored candles
+        self.script_dir = script_dir or os.path.dirname(os.path.abspath(__file__))  # Data, models and logs
         self.csv_path = os.path.join(self.script_dir, CSV_FILE)
         self.model_dir = os.path.join(self.script_dir, MODEL_DIR)
         self.charts_dir = os.path.join(self.script_dir, CHARTS_DIR)
         self.log_path = os.path.join(self.script_dir, 'price_predictor.log')
+        self.candle_store = CandleStore()
         
         self.mt5_initialized = False
         self.last_daily_update = None
         self.last_prediction = None
+        self.feature_stream = PriceFeatureStream() if streaming else None  # See predict_next_price
         
         # Ensure directories exist
         os.makedirs(self.model_dir, exist_ok=True)
@@ -112,24 +122,24 @@ class PricePredictionSystem:
                     return False
     
     def fetch_and_update_m15_data(self):
-        """Fetch latest M15 data and update CSV"""
+        """Fetch latest M15 data and update the candle store (or CSV)"""
         if not self.mt5_initialized:
             if not self.initialize_mt5():
                 raise Exception("Failed to initialize MT5")
         
         # Verify symbol
-        symbol_info = mt5.symbol_info(SYMBOL)
+        symbol_info = mt5.symbol_info(self.symbol)
         if symbol_info is None:
-            raise ValueError(f"Symbol {SYMBOL} not available")
+            raise ValueError(f"Symbol {self.symbol} not available")
         
         if not symbol_info.visible:
-            mt5.symbol_select(SYMBOL, True)
+            mt5.symbol_select(self.symbol, True)
         
         # Fetch M15 data (last 7 days)
         utc_to = datetime.now()
         utc_from = utc_to - timedelta(days=7)
         
-        rates = mt5.copy_rates_range(SYMBOL, mt5.TIMEFRAME_M15, utc_from, utc_to)
+        rates = mt5.copy_rates_range(self.symbol, mt5.TIMEFRAME_M15, utc_from, utc_to)
         
         if rates is None or len(rates) == 0:
             self.logger.warning("⚠️ No M15 data fetched")
@@ -148,33 +158,24 @@ class PricePredictionSystem:
         })
         new_df = new_df[['date', 'Open', 'High', 'Low', 'Close', 'Volume']]
         
-        # Format date to match expected format
-        new_df['date'] = new_df['date'].dt.strftime('%d.%m.%Y %H:%M:%S.000')
+        # Candle store once converted; otherwise only the newer candles are appended to the CSV
+        if self.candle_store.exists(self.symbol, 'M15') or not os.path.exists(self.csv_path):
+            added = self.candle_store.append(self.symbol, 'M15', new_df)
+        else:
+            added = append_csv_candles(self.csv_path, new_df, time_col='date')
         
-        # Load and merge with existing data
-        if os.path.exists(self.csv_path):
-            existing_df = pd.read_csv(self.csv_path)
-            
-            # Parse existing dates
-            existing_df['date'] = pd.to_datetime(existing_df['date'], format='%d.%m.%Y %H:%M:%S.%f')
-            new_df['date'] = pd.to_datetime(new_df['date'], format='%d.%m.%Y %H:%M:%S.%f')
-            
-            last_timestamp = existing_df['date'].max()
-            new_df = new_df[new_df['date'] > last_timestamp]
-            
-            if len(new_df) > 0:
-                # Format back to string
-                existing_df['date'] = existing_df['date'].dt.strftime('%d.%m.%Y %H:%M:%S.000')
-                new_df['date'] = new_df['date'].dt.strftime('%d.%m.%Y %H:%M:%S.000')
-                
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                combined_df.to_csv(self.csv_path, index=False)
-                self.logger.info(f"✅ Added {len(new_df)} new M15 candles")
-            else:
-                self.logger.info("ℹ️ No new M15 data to add")
+        if added > 0:
+            self.logger.info(f"✅ Added {added} new M15 candles")
         else:
-            new_df.to_csv(self.csv_path, index=False)
-            self.logger.info(f"✅ Created CSV with {len(new_df)} candles")
+            self.logger.info("ℹ️ No new M15 data to add")
+    
+    def _load_m15_data(self):
+        """Load M15 candles from the candle store (or CSV) with a parsed 'date' column"""
+        if self.candle_store.exists(self.symbol, 'M15'):
+            return self.candle_store.read(self.symbol, 'M15').reset_index().rename(columns={'Gmt time': 'date'})
+        df = pd.read_csv(self.csv_path)
+        df['date'] = pd.to_datetime(df['date'], format='%d.%m.%Y %H:%M:%S.%f')
+        return df
     
     def create_features(self):
         """Create and save feature list"""
@@ -195,11 +196,13 @@ class PricePredictionSystem:
     
     def train_model(self):
         """Train the price prediction model"""
+        import lightgbm as lgb  # Only training needs lightgbm; predictions use the compiled model
+
         self.logger.info("🤖 Training price prediction model...")
         
         # Load data
-        df = pd.read_csv(self.csv_path)
-        df['date'] = pd.to_datetime(df['date'], format='%d.%m.%Y %H:%M:%S.%f', utc=True)
+        df = self._load_m15_data()
+        df['date'] = df['date'].dt.tz_localize('UTC')
         df = df.rename(columns={'Open':'open','High':'high','Low':'low','Close':'close','Volume':'volume'})
         df = df.set_index('date').sort_index()
         df = df[['open','high','low','close','volume']].dropna()
@@ -239,12 +242,14 @@ class PricePredictionSystem:
         scaler_path = os.path.join(self.model_dir, 'XAUUSD_scaler.joblib')
         
         model.save_model(model_path)
+        export_model(model, compiled_path(model_path))
         joblib.dump(scaler, scaler_path)
         
         self.logger.info("✅ Model training completed")
     
-    def _add_features(self, df):
-        """Add technical features to dataframe"""
+    @staticmethod
+    def _add_features(df, target=True):
+        """Add technical features to dataframe (target=False: no target_r1, the last row is kept)"""
         x = df.copy()
         c = x['close']
         
@@ -291,13 +296,18 @@ class PricePredictionSystem:
         x['cos_dom'] = np.cos(2*np.pi*dom/31)
         
         # Target
-        x['target_r1'] = np.log(c.shift(-1)) - np.log(c)
+        if target:
+            x['target_r1'] = np.log(c.shift(-1)) - np.log(c)
         
         x = x.dropna()
         return x
     
-    def predict_next_price(self):
-        """Predict next close price"""
+    def predict_next_price(self, candles=None):
+        """
+        Predict next close price. `candles`: closed M15 candles (open/high/low/
+        close/volume, time index) to predict from their last one; by default
+        the stored history, whose last candle is left out (no next close).
+        """
         try:
             # Load model and scaler
             model_path = os.path.join(self.model_dir, 'XAUUSD_lgbm_model.txt')
@@ -308,26 +318,37 @@ class PricePredictionSystem:
                 self.logger.warning("⚠️ Model files not found")
                 return None
             
-            model = lgb.Booster(model_file=model_path)
+            model = load_predictor(model_path)
             scaler = joblib.load(scaler_path)
             feature_names = joblib.load(features_path)
             
             # Load and prepare data
-            df = pd.read_csv(self.csv_path)
-            df['date'] = pd.to_datetime(df['date'], format='%d.%m.%Y %H:%M:%S.%f')
-            df = df.rename(columns={'Open':'open','High':'high','Low':'low','Close':'close','Volume':'volume'})
-            df = df.set_index('date').sort_index()
-            df = df[['open','high','low','close','volume']].dropna()
-            
-            # Add features
-            df = self._add_features(df)
-            
-            # Get latest data point
-            latest = df.iloc[-1]
-            current_price = latest['close']
+            if candles is not None:
+                df = candles[['open','high','low','close','volume']].dropna()
+            else:
+                df = self._load_m15_data()
+                df = df.rename(columns={'Open':'open','High':'high','Low':'low','Close':'close','Volume':'volume'})
+                df = df.set_index('date').sort_index()
+                # The last candle has no next close
+                df = df[['open','high','low','close','volume']].dropna().iloc[:-1]
             
-            # Prepare features
-            X = df[feature_names].iloc[-1:].copy()
+            if self.feature_stream is not None:
+                # Streaming features, updated by the candles added since the last prediction
+                features = self.feature_stream.sync(df)
+                if not self.feature_stream.ready:
+                    raise ValueError("Not enough M15 history for the streaming features")
+                current_price = features['close']
+                X = pd.DataFrame([[features[name] for name in feature_names]], columns=feature_names)
+            else:
+                # Add features
+                df = self._add_features(df, target=False)
+
+                # Get latest data point
+                latest = df.iloc[-1]
+                current_price = latest['close']
+
+                # Prepare features
+                X = df[feature_names].iloc[-1:].copy()
             X_scaled = scaler.transform(X)
             
             # Predict
@@ -469,7 +490,7 @@ class PricePredictionSystem:
 
 def main():
     """Main entry point"""
-    system = PricePredictionSystem()
+    system = PricePredictionSystem(streaming=STREAMING_FEATURES)
     system.run_continuous()
 
 
@@ -1,8 +1,12 @@
 import pandas as pd
 import numpy as np
 import joblib
-import lightgbm as lgb
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_predictor import load_predictor
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -22,7 +26,7 @@ class PricePredictor:
             features_path = os.path.join(MODEL_DIR, 'XAUUSD_features.joblib') # Assuming this exists based on prediction_comparison.py
 
             if os.path.exists(model_path):
-                self.model = lgb.Booster(model_file=model_path)
+                self.model = load_predictor(model_path)
             else:
                 print(f"⚠️ Price Prediction Model not found at {model_path}")
 
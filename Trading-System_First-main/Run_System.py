@@ -25,7 +25,6 @@ import time
 import math
 import warnings
 import logging
-from tensorflow import keras
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
 # Load environment variables
@@ -53,6 +52,9 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'detect_FVG'))
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PredictNextPrice'))
 
+from indicator_kernels import rolling_mad
+from model_cache import load_keras_model
+
 # ==================== CONFIGURATION ====================
 # Load from environment variables (Config class)
 SYMBOL = Config.SYMBOL if hasattr(Config, 'SYMBOL') else 'XAUUSD'
@@ -325,9 +327,9 @@ class IntegratedTradingSystem:
             volume_data = self._calculate_volume_indicators(df)
             momentum_data = self._calculate_momentum_indicators(df)
             
-            # Load models and scalers
-            volume_model = keras.models.load_model(os.path.join(self.models_dir, 'Conv1D_Deep_volume.keras'))
-            momentum_model = keras.models.load_model(os.path.join(self.models_dir, 'Conv1D_Deep_momentum.keras'))
+            # Models come from the process-wide cache (loaded once, reloaded when the file changes)
+            volume_model = load_keras_model(os.path.join(self.models_dir, 'Conv1D_Deep_volume.keras'))
+            momentum_model = load_keras_model(os.path.join(self.models_dir, 'Conv1D_Deep_momentum.keras'))
             
             # Normalize and predict
             volume_pred = self._predict_with_model(volume_model, volume_data, 'volume')
@@ -388,7 +390,7 @@ class IntegratedTradingSystem:
         # CCI
         tp = (data['high'] + data['low'] + data['close']) / 3
         sma_tp = tp.rolling(window=20).mean()
-        mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
+        mad = pd.Series(rolling_mad(tp, 20), index=tp.index)
         data['cci'] = (tp - sma_tp) / (0.015 * mad)
         
         # MFI
@@ -37,7 +37,7 @@ import logging
 import logging
 import csv
 from datetime import datetime, timedelta
-from tensorflow import keras
+from concurrent.futures import as_completed
 
 
 
@@ -58,6 +58,15 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pre
 # Add BackEnd to path
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'BackEnd'))
 
+import fvg_analyzer
+from analysis_pool import create_pool
+from candle_store import CandleStore
+from zone_index import ZoneIndex
+from model_registry import get_registry
+from signal_cache import files_version, get_signal_cache
+from zone_scoring import score_fvgs
+from training_worker import get_training_worker
+
 from database import SessionLocal
 from models.account import Account
 from models.trade import Trade
@@ -94,11 +103,20 @@ NEWS_WINDOW_MINUTES = Config.NEWS_WINDOW_MINUTES
 ENABLE_SOUND_ALERT = Config.ENABLE_SOUND_ALERT
 ENABLE_LOG_FILE = Config.ENABLE_LOG_FILE
 ENABLE_AUTO_TRADING = Config.ENABLE_AUTO_TRADING
+ENABLE_STREAMING_FVG = Config.ENABLE_STREAMING_FVG
+STREAM_WARMUP_CANDLES = Config.STREAM_WARMUP_CANDLES
+FVG_SYMBOLS = Config.FVG_SYMBOLS
+FVG_TIMEFRAMES = Config.FVG_TIMEFRAMES
+FVG_WORKERS = Config.FVG_WORKERS
+FVG_TRAIN_THREADS = Config.FVG_TRAIN_THREADS
+FVG_TRAIN_TIME_LIMIT_SECONDS = Config.FVG_TRAIN_TIME_LIMIT_SECONDS
+FVG_TRAIN_EARLY_STOPPING_ROUNDS = Config.FVG_TRAIN_EARLY_STOPPING_ROUNDS
 
 MODELS_DIR = 'models'
 SCALERS_DIR = 'scalers'
 MIN_LOT_SIZE = 0.01
 MAX_LOT_SIZE = 10.0
+SIGNAL_CANDLES = 5 * 96  # M15 history behind the voting/price signals: the trading bars of fetch_market_data(days=7)
 
 
 # ==================== SHARED STATE & CONTEXT ====================
@@ -140,20 +158,43 @@ class SharedState:
     def __init__(self):
         self.lock = threading.Lock()
         self.active_fvg_zones = []
+        self.zones_by_symbol = {}
+        self.zone_indexes = {}  # symbol (None = unkeyed zones) -> ZoneIndex snapshot
         self.last_update_time = None
         self.should_stop = threading.Event()
         self.last_news_fetch = None
         self.news_csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recommendations.csv')
         self.notified_news_events = set()
         
-    def update_zones(self, zones):
+    def update_zones(self, zones, symbol=None):
+        """Publish zones; with `symbol` they replace only that symbol's zones"""
+        index = ZoneIndex(zones)
         with self.lock:
-            self.active_fvg_zones = zones
+            if symbol is None:
+                self.active_fvg_zones = zones
+            else:
+                self.zones_by_symbol[symbol] = zones
+            # Copy-on-write: readers keep the snapshot they already hold
+            zone_indexes = dict(self.zone_indexes)
+            zone_indexes[symbol] = index
+            self.zone_indexes = zone_indexes
             self.last_update_time = datetime.now()
             
-    def get_zones(self):
+    def get_zones(self, symbol=None):
+        """Unkeyed zones plus the zones published for `symbol` (all symbols if None)"""
         with self.lock:
-            return self.active_fvg_zones.copy()
+            if symbol is not None:
+                return self.active_fvg_zones + self.zones_by_symbol.get(symbol, [])
+            return self.active_fvg_zones + [zone for zones in self.zones_by_symbol.values() for zone in zones]
+    
+    def zones_at(self, symbol, bid, ask):
+        """Zones whose range contains the price (ask for BUY, bid for SELL) - lock-free"""
+        zone_indexes = self.zone_indexes
+        matches = []
+        for key in dict.fromkeys([None, symbol]):
+            if key in zone_indexes:
+                matches.extend(zone_indexes[key].zones_at(bid, ask))
+        return matches
     
     def stop_all(self):
         self.should_stop.set()
@@ -311,6 +352,71 @@ class AccountMonitor:
     
     # Removed initialize_mt5 and shutdown_mt5 as they are handled by MT5Context
     
+    def cached_signal(self, signal, compute, *model_paths):
+        """
+        compute(bar_time) once per closed M15 candle and model version, shared by every monitor and account.
+        Monitors run inside MT5Context's lock, so they never compute concurrently and the cache's
+        single-flight does not merge work here; the saving is that later monitors hit the cached result.
+        """
+        # Position 1 skips the candle that is still forming
+        rates = mt5.copy_rates_from_pos(SYMBOL, mt5.TIMEFRAME_M15, 1, 1)
+        if rates is None or len(rates) == 0:
+            self.logger.warning("⚠️ No closed M15 candle: signal unavailable")
+            return None
+        bar_time = int(rates[0]['time'])
+        return get_signal_cache(signal).get(SYMBOL, 'M15', bar_time, files_version(*model_paths),
+                                            lambda: compute(pd.to_datetime(bar_time, unit='s')))
+    
+    def closed_candles(self, bar_time, count=SIGNAL_CANDLES):
+        """The `count` M15 candles ending at the closed bar_time (open/high/low/close/volume), or None"""
+        # Anchored to the bar's own (server) time, not the local clock, so the broker's time offset
+        # cannot shift the window
+        rates = mt5.copy_rates_from(SYMBOL, mt5.TIMEFRAME_M15, int(bar_time.timestamp()), count)
+        if rates is None or len(rates) == 0:
+            self.logger.warning(f"⚠️ No M15 candles up to {bar_time}: {mt5.last_error()}")
+            return None
+        df = pd.DataFrame(rates)
+        df['time'] = pd.to_datetime(df['time'], unit='s')
+        df = df.set_index('time').rename(columns={'tick_volume': 'volume'})[['open', 'high', 'low', 'close', 'volume']]
+        # copy_rates_from stops at bar_time; guard against candles opened after it all the same
+        df = df.loc[:bar_time]
+        if df.empty or df.index[-1] != bar_time:
+            # bar_time missing from the fetched data: a signal from other candles must not be cached under it
+            self.logger.warning(f"⚠️ M15 candle {bar_time} not in the fetched data")
+            return None
+        return df
+    
+    def voting_signal(self):
+        """Final recommendation of the 7 voting models on the last closed candle (SignalCache)"""
+        from getDataAndVoting import MarketPredictionSystem
+        
+        def compute(bar_time):
+            df = self.closed_candles(bar_time)
+            if df is None:
+                return None
+            voting_system = MarketPredictionSystem(
+                symbol=SYMBOL,
+                models_dir=self.models_dir,
+                scalers_dir=self.scalers_dir
+            )
+            voting_system.df = df
+            return voting_system.get_final_recommendation()
+        
+        return self.cached_signal('voting', compute, self.models_dir, self.scalers_dir)
+    
+    def price_prediction_signal(self):
+        """Next 15-min close prediction from the last closed candle (SignalCache)"""
+        from PredictNextPrice.Run_PricePredictor import MODEL_DIR, PricePredictionSystem
+        
+        def compute(bar_time):
+            df = self.closed_candles(bar_time)
+            if df is None:
+                return None
+            return PricePredictionSystem().predict_next_price(candles=df)
+        
+        model_dir = os.path.join(self.script_dir, 'PredictNextPrice', MODEL_DIR)
+        return self.cached_signal('price_prediction', compute, model_dir)
+    
     def get_current_price(self):
         tick = mt5.symbol_info_tick(SYMBOL)
         return (tick.bid, tick.ask) if tick else (None, None)
@@ -599,9 +705,7 @@ class AdvancedStrategyMonitor(AccountMonitor):
 
         # 2. Price Prediction (Short-term trend)
         try:
-            from PredictNextPrice.Run_PricePredictor import PricePredictionSystem
-            price_system = PricePredictionSystem()
-            prediction = price_system.predict_next_price()
+            prediction = self.price_prediction_signal()
             
             if not prediction:
                 self.logger.info("   ❌ Price prediction unavailable")
@@ -625,19 +729,7 @@ class AdvancedStrategyMonitor(AccountMonitor):
 
         # 3. Voting System (Market Sentiment)
         try:
-            from getDataAndVoting import MarketPredictionSystem
-            voting_system = MarketPredictionSystem(
-                symbol=SYMBOL,
-                models_dir=self.models_dir,
-                scalers_dir=self.scalers_dir
-            )
-            
-            # Initialize MT5 if needed (we are in context, but class might need init)
-            if not voting_system.mt5_initialized:
-                voting_system.initialize_mt5()
-                
-            voting_system.fetch_market_data(timeframe=mt5.TIMEFRAME_M15, days=7)
-            voting_result = voting_system.get_final_recommendation()
+            voting_result = self.voting_signal()
             
             if not voting_result:
                 self.logger.info("   ❌ Voting unavailable")
@@ -680,8 +772,8 @@ class AdvancedStrategyMonitor(AccountMonitor):
                 if not bid or not ask:
                     return
                 
-                # 2. Check Zones
-                zones = self.shared_state.get_zones()
+                # 2. Check Zones (only those containing the current price)
+                zones = self.shared_state.zones_at(SYMBOL, bid, ask)
                 if zones:
                     for zone in zones:
                         if self.is_zone_used(zone):
@@ -754,7 +846,7 @@ class SimpleStrategyMonitor(AccountMonitor):
                 if not bid or not ask:
                     return
 
-                zones = self.shared_state.get_zones()
+                zones = self.shared_state.zones_at(SYMBOL, bid, ask)
                 if zones:
                     for zone in zones:
                         if self.is_zone_used(zone):
@@ -798,25 +890,8 @@ class VotingStrategyMonitor(AccountMonitor):
         self.logger.info("\n🗳️ Running Full Voting System (7 Models)...")
         
         try:
-            from getDataAndVoting import MarketPredictionSystem
-            
-            voting_system = MarketPredictionSystem(
-                symbol=SYMBOL,
-                models_dir=self.models_dir,
-                scalers_dir=self.scalers_dir
-            )
-            
-            # Initialize MT5 if needed (using our connection)
-            # Note: We are already inside MT5Context, so mt5 is initialized.
-            # We call this just to satisfy the class state if it checks self.mt5_initialized
-            if not voting_system.mt5_initialized:
-                voting_system.initialize_mt5()
-            
-            # Fetch market data
-            voting_system.fetch_market_data(timeframe=mt5.TIMEFRAME_M15, days=7)
-            
-            # Get final recommendation
-            result = voting_system.get_final_recommendation()
+            # Computed once per closed candle; later checks and other accounts reuse it
+            result = self.voting_signal()
             
             if result:
                 self.logger.info(f"✅ Full Voting Result: {result['recommendation'].upper()}")
@@ -835,12 +910,8 @@ class VotingStrategyMonitor(AccountMonitor):
         self.logger.info("\n💰 Predicting Next Price...")
         
         try:
-            from PredictNextPrice.Run_PricePredictor import PricePredictionSystem
-            
-            price_system = PricePredictionSystem()
-            
-            # Get prediction
-            prediction = price_system.predict_next_price()
+            # Get prediction (once per closed candle, see voting_signal)
+            prediction = self.price_prediction_signal()
             
             if prediction:
                 self.logger.info(f"✅ Price Prediction:")
@@ -1115,9 +1186,9 @@ class DataUpdater:
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
         self.fvg_dir = os.path.join(self.script_dir, 'detect_FVG')
         
-        # Dynamic filename based on symbol
+        # Dynamic filename based on symbol (live-horizon analysis written by Run_FVG)
         safe_symbol = symbol.replace("/", "")
-        self.fvg_csv_path = os.path.join(self.fvg_dir, f'fvg_analysis_{safe_symbol}_{timeframe}_4H.csv')
+        self.fvg_csv_path = os.path.join(self.fvg_dir, f'fvg_analysis_{safe_symbol}_{timeframe}_4H_live.csv')
         
         self.logger = logging.getLogger(f'DataUpdater_{symbol}')
         self.logger.setLevel(logging.INFO)
@@ -1126,16 +1197,35 @@ class DataUpdater:
         self.logger.addHandler(handler)
         
         self.model_path = os.path.join(self.fvg_dir, 'fvg_strong_classifier.joblib')
+        self.model_registry = get_registry(os.path.join(self.fvg_dir, 'models'), legacy_path=self.model_path)
         self.model = None
+        self.encoder = None
+        self.model_version = None
         self.load_model()
         
+        # Classifier training runs in a background process, outside the MT5 lock
+        self.training_worker = get_training_worker(FVG_TRAIN_THREADS, FVG_TRAIN_TIME_LIMIT_SECONDS,
+                                                   FVG_TRAIN_EARLY_STOPPING_ROUNDS)
+        self.training_job = None
+        
+        # In-process zone stream (ENABLE_STREAMING_FVG)
+        self.detector = None
+        self.streamed_zones = {}
+        self.last_h1_time = None
+        
     def load_model(self):
+        """Pick up the current model version from the registry (cached between versions)"""
         try:
-            if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
-                self.logger.info("✅ FVG Model loaded")
-            else:
-                self.logger.warning("⚠️ FVG Model not found")
+            model, artifacts, version = self.model_registry.load_with_artifacts()
+            if model is None:
+                if self.model is None:
+                    self.logger.warning("⚠️ FVG Model not found")
+                return
+            if version != self.model_version:
+                self.logger.info(f"✅ FVG Model loaded (version {version})")
+            self.model, self.model_version = model, version
+            # Feature encoder trained with this model version (default feature set for older models)
+            self.encoder = artifacts.get('encoder')
         except Exception as e:
             self.logger.error(f"❌ Failed to load model: {e}")
     
@@ -1152,13 +1242,14 @@ class DataUpdater:
             # Note: We assume we are inside MT5Context here
             # FVGTradingSystem.initialize_mt5() will be called but should be fine
             
-            # Run full data update
-            fvg_system.full_data_update()
+            # Fetch data and run the live analysis; training is submitted to the
+            # background worker after the MT5 lock is released (submit_training)
+            fvg_system.full_data_update(train=False)
+            self.training_job = fvg_system.training_job()
             
             # We do NOT call fvg_system.shutdown_mt5() here because MT5Context handles it
-            # But FVGTradingSystem might call it internally? 
             # Checked Run_FVG.py: full_data_update() does NOT call shutdown_mt5().
-            # It just calls _fetch_and_update_data, _run_fvg_analysis, _train_classifier.
+            # It just calls _fetch_and_update_data and _run_fvg_analysis.
             # So we are safe.
             
             self.logger.info("✅ FVG analysis completed")
@@ -1170,76 +1261,137 @@ class DataUpdater:
             self.logger.error(traceback.format_exc())
             return False
     
+    def submit_training(self):
+        """Report the last background training and start the next one (no MT5 needed)"""
+        outcome = self.training_worker.poll()
+        if outcome:
+            status, result = outcome
+            if status == 'error':
+                self.logger.error(f"❌ Background model training failed: {result}")
+            elif result and result.get('trained'):
+                self.logger.info(f"✅ Background training published model version {result['version']} "
+                                 f"({result['iterations']} trees)")
+            elif result and result['reason'] == 'rejected':
+                self.logger.warning(f"⚠️ Background training not published ({result['rejection']}) "
+                                    f"- keeping the current model")
+            elif result:
+                self.logger.info(f"⏭️ Model training skipped - {result['skipped_fits']} fits skipped since the last training")
+        
+        if self.training_job is None:
+            return
+        if self.training_worker.submit(self.training_job):
+            self.logger.info("🤖 FVG classifier training started in the background")
+        else:
+            self.logger.info("🤖 Previous FVG classifier training still running - keeping the current model")
+    
     def load_fvg_zones(self):
         try:
             if not os.path.exists(self.fvg_csv_path):
                 self.logger.warning("⚠️ FVG file not found - will run analysis")
                 return []
             
-            fvg_data = pd.read_csv(self.fvg_csv_path)
+            # Only the last rows are read (reverse seek), then scored in one batch
+            fvg_data = fvg_analyzer.read_recent_fvgs(self.fvg_csv_path, 10)
             if len(fvg_data) == 0:
                 return []
             
-            zones = []
-            for _, row in fvg_data.tail(10).iterrows():
-                # Calculate score if model exists
-                score = 50
-                if self.model:
-                    try:
-                        features = self._prepare_features(row)
-                        # Align features with model
-                        model_features = self.model.booster_.feature_name()
-                        features_aligned = features.reindex(columns=model_features, fill_value=0)
-                        
-                        probability = self.model.predict_proba(features_aligned)[0, 1]
-                        score = int(probability * 100)
-                    except Exception as e:
-                        self.logger.error(f"❌ Scoring failed: {e}")
-
-                zone = {
-                    'fvg_time': row['time_created'],
-                    'fvg_bottom': row['fvg_bottom'],
-                    'fvg_top': row['fvg_top'],
-                    'fvg_size': row['fvg_size'],
-                    'score': score,
-                    'direction': 'BUY' if row.get('FVG_Type', '') == 'Bullish' else 'SELL',
-                }
-                zones.append(zone)
-            
-            return zones
+            return self._build_zones(fvg_data)
         except Exception as e:
             self.logger.error(f"❌ Failed to load zones: {e}")
             return []
 
-    def _prepare_features(self, fvg_row):
-        """Prepare features for model prediction"""
-        df = pd.DataFrame([fvg_row])
-        categorical_features = ['FVG_Type', 'session', 'bias_H1']
-        # Handle missing columns if any
-        for col in categorical_features:
-            if col not in df.columns:
-                df[col] = 'N/A'
-                
-        df = pd.get_dummies(df, columns=categorical_features, drop_first=True)
-        
-        expected_features = [
-            'fvg_size', 'volume_spike_at_fvg', 'FVG_Type_Bullish',
-            'session_London', 'session_New York', 'session_Other',
-            'bias_H1_Bullish', 'bias_H1_Neutral'
-        ]
-        
-        for feat in expected_features:
-            if feat not in df.columns:
-                df[feat] = 0
-        
-        return df
+    def _build_zones(self, fvgs, score=True):
+        """
+        Score FVGs (analysis rows DataFrame or list of streamed zones) in one batch and convert them to monitor zones.
+        score=False: no classifier fits these FVGs; they get score 0 and never count as strong.
+        """
+        records = fvgs.to_dict('records') if isinstance(fvgs, pd.DataFrame) else list(fvgs)
+        # Calculate scores if model exists
+        scores = [50 if score else 0] * len(records)
+        if self.model and score:
+            try:
+                scores = score_fvgs(self.model, records, self.encoder).tolist()
+            except Exception as e:
+                self.logger.error(f"❌ Scoring failed: {e}")
+
+        return [{
+            'fvg_time': fvg['time_created'],
+            'fvg_bottom': fvg['fvg_bottom'],
+            'fvg_top': fvg['fvg_top'],
+            'fvg_size': fvg['fvg_size'],
+            'score': score,
+            'direction': 'BUY' if fvg.get('FVG_Type', '') == 'Bullish' else 'SELL',
+        } for fvg, score in zip(records, scores)]
+
+    def _fetch_closed_rates(self, timeframe, count):
+        """Fetch closed candles as (time, open, high, low, close, volume) tuples"""
+        # Position 1 skips the candle that is still forming
+        rates = mt5.copy_rates_from_pos(self.symbol, timeframe, 1, count)
+        if rates is None or len(rates) == 0:
+            return []
+        times = pd.to_datetime(rates['time'], unit='s')
+        return list(zip(times, rates['open'], rates['high'], rates['low'], rates['close'], rates['tick_volume']))
+
+    def stream_fvg_zones(self):
+        """
+        Feed the candles closed since the last cycle into the streaming FVG
+        detector and return its zone events (runs inside MT5Context).
+        The first call replays STREAM_WARMUP_CANDLES of history.
+        """
+        from detect_FVG.streaming_fvg import StreamingFVGDetector
+
+        warm_up = self.detector is None
+        count = STREAM_WARMUP_CANDLES if warm_up else CHECK_INTERVAL_MINUTES // 15 + 8
+        m15_candles = self._fetch_closed_rates(mt5.TIMEFRAME_M15, count)
+        h1_candles = self._fetch_closed_rates(mt5.TIMEFRAME_H1, count // 4 + 2)
+        if not m15_candles:
+            self.logger.warning("⚠️ No M15 data for FVG stream")
+            return []
+
+        if warm_up:
+            self.detector = StreamingFVGDetector()
+            self.streamed_zones = {}
+            self.last_h1_time = None
+        elif m15_candles[0][0] > self.detector.last_time:
+            # Candles were missed (e.g. reconnect) - rebuild from history
+            self.logger.warning("⚠️ Gap in streamed candles - warming up again")
+            self.detector = None
+            return self.stream_fvg_zones()
+
+        m15_candles = [c for c in m15_candles if self.detector.last_time is None or c[0] > self.detector.last_time]
+        h1_candles = [c for c in h1_candles if self.last_h1_time is None or c[0] > self.last_h1_time]
+
+        events = []
+        h1_index = 0
+        for candle in m15_candles:
+            # H1 bias is applied from the H1 candle's open time, as in fvg_analyzer.py
+            while h1_index < len(h1_candles) and h1_candles[h1_index][0] <= candle[0]:
+                self.detector.update_h1(h1_candles[h1_index][4])
+                self.last_h1_time = h1_candles[h1_index][0]
+                h1_index += 1
+            events.extend(self.detector.update(*candle))
+        return events
+
+    def apply_zone_events(self, events):
+        """Apply streamed zone events and return the active zones"""
+        created = [event['zone'] for event in events if event['event'] == 'zone_created']
+        built = iter(self._build_zones(created))
+        for event in events:
+            zone_time = event['zone']['time_created']
+            if event['event'] == 'zone_created':
+                self.streamed_zones[zone_time] = next(built)
+            elif event['event'] == 'zone_retested' and zone_time in self.streamed_zones:
+                self.streamed_zones[zone_time]['retested'] = True
+            elif event['event'] == 'zone_invalidated':
+                self.streamed_zones.pop(zone_time, None)
+        return list(self.streamed_zones.values())
 
-    
     def run(self):
         self.logger.info("\n" + "="*60)
         self.logger.info("🔄 DATA UPDATER STARTED")
         self.logger.info(f"   Interval: {CHECK_INTERVAL_MINUTES} min")
         self.logger.info( "   Auto FVG Analysis: ENABLED")
+        self.logger.info(f"   Streaming FVG Zones: {'ENABLED' if ENABLE_STREAMING_FVG else 'DISABLED'}")
         self.logger.info("="*60)
         
         try:
@@ -1257,9 +1409,15 @@ class DataUpdater:
                 
                 # Run FVG analysis every cycle using strict context
                 self.mt5_context.execute(self.credentials, self.run_fvg_analysis)
+                self.submit_training()
                 
-                # Load zones
-                zones = self.load_fvg_zones()
+                # Load zones (with the latest published model)
+                self.load_model()
+                if ENABLE_STREAMING_FVG:
+                    events = self.mt5_context.execute(self.credentials, self.stream_fvg_zones) or []
+                    zones = self.apply_zone_events(events)
+                else:
+                    zones = self.load_fvg_zones()
                 self.shared_state.update_zones(zones)
                 self.logger.info(f"\n📊 Updated: {len(zones)} zones")
                 
@@ -1276,6 +1434,137 @@ class DataUpdater:
             self.logger.error(traceback.format_exc())
 
 
+# ==================== MULTI-SYMBOL DATA UPDATER ====================
+MT5_TIMEFRAMES = {'M15': mt5.TIMEFRAME_M15, 'H1': mt5.TIMEFRAME_H1, 'H4': mt5.TIMEFRAME_H4}
+FVG_HISTORY_CANDLES = 20000  # First download per symbol/timeframe
+FVG_UPDATE_CANDLES = 500  # Later cycles (only candles newer than the store are kept)
+# Symbols the FVG classifier was trained on: its features (fvg_size) are in the symbol's price units
+FVG_CLASSIFIER_SYMBOLS = {SYMBOL, fvg_analyzer.CANDLE_SYMBOL}
+
+
+class MultiSymbolDataUpdater(DataUpdater):
+    """
+    Runs the FVG analysis for several symbols and timeframes every cycle.
+    Candles are fetched into the candle store inside MT5Context, then each
+    symbol/timeframe is analysed in its own worker process and the zones are
+    published to SharedState per symbol. Only symbols in FVG_CLASSIFIER_SYMBOLS
+    are scored; the zones of the others are published with score 0 (not
+    tradeable as strong zones) and scored=False.
+    """
+    def __init__(self, shared_state, mt5_context, credentials, symbols, timeframes=('M15', 'H1'), max_workers=None):
+        super().__init__(shared_state, mt5_context, credentials, symbol="MULTI")
+        self.symbols = list(symbols)
+        self.timeframes = list(timeframes)
+        self.max_workers = max_workers or os.cpu_count()
+        self.candle_store = CandleStore()
+        self.output_dir = os.path.join(self.fvg_dir, 'multi_symbol')
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.executor = None
+
+    def fetch_candles(self):
+        """Fetch closed candles for every symbol/timeframe into the candle store (runs inside MT5Context)"""
+        timeframes = set(self.timeframes) | {fvg_analyzer.BIAS_TIMEFRAMES[tf] for tf in self.timeframes}
+        available = []
+        for symbol in self.symbols:
+            if not mt5.symbol_select(symbol, True):
+                self.logger.warning(f"⚠️ Symbol {symbol} not available")
+                continue
+            complete = True
+            for timeframe in timeframes:
+                stored = self.candle_store.exists(symbol, timeframe)
+                count = FVG_UPDATE_CANDLES if stored else FVG_HISTORY_CANDLES
+                # Position 1 skips the candle that is still forming
+                rates = mt5.copy_rates_from_pos(symbol, MT5_TIMEFRAMES[timeframe], 1, count)
+                if rates is None or len(rates) == 0:
+                    self.logger.warning(f"⚠️ No {timeframe} data for {symbol} - skipped this cycle")
+                    complete = False
+                    break
+                
+                candles = pd.DataFrame(rates)
+                candles['time'] = pd.to_datetime(candles['time'], unit='s')
+                candles = candles.rename(columns={
+                    'open': 'Open',
+                    'high': 'High',
+                    'low': 'Low',
+                    'close': 'Close',
+                    'tick_volume': 'Volume'
+                })
+                self.candle_store.append(symbol, timeframe, candles)
+            if complete:
+                available.append(symbol)
+        return available
+
+    def analyze_symbols(self, symbols):
+        """Analyse every symbol/timeframe in the process pool and publish the zones per symbol"""
+        futures = {}
+        for symbol in symbols:
+            for timeframe in self.timeframes:
+                future = self.executor.submit(fvg_analyzer.analyze_symbol, symbol, timeframe, self.output_dir)
+                futures[future] = (symbol, timeframe)
+
+        zones_by_symbol = {symbol: [] for symbol in symbols}
+        failed = set()
+        for future in as_completed(futures):
+            symbol, timeframe = futures[future]
+            try:
+                recent_fvgs = future.result()
+            except Exception as e:
+                self.logger.error(f"❌ FVG analysis failed for {symbol} {timeframe}: {e}")
+                failed.add(symbol)
+                continue
+            scored = symbol in FVG_CLASSIFIER_SYMBOLS
+            for zone in self._build_zones(recent_fvgs, score=scored):
+                zone.update(symbol=symbol, timeframe=timeframe, scored=scored)
+                zones_by_symbol[symbol].append(zone)
+
+        # Symbols with a failed analysis keep their previous zones
+        published = 0
+        for symbol, zones in zones_by_symbol.items():
+            if symbol not in failed:
+                self.shared_state.update_zones(zones, symbol=symbol)
+                published += len(zones)
+        return published
+
+    def run(self):
+        self.logger.info("\n" + "="*60)
+        self.logger.info("🔄 MULTI-SYMBOL DATA UPDATER STARTED")
+        self.logger.info(f"   Symbols: {', '.join(self.symbols)}")
+        self.logger.info(f"   Timeframes: {', '.join(self.timeframes)}")
+        self.logger.info(f"   Workers: {self.max_workers}")
+        self.logger.info(f"   Scored: {', '.join(s for s in self.symbols if s in FVG_CLASSIFIER_SYMBOLS) or 'none'}")
+        self.logger.info("="*60)
+        
+        # Spawn workers that import only fvg_analyzer (not this script, MT5 or the database)
+        self.executor = create_pool(self.max_workers)
+        try:
+            # Initial News Fetch
+            self.shared_state.fetch_daily_news()
+            
+            while not self.shared_state.should_stop.is_set():
+                self.shared_state.fetch_daily_news()
+                
+                # Only the download needs the MT5 lock; the analysis runs in the pool
+                symbols = self.mt5_context.execute(self.credentials, self.fetch_candles) or []
+                started = time.time()
+                self.load_model()
+                published = self.analyze_symbols(symbols)
+                self.logger.info(f"\n📊 Updated: {published} zones for {len(symbols)} symbols in {time.time() - started:.1f}s")
+                
+                # Wait for next cycle
+                for _ in range(CHECK_INTERVAL_MINUTES * 60):
+                    if self.shared_state.should_stop.is_set():
+                        break
+                    time.sleep(1)
+        except KeyboardInterrupt:
+            self.logger.info("\n⚠️ Stopped by user")
+        except Exception as e:
+            self.logger.error(f"\n❌ Error: {e}")
+            import traceback
+            self.logger.error(traceback.format_exc())
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
 # ==================== TRAILING STOP MANAGER ====================
 class TrailingStopManager:
     """Manages trailing stop-loss at 1:1 ratio for all strategies"""
@@ -1635,6 +1924,17 @@ def main():
                     "server": server.ServerName
                 }
                 
+                if FVG_SYMBOLS:
+                    # ✅ One process-pool updater covers every configured symbol
+                    data_updater = MultiSymbolDataUpdater(shared_state, mt5_context, data_creds,
+                                                          FVG_SYMBOLS, FVG_TIMEFRAMES, FVG_WORKERS)
+                    t_data = threading.Thread(target=data_updater.run, daemon=True)
+                    t_data.start()
+                    threads.append(t_data)
+                    pairs_processed.update(FVG_SYMBOLS)
+                    print(f"✅ Multi-Symbol Data Updater started for {', '.join(FVG_SYMBOLS)} using Account {source_account.AccountLoginNumber}")
+                    break
+                
                 # ✅ Create ONE DataUpdater per pair (shared by all strategies)
                 data_updater = DataUpdater(shared_state, mt5_context, data_creds, pair_name, config.Timeframe)
                 t_data = threading.Thread(target=data_updater.run, daemon=True)
@@ -0,0 +1,437 @@
+'''
+Benchmarks the indicator computation of one voting recommendation: the
+original 7 calculate_*_indicators methods (each recomputing its indicators
+on its own copy of the data) against MarketPredictionSystem's shared
+IndicatorEngine (each indicator computed once per snapshot, over the whole
+frame and over the last-bar tail window), and checks that every model's
+feature row matches. Then times the engine against the length of the
+fetched history.
+
+The last-bar window only pays off on long histories. The live fetch
+(fetch_market_data(days=7), ~480 M15 bars) is barely longer than the
+window itself, so there both evaluations cost the same (fixed pandas
+overhead per indicator dominates); the window is only 2-3x faster at a
+year of bars.
+
+Usage:
+    python benchmark_indicators.py [OHLCV_CSV] [REPEATS]
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from getDataAndVoting import MarketPredictionSystem
+from benchmark_kernels import random_bars
+from indicator_engine import MODEL_FEATURES, WARMUP_MARGIN, IndicatorEngine, max_lookback
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'XAUUSD-15M.csv')
+DEFAULT_REPEATS = 20
+TOLERANCE = 1e-9  # The NumPy kernels (OBV, slope, CCI deviation) round differently from the loops they replace
+TAIL_TOLERANCE = 1e-6  # EMAs started inside the tail window keep EMA_TOLERANCE of their seed error
+HISTORY_DAYS = (7, 30, 365)  # Calendar days fetched; 7 is the live fetch
+LIVE_DAYS = 7
+BARS_PER_DAY = 96  # M15
+TRADING_DAYS_PER_WEEK = 5  # MT5 returns no bars for the weekend
+
+
+def history_bars(days):
+    """M15 bars in a fetch of `days` calendar days"""
+    return round(days * TRADING_DAYS_PER_WEEK / 7) * BARS_PER_DAY
+
+
+def load_ohlcv(csv_path):
+    """The CSV in fetch_market_data's layout (tick volume as uint64, like MT5)"""
+    df = pd.read_csv(csv_path)
+    df.columns = [column.lower() for column in df.columns]
+    df['time'] = pd.to_datetime(df['date'], format='%d.%m.%Y %H:%M:%S.%f')
+    df = df.set_index('time')[['open', 'high', 'low', 'close', 'volume']]
+    df['volume'] = df['volume'].astype(np.uint64)
+    return df
+
+
+# ---------- the original calculate_*_indicators methods ----------
+
+
+def legacy_momentum(data):
+    """حساب مؤشرات الزخم"""
+    df = data.copy()
+
+    # RSI
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['rsi'] = 100 - (100 / (1 + rs))
+
+    # Stochastic
+    low_14 = df['low'].rolling(window=14).min()
+    high_14 = df['high'].rolling(window=14).max()
+    df['stoch_k'] = 100 * ((df['close'] - low_14) / (high_14 - low_14))
+    df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
+
+    # CCI
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    sma_tp = tp.rolling(window=20).mean()
+    mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
+    df['cci'] = (tp - sma_tp) / (0.015 * mad)
+
+    # MFI
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    mf = tp * df['volume']
+    mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
+    mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
+    df['mfi'] = 100 - (100 / (1 + mf_pos / mf_neg))
+
+    # Williams %R
+    df['williams_r'] = -100 * ((high_14 - df['close']) / (high_14 - low_14))
+
+    return df[['volume', 'rsi', 'stoch_k', 'stoch_d', 'cci', 'mfi', 'williams_r']].iloc[-1:].copy()
+
+
+def legacy_support_resistance(data):
+    """حساب مؤشرات الدعم والمقاومة"""
+    df = data.copy()
+
+    # Pivot Points
+    df['pivot'] = (df['high'] + df['low'] + df['close']) / 3
+    df['r1'] = 2 * df['pivot'] - df['low']
+    df['r2'] = df['pivot'] + (df['high'] - df['low'])
+    df['r3'] = df['high'] + 2 * (df['pivot'] - df['low'])
+    df['s1'] = 2 * df['pivot'] - df['high']
+    df['s2'] = df['pivot'] - (df['high'] - df['low'])
+    df['s3'] = df['low'] - 2 * (df['high'] - df['pivot'])
+
+    # SMA
+    df['sma_20'] = df['close'].rolling(window=20).mean()
+
+    # Donchian Channel
+    df['donchian_upper'] = df['high'].rolling(window=20).max()
+    df['donchian_lower'] = df['low'].rolling(window=20).min()
+    df['donchian_middle'] = (df['donchian_upper'] + df['donchian_lower']) / 2
+
+    return df[['close', 'r1', 'r2', 'r3', 'sma_20', 'donchian_middle', 's1', 's2', 's3', 'volume']].iloc[-1:].copy()
+
+
+def legacy_trend(data):
+    """حساب مؤشرات الاتجاه"""
+    df = data.copy()
+
+    # MACD
+    exp1 = df['close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['close'].ewm(span=26, adjust=False).mean()
+    df['macd'] = exp1 - exp2
+    df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
+    df['macd_histogram'] = df['macd'] - df['macd_signal']
+
+    # ADX and DI
+    high_diff = df['high'].diff()
+    low_diff = -df['low'].diff()
+
+    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+
+    tr1 = df['high'] - df['low']
+    tr2 = abs(df['high'] - df['close'].shift(1))
+    tr3 = abs(df['low'] - df['close'].shift(1))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+    atr = tr.rolling(window=14).mean()
+    df['plus_di'] = 100 * (plus_dm.rolling(window=14).mean() / atr)
+    df['minus_di'] = 100 * (minus_dm.rolling(window=14).mean() / atr)
+
+    # SMAs
+    df['sma_50'] = df['close'].rolling(window=50).mean()
+    df['sma_200'] = df['close'].rolling(window=200).mean()
+
+    return df[['close', 'macd_histogram', 'plus_di', 'minus_di', 'macd', 'sma_200', 'sma_50', 'volume']].iloc[
+           -1:].copy()
+
+
+def legacy_volatility(data):
+    """حساب مؤشرات التقلب"""
+    df = data.copy()
+
+    # ATR
+    tr1 = df['high'] - df['low']
+    tr2 = abs(df['high'] - df['close'].shift(1))
+    tr3 = abs(df['low'] - df['close'].shift(1))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    df['atr'] = tr.rolling(window=14).mean()
+
+    # Bollinger Bands
+    df['bb_middle'] = df['close'].rolling(window=20).mean()
+    bb_std = df['close'].rolling(window=20).std()
+    df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
+    df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
+    df['bb_width'] = df['bb_upper'] - df['bb_lower']
+
+    # Keltner Channels
+    df['kc_middle'] = df['close'].ewm(span=20, adjust=False).mean()
+    df['kc_upper'] = df['kc_middle'] + (df['atr'] * 2)
+    df['kc_lower'] = df['kc_middle'] - (df['atr'] * 2)
+
+    # BB Squeeze
+    df['bb_squeeze'] = ((df['bb_upper'] - df['bb_lower']) < (df['kc_upper'] - df['kc_lower'])).astype(int)
+
+    return df[['close', 'kc_upper', 'atr', 'kc_lower', 'bb_squeeze', 'bb_width', 'bb_middle', 'volume']].iloc[
+           -1:].copy()
+
+
+def legacy_volume(data):
+    """حساب مؤشرات الحجم"""
+    df = data.copy()
+
+    # VWAP
+    df['vwap'] = (df['volume'] * (df['high'] + df['low'] + df['close']) / 3).cumsum() / df['volume'].cumsum()
+
+    # Volume ROC
+    df['volume_roc'] = df['volume'].pct_change(periods=14) * 100
+
+    # CMF (Chaikin Money Flow)
+    mf_multiplier = ((df['close'] - df['low']) - (df['high'] - df['close'])) / (df['high'] - df['low'])
+    mf_volume = mf_multiplier * df['volume']
+    df['cmf'] = mf_volume.rolling(window=20).sum() / df['volume'].rolling(window=20).sum()
+
+    # A/D Line Change
+    df['ad_line'] = (mf_multiplier * df['volume']).cumsum()
+    df['ad_line_change'] = df['ad_line'].diff()
+
+    return df[['close', 'vwap', 'volume_roc', 'cmf', 'ad_line_change', 'volume']].iloc[-1:].copy()
+
+
+def legacy_impulse(data):
+    """حساب مؤشرات Impulse"""
+    df = data.copy()
+
+    # Stochastic
+    low_14 = df['low'].rolling(window=14).min()
+    high_14 = df['high'].rolling(window=14).max()
+    df['Stoch_K'] = 100 * ((df['close'] - low_14) / (high_14 - low_14))
+    df['Stoch_D'] = df['Stoch_K'].rolling(window=3).mean()
+
+    # RSI
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    # Moving Averages
+    df['MA_Fast_Blue'] = df['close'].ewm(span=12, adjust=False).mean()
+    df['MA_Slow_Red'] = df['close'].ewm(span=26, adjust=False).mean()
+
+    # MFI (Money Flow Index)
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    mf = tp * df['volume']
+    mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
+    mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
+    df['MFI'] = 100 - (100 / (1 + mf_pos / mf_neg))
+
+    # OBV (On-Balance Volume)
+    obv = [0]
+    for i in range(1, len(df)):
+        if df['close'].iloc[i] > df['close'].iloc[i - 1]:
+            obv.append(obv[-1] + df['volume'].iloc[i])
+        elif df['close'].iloc[i] < df['close'].iloc[i - 1]:
+            obv.append(obv[-1] - df['volume'].iloc[i])
+        else:
+            obv.append(obv[-1])
+    df['OBV'] = obv
+
+    # ATR (Average True Range)
+    tr1 = df['high'] - df['low']
+    tr2 = abs(df['high'] - df['close'].shift(1))
+    tr3 = abs(df['low'] - df['close'].shift(1))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    df['ATR'] = tr.rolling(window=14).mean()
+
+    # ADX and Directional Indicators
+    high_diff = df['high'].diff()
+    low_diff = -df['low'].diff()
+
+    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+
+    atr = tr.rolling(window=14).mean()
+    df['Plus_DI'] = 100 * (plus_dm.rolling(window=14).mean() / atr)
+    df['Minus_DI'] = 100 * (minus_dm.rolling(window=14).mean() / atr)
+
+    dx = 100 * abs(df['Plus_DI'] - df['Minus_DI']) / (df['Plus_DI'] + df['Minus_DI'])
+    df['ADX'] = dx.rolling(window=14).mean()
+
+    # Bollinger Bands
+    df['BB_Middle'] = df['close'].rolling(window=20).mean()
+    bb_std = df['close'].rolling(window=20).std()
+    df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
+    df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
+
+    # Trend Slope
+    df['Trend_Slope'] = df['close'].rolling(window=5).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0])
+
+    return df[['open', 'high', 'low', 'close', 'volume', 'Stoch_K', 'Stoch_D', 'RSI', 'MA_Fast_Blue', 'MA_Slow_Red',
+               'MFI', 'OBV', 'ADX', 'Plus_DI', 'Minus_DI', 'ATR', 'BB_Upper', 'BB_Middle', 'BB_Lower',
+               'Trend_Slope']].iloc[-1:].copy()
+
+
+def legacy_unified(data):
+    """حساب جميع المؤشرات الموحدة"""
+    df = data.copy()
+
+    # RSI, MFI, CCI
+    delta = df['close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['rsi'] = 100 - (100 / (1 + rs))
+
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    mf = tp * df['volume']
+    mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
+    mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
+    df['mfi'] = 100 - (100 / (1 + mf_pos / mf_neg))
+
+    sma_tp = tp.rolling(window=20).mean()
+    mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
+    df['cci'] = (tp - sma_tp) / (0.015 * mad)
+
+    # SMAs
+    df['sma_20'] = df['close'].rolling(window=20).mean()
+    df['sma_50'] = df['close'].rolling(window=50).mean()
+    df['sma_200'] = df['close'].rolling(window=200).mean()
+
+    # MACD
+    exp1 = df['close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['close'].ewm(span=26, adjust=False).mean()
+    df['macd'] = exp1 - exp2
+    df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
+    df['macd_histogram'] = df['macd'] - df['macd_signal']
+
+    # ADX and DI
+    high_diff = df['high'].diff()
+    low_diff = -df['low'].diff()
+    plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+    minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+
+    tr1 = df['high'] - df['low']
+    tr2 = abs(df['high'] - df['close'].shift(1))
+    tr3 = abs(df['low'] - df['close'].shift(1))
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+    atr = tr.rolling(window=14).mean()
+    df['atr'] = atr
+    df['adx'] = 0  # placeholder
+    df['plus_di'] = 100 * (plus_dm.rolling(window=14).mean() / atr)
+    df['minus_di'] = 100 * (minus_dm.rolling(window=14).mean() / atr)
+
+    # Bollinger Bands
+    df['bb_middle'] = df['close'].rolling(window=20).mean()
+    bb_std = df['close'].rolling(window=20).std()
+    df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
+    df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
+    df['bb_width'] = df['bb_upper'] - df['bb_lower']
+
+    # VWAP
+    df['vwap'] = (df['volume'] * (df['high'] + df['low'] + df['close']) / 3).cumsum() / df['volume'].cumsum()
+
+    # CMF
+    mf_multiplier = ((df['close'] - df['low']) - (df['high'] - df['close'])) / (df['high'] - df['low'])
+    mf_volume = mf_multiplier * df['volume']
+    df['cmf'] = mf_volume.rolling(window=20).sum() / df['volume'].rolling(window=20).sum()
+
+    # Volume ROC
+    df['volume_roc'] = df['volume'].pct_change(periods=14) * 100
+
+    # Pivot Points
+    df['pivot'] = (df['high'] + df['low'] + df['close']) / 3
+    df['r1'] = 2 * df['pivot'] - df['low']
+    df['s1'] = 2 * df['pivot'] - df['high']
+
+    # Donchian Channel
+    df['donchian_upper'] = df['high'].rolling(window=20).max()
+    df['donchian_lower'] = df['low'].rolling(window=20).min()
+    df['donchian_middle'] = (df['donchian_upper'] + df['donchian_lower']) / 2
+
+    columns = ['open', 'high', 'low', 'close', 'volume', 'rsi', 'mfi', 'cci', 'sma_20', 'sma_50',
+               'sma_200', 'macd', 'macd_histogram', 'adx', 'plus_di', 'minus_di', 'atr',
+               'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'vwap', 'cmf', 'volume_roc',
+               'pivot', 'r1', 's1', 'donchian_upper', 'donchian_lower', 'donchian_middle']
+
+    return df[columns].iloc[-1:].copy()
+
+
+LEGACY = {
+    'momentum': legacy_momentum,
+    'support_resistance': legacy_support_resistance,
+    'trend': legacy_trend,
+    'volatility': legacy_volatility,
+    'volume': legacy_volume,
+    'impulse': legacy_impulse,
+    'unified': legacy_unified,
+}
+
+
+def engine_indicators(df):
+    """One recommendation's feature rows, as get_final_recommendation builds them (last-bar tail window)"""
+    system = MarketPredictionSystem()
+    system.df = df
+    return system.indicator_engine().project_all()
+
+
+def full_engine_indicators(df):
+    """The same rows with every indicator evaluated over the whole frame"""
+    return IndicatorEngine(df).project_all()
+
+
+def time_per_call(compute, df, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        compute(df)
+    return (time.perf_counter() - started) / repeats
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REPEATS
+    df = load_ohlcv(csv_path)
+
+    # Same output. The original OBV loop summed uint64 tick volumes in float64 under
+    # numpy 1.x but wraps around below zero under numpy >= 2, so it gets int64 volumes.
+    legacy_df = df.astype({'volume': np.int64})
+    for label, compute, tolerance in (('full frame', full_engine_indicators, TOLERANCE),
+                                      ('last-bar window', engine_indicators, TAIL_TOLERANCE)):
+        print(f"\n--- Engine, {label} (tolerance {tolerance:g}) ---")
+        actual = compute(df)
+        for model_name, legacy in LEGACY.items():
+            expected = legacy(legacy_df)
+            same = (list(expected.columns) == [column for column, _ in MODEL_FEATURES[model_name]]
+                    and list(expected.columns) == list(actual[model_name].columns)
+                    and np.allclose(expected.to_numpy(dtype=np.float64), actual[model_name].to_numpy(dtype=np.float64),
+                                    rtol=tolerance, atol=tolerance, equal_nan=True))
+            print(f"{'✅' if same else '❌'} {model_name}: {'equal' if same else 'DIFFERENT'}")
+
+    timings = {name: time_per_call(compute, df, repeats) for name, compute in (
+        ('legacy', lambda data: {m: f(data) for m, f in LEGACY.items()}),
+        ('engine, full frame', full_engine_indicators),
+        ('engine, last-bar window', engine_indicators))}
+    print(f"\nIndicators of one recommendation ({len(df)} bars), mean of {repeats}:")
+    for name, seconds in timings.items():
+        print(f"  {name:<24} {seconds * 1000:8.2f} ms ({timings['legacy'] / seconds:.1f}x)")
+
+    print(f"\nFetched history vs indicator time (random walk, window of {max_lookback() + WARMUP_MARGIN} bars):")
+    for days in HISTORY_DAYS:
+        bars = random_bars(history_bars(days))
+        full_seconds = time_per_call(full_engine_indicators, bars, repeats)
+        tail_seconds = time_per_call(engine_indicators, bars, repeats)
+        print(f"  {days:>4} days ({len(bars):>6} bars): full frame {full_seconds * 1000:8.2f} ms | "
+              f"last-bar window {tail_seconds * 1000:6.2f} ms ({full_seconds / tail_seconds:.1f}x)"
+              f"{'  <- live fetch' if days == LIVE_DAYS else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+'''
+Benchmarks the indicator_kernels.py kernels against the code they replace
+(the OBV loop, rolling().apply(np.polyfit) for Trend_Slope and
+rolling().apply(lambda) for the CCI mean absolute deviation) on random-walk
+bars, and reports the largest difference between the two.
+
+Usage:
+    python benchmark_kernels.py [BAR_COUNTS]
+
+BAR_COUNTS is a comma-separated list, e.g. 10000,100000,1000000 (the
+default). The original code takes minutes at 1M bars.
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from indicator_kernels import obv, rolling_mad, rolling_slope
+
+DEFAULT_BAR_COUNTS = (10_000, 100_000, 1_000_000)
+TOLERANCE = 1e-9
+
+
+def legacy_obv(df):
+    """The original loop of calculate_impulse_indicators"""
+    obv = [0]
+    for i in range(1, len(df)):
+        if df['close'].iloc[i] > df['close'].iloc[i - 1]:
+            obv.append(obv[-1] + df['volume'].iloc[i])
+        elif df['close'].iloc[i] < df['close'].iloc[i - 1]:
+            obv.append(obv[-1] - df['volume'].iloc[i])
+        else:
+            obv.append(obv[-1])
+    return np.asarray(obv, dtype=np.float64)
+
+
+def legacy_slope(df):
+    return df['close'].rolling(window=5).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0]).to_numpy()
+
+
+def legacy_mad(df):
+    tp = (df['high'] + df['low'] + df['close']) / 3
+    return tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean()).to_numpy()
+
+
+def kernel_obv(df):
+    return obv(df['close'], df['volume'])
+
+
+def kernel_slope(df):
+    return rolling_slope(df['close'], 5)
+
+
+def kernel_mad(df):
+    return rolling_mad((df['high'] + df['low'] + df['close']) / 3, 20)
+
+
+KERNELS = {
+    'OBV': (legacy_obv, kernel_obv),
+    'Trend_Slope (5)': (legacy_slope, kernel_slope),
+    'CCI MAD (20)': (legacy_mad, kernel_mad),
+}
+
+
+def random_bars(n_bars, seed=42):
+    """Gold-like random-walk OHLCV; int64 volumes, since the original OBV loop
+    wraps around on unsigned volumes under numpy >= 2"""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 2, n_bars)).round(2)
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 1.5, n_bars))
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(100, 10_000, n_bars),
+    }, index=pd.date_range('2020-01-01', periods=n_bars, freq='15min'))
+
+
+def timed(function, df):
+    started = time.perf_counter()
+    result = function(df)
+    return result, time.perf_counter() - started
+
+
+def main():
+    bar_counts = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else DEFAULT_BAR_COUNTS
+
+    for n_bars in bar_counts:
+        df = random_bars(n_bars)
+        print(f"\n--- {n_bars:,} bars ---")
+        for name, (legacy, kernel) in KERNELS.items():
+            expected, legacy_seconds = timed(legacy, df)
+            actual, kernel_seconds = timed(kernel, df)
+            same = np.allclose(expected, actual, rtol=TOLERANCE, atol=TOLERANCE, equal_nan=True)
+            max_diff = np.nanmax(np.abs(expected - actual))
+            print(f"{'✅' if same else '❌'} {name:<16} legacy {legacy_seconds * 1000:10.1f} ms | "
+                  f"kernel {kernel_seconds * 1000:7.2f} ms ({legacy_seconds / kernel_seconds:,.0f}x) | "
+                  f"max diff {max_diff:.2e}")
+
+
+if __name__ == '__main__':
+    main()
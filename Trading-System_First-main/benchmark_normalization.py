@@ -0,0 +1,90 @@
+'''
+Benchmarks MarketPredictionSystem.normalize_data (cached scalers folded into
+per-model NumPy vectors) against the original code (joblib.load of the
+scalers and a pandas transform on every call) for the 7 voting models, and
+checks that both produce identical values.
+
+Usage:
+    python benchmark_normalization.py [SCALERS_DIR] [REPEATS]
+'''
+
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from getDataAndVoting import NORMALIZATION_CONFIG, MarketPredictionSystem
+
+DEFAULT_SCALERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scalers')
+DEFAULT_REPEATS = 200
+
+# Input columns in the order the calculate_*_indicators methods return them
+MODEL_COLUMNS = {
+    'momentum': ['volume', 'rsi', 'stoch_k', 'stoch_d', 'cci', 'mfi', 'williams_r'],
+    'support_resistance': NORMALIZATION_CONFIG['support_resistance']['standard_cols'],
+    'trend': NORMALIZATION_CONFIG['trend']['standard_cols'],
+    'volatility': NORMALIZATION_CONFIG['volatility']['standard_cols'],
+    'volume': NORMALIZATION_CONFIG['volume']['standard_cols'],
+    'impulse': NORMALIZATION_CONFIG['impulse']['standard_cols'],
+    'unified': NORMALIZATION_CONFIG['unified']['standard_cols'],
+}
+
+
+def legacy_normalize_data(data, model_name, scalers_dir):
+    """The original normalize_data: scalers loaded from disk and applied through pandas on every call."""
+    config = NORMALIZATION_CONFIG[model_name]
+    normalized_data = data.copy()
+    for kind in ('minmax', 'standard'):
+        if config[f'{kind}_cols']:
+            scaler_path = os.path.join(scalers_dir, f'{model_name}_{kind}_scaler.pkl')
+            if os.path.exists(scaler_path):
+                scaler = joblib.load(scaler_path)
+                existing_cols = [col for col in config[f'{kind}_cols'] if col in normalized_data.columns]
+                if existing_cols:
+                    normalized_data[existing_cols] = scaler.transform(normalized_data[existing_cols])
+    return normalized_data
+
+
+def sample_rows(rng):
+    """One random last-bar row per model, in price-like magnitudes"""
+    return {
+        model_name: pd.DataFrame(rng.normal(2000, 50, size=(1, len(columns))), columns=columns,
+                                 index=pd.DatetimeIndex([pd.Timestamp('2025-01-01 12:00')]))
+        for model_name, columns in MODEL_COLUMNS.items()
+    }
+
+
+def main():
+    scalers_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SCALERS_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REPEATS
+    system = MarketPredictionSystem(scalers_dir=scalers_dir)
+    rows = sample_rows(np.random.default_rng(42))
+
+    # Identical output
+    for model_name, data in rows.items():
+        expected = legacy_normalize_data(data, model_name, scalers_dir)
+        actual = system.normalize_data(data, model_name)
+        identical = np.array_equal(expected.to_numpy(dtype=np.float64), actual.to_numpy())
+        print(f"{'✅' if identical else '❌'} {model_name}: {'identical' if identical else 'DIFFERENT'}")
+
+    timings = {}
+    for name, normalize in (('legacy', lambda d, m: legacy_normalize_data(d, m, scalers_dir)),
+                            ('cached', system.normalize_data)):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for model_name, data in rows.items():
+                normalize(data, model_name)
+        timings[name] = (time.perf_counter() - started) / repeats
+
+    print(f"\nAll 7 models, mean of {repeats} recommendations:")
+    print(f"  legacy: {timings['legacy'] * 1000:.2f} ms")
+    print(f"  cached: {timings['cached'] * 1000:.2f} ms ({timings['legacy'] / timings['cached']:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
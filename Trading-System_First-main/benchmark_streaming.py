@@ -0,0 +1,136 @@
+'''
+Checks the streaming indicators (streaming_indicators.py) against the batch
+versions they replace, then times one new candle both ways:
+- VotingIndicatorStream vs IndicatorEngine over the whole frame: every
+  indicator, every bar, same NaN warm-up
+- live sync: seeded on part of the history, then one candle at a time with
+  the last (forming) candle provisional, vs the engine's last row
+- PriceFeatureStream vs PricePredictionSystem._add_features: every row
+The same checks fail the test suite on any difference
+(tests/test_streaming_indicators.py).
+
+Usage:
+    python benchmark_streaming.py [OHLCV_CSV] [REPEATS]
+'''
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_indicators import DEFAULT_CSV, load_ohlcv
+from benchmark_kernels import random_bars
+from indicator_engine import MODEL_FEATURES, IndicatorEngine
+from Run_PricePredictor import PricePredictionSystem
+from streaming_indicators import BAR_COLUMNS, PriceFeatureStream, VotingIndicatorStream
+
+DEFAULT_REPEATS = 200
+TOLERANCE = 1e-9
+RANDOM_BARS = 5000
+LIVE_CANDLES = 100
+HISTORY_BARS = 7 * 96  # 7 days of M15, as fetch_market_data(days=7)
+
+VOTING_INDICATORS = sorted({name for features in MODEL_FEATURES.values() for _, name in features})
+
+
+def stream_all(stream, df):
+    """The stream's values after every bar of df, as a DataFrame"""
+    rows = [stream.update(time, bar)
+            for time, bar in zip(df.index, df[list(BAR_COLUMNS)].itertuples(index=False, name=None))]
+    return pd.DataFrame(rows, index=df.index)
+
+
+def compare(label, expected, actual):
+    """Prints whether two frames match (values within TOLERANCE, NaN in the same places)"""
+    expected, actual = expected.to_numpy(dtype=np.float64), actual.to_numpy(dtype=np.float64)
+    same_nan = np.array_equal(np.isnan(expected), np.isnan(actual))
+    difference = np.abs(expected - actual) / np.maximum(1., np.abs(expected))
+    max_difference = np.nanmax(difference) if (~np.isnan(difference)).any() else 0.
+    same = same_nan and max_difference <= TOLERANCE
+    print(f"{'✅' if same else '❌'} {label}: {'same' if same else 'DIFFERENT'} "
+          f"(max relative difference {max_difference:.1e}{'' if same_nan else ', NaN warm-up differs'})")
+    return same
+
+
+def check_voting(name, df):
+    expected = pd.DataFrame({indicator: IndicatorEngine(df).get(indicator) for indicator in VOTING_INDICATORS})
+    compare(f"voting indicators, every bar ({name}, {len(df)} bars)", expected,
+            stream_all(VotingIndicatorStream(), df)[VOTING_INDICATORS])
+
+
+def check_live(df):
+    """Seeded on the first bars, then synced one candle at a time, the last candle still forming"""
+    stream = VotingIndicatorStream()
+    expected, actual = [], []
+    for end in range(len(df) - LIVE_CANDLES, len(df) + 1):
+        frame = df.iloc[:end]
+        engine, snapshot = IndicatorEngine(frame), stream.snapshot(frame)
+        for model_name, features in MODEL_FEATURES.items():
+            expected.append(engine.project(features).to_numpy(dtype=np.float64).ravel())
+            actual.append(snapshot.project(features).to_numpy(dtype=np.float64).ravel())
+    compare(f"live sync, last {LIVE_CANDLES + 1} candles, all 7 feature sets",
+            pd.DataFrame(np.concatenate(expected)), pd.DataFrame(np.concatenate(actual)))
+
+
+def check_price(name, df):
+    expected = PricePredictionSystem._add_features(df).drop(columns='target_r1')
+    actual = stream_all(PriceFeatureStream(), df).dropna()
+    # _add_features also drops the last bar, whose next close (target) is unknown
+    aligned = actual.index[:-1].equals(expected.index)
+    compare(f"price features, every bar ({name}, {len(expected)} rows)", expected,
+            actual.loc[expected.index, expected.columns] if aligned else actual.iloc[:0])
+
+
+def time_per_call(function, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - started) / repeats
+
+
+def time_per_candle(stream, candles):
+    started = time.perf_counter()
+    for time_, bar in candles:
+        stream.update(time_, bar)
+    return (time.perf_counter() - started) / len(candles)
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_REPEATS
+    csv_df, random_df = load_ohlcv(csv_path), random_bars(RANDOM_BARS)
+
+    print("--- Consistency with the batch indicators ---")
+    for name, df in (('CSV', csv_df), ('random walk', random_df)):
+        check_voting(name, df)
+    check_live(random_df)
+    for name, df in (('CSV', csv_df), ('random walk', random_df)):
+        check_price(name, df)
+
+    # One new M15 candle on 7 days of history; the streams consume the last `repeats` candles one by one
+    history = random_df.iloc[-HISTORY_BARS:]
+    new_candles = list(zip(history.index[-repeats:],
+                           history[list(BAR_COLUMNS)].iloc[-repeats:].itertuples(index=False, name=None)))
+    voting_stream = VotingIndicatorStream().seed(history.iloc[:-repeats])
+    price_stream = PriceFeatureStream().seed(history.iloc[:-repeats])
+    live_stream = VotingIndicatorStream().seed(history.iloc[:-1])
+    timings = {
+        'voting, IndicatorEngine (last-bar window)': time_per_call(
+            lambda: IndicatorEngine(history, rows=1).project_all(), repeats),
+        'voting, stream update (closed candle)': time_per_candle(voting_stream, new_candles),
+        'voting, stream snapshot (forming candle)': time_per_call(
+            lambda: live_stream.snapshot(history).project_all(), repeats),
+        'price, _add_features': time_per_call(lambda: PricePredictionSystem._add_features(history), repeats),
+        'price, stream update (closed candle)': time_per_candle(price_stream, new_candles),
+    }
+    print(f"\n--- One new candle on {HISTORY_BARS} bars, mean of {repeats} ---")
+    for name, seconds in timings.items():
+        print(f"  {name:<46} {seconds * 1000:8.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
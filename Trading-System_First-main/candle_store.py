@@ -0,0 +1,277 @@
+"""
+candle_store.py - Binary OHLCV Candle Store
+===========================================
+
+Keeps candles per symbol and timeframe as fixed-size binary records
+(candle_data/<SYMBOL>/<TIMEFRAME>.bin) read through a NumPy memory map:
+- append() writes only the new records at the end of the file
+- read() / tail() slice by time with a binary search, without parsing
+  the rest of the history
+For series still kept as CSV, append_csv_candles() adds new candles by
+touching only the last few KB of the file.
+
+Usage (one-shot conversion of an existing CSV):
+    python candle_store.py <CSV_FILE> <SYMBOL> <TIMEFRAME>
+    python candle_store.py XAUUSD_Candlestick_15_M_BID_31.10.2022-31.10.2025.csv XAUUSDm M15
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'candle_data')
+
+CANDLE_DTYPE = np.dtype([
+    ('time', '<i8'),  # nanoseconds since epoch (UTC)
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+TIME_COLUMNS = ['Gmt time', 'date', 'time']
+CSV_DATE_FORMAT = '%d.%m.%Y %H:%M:%S.000'
+CSV_TAIL_BLOCK_SIZE = 4096
+
+
+class CandleStore:
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+
+    def path(self, symbol, timeframe):
+        return os.path.join(self.store_dir, symbol, f'{timeframe}.bin')
+
+    def exists(self, symbol, timeframe):
+        return os.path.exists(self.path(symbol, timeframe))
+
+    def _records(self, symbol, timeframe):
+        """Memory-mapped view of all complete records (empty if the series does not exist)"""
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        # A partially written last record (interrupted append) is ignored
+        count = os.path.getsize(path) // CANDLE_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.memmap(path, dtype=CANDLE_DTYPE, mode='r', shape=(count,))
+
+    def count(self, symbol, timeframe):
+        return len(self._records(symbol, timeframe))
+
+    def first_time(self, symbol, timeframe):
+        records = self._records(symbol, timeframe)
+        return pd.Timestamp(int(records['time'][0])) if len(records) else None
+
+    def last_time(self, symbol, timeframe):
+        records = self._records(symbol, timeframe)
+        return pd.Timestamp(int(records['time'][-1])) if len(records) else None
+
+    def read(self, symbol, timeframe, start=None, end=None, include_start=True):
+        """
+        Candles with start <= time <= end (either bound optional) as a
+        DataFrame indexed by 'Gmt time' with Open/High/Low/Close/Volume.
+        With include_start=False the start bound is exclusive.
+        """
+        records = self._records(symbol, timeframe)
+        times = records['time']
+        lo, hi = 0, len(records)
+        if start is not None:
+            side = 'left' if include_start else 'right'
+            lo = int(np.searchsorted(times, pd.Timestamp(start).value, side=side))
+        if end is not None:
+            hi = int(np.searchsorted(times, pd.Timestamp(end).value, side='right'))
+        return _to_frame(records[lo:max(lo, hi)])
+
+    def tail(self, symbol, timeframe, n):
+        """The last `n` candles"""
+        records = self._records(symbol, timeframe)
+        return _to_frame(records[max(0, len(records) - n):])
+
+    def append(self, symbol, timeframe, candles):
+        """
+        Appends the candles newer than the last stored one. `candles` is a
+        DataFrame with a time column ('Gmt time', 'date' or 'time') or a
+        DatetimeIndex. Returns the number of candles added.
+        """
+        new_records = _to_records(candles)
+        last_time = self.last_time(symbol, timeframe)
+        if last_time is not None:
+            new_records = new_records[new_records['time'] > last_time.value]
+        if len(new_records) == 0:
+            return 0
+
+        path = self.path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        count = self.count(symbol, timeframe)
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(count * CANDLE_DTYPE.itemsize)
+            f.write(new_records.tobytes())
+            f.truncate()
+        return len(new_records)
+
+    def write(self, symbol, timeframe, candles):
+        """Replaces the whole series (written to a temp file, then renamed)"""
+        path = self.path(symbol, timeframe)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + '.tmp'
+        _to_records(candles).tofile(temp_path)
+        os.replace(temp_path, path)
+
+
+def _to_records(candles):
+    """Sorted, de-duplicated (first one wins) records from a candle DataFrame"""
+    df = candles
+    time_col = next((col for col in TIME_COLUMNS if col in df.columns), None)
+    times = df[time_col] if time_col else df.index.to_series()
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times, dayfirst=True)
+
+    records = np.empty(len(df), dtype=CANDLE_DTYPE)
+    records['time'] = pd.DatetimeIndex(times).tz_localize(None).as_unit('ns').asi8
+    for field, col in COLUMNS.items():
+        records[field] = df[col].to_numpy(dtype=float)
+
+    order = np.argsort(records['time'], kind='stable')
+    records = records[order]
+    keep = np.insert(records['time'][1:] != records['time'][:-1], 0, True)
+    return records[keep]
+
+
+def _to_frame(records):
+    # Copy out of the memory map so no file handle outlives the read
+    return pd.DataFrame({col: np.array(records[field]) for field, col in COLUMNS.items()},
+                        index=pd.DatetimeIndex(np.array(records['time']).astype('datetime64[ns]'), name='Gmt time'))
+
+
+def _read_csv_tail(f, data_start, end, block_size):
+    """Complete lines (without line endings) in the last `block_size` bytes, with their offsets"""
+    start = max(data_start, end - block_size)
+    f.seek(start)
+    block = f.read(end - start)
+    offset = start
+    if start > data_start:
+        # The first line may be cut by the block boundary
+        cut = block.index(b'\n') + 1 if b'\n' in block else len(block)
+        block, offset = block[cut:], start + cut
+
+    lines, offsets = [], []
+    for line in block.split(b'\n'):
+        if line.strip():
+            lines.append(line.rstrip(b'\r'))
+            offsets.append(offset)
+        offset += len(line) + 1
+    return start, lines, offsets
+
+
+def append_csv_candles(csv_path, candles, time_col='Gmt time', date_format=CSV_DATE_FORMAT,
+                       block_size=CSV_TAIL_BLOCK_SIZE):
+    """
+    Appends the candles newer than the last one in `csv_path` without
+    rewriting the file: only its last few KB are read to find the last
+    timestamp. Out-of-order or duplicated lines inside that tail are sorted
+    (last duplicate wins) and rewritten in place, and a partially written
+    last line is dropped. Returns the number of candles added.
+    """
+    candles = candles.sort_values(time_col).drop_duplicates(subset=[time_col], keep='last')
+
+    with open(csv_path, 'r+b') as f:
+        header = f.readline()
+        newline = b'\r\n' if header.endswith(b'\r\n') else b'\n'
+        columns = header.decode().strip().split(',')
+        data_start = f.tell()
+        end = f.seek(0, os.SEEK_END)
+        write_at = end
+
+        while True:
+            start, lines, offsets = _read_csv_tail(f, data_start, end, block_size)
+            if lines and lines[-1].count(b',') != len(columns) - 1:
+                # Interrupted write: drop the incomplete last line
+                write_at = offsets[-1]
+                lines, offsets = lines[:-1], offsets[:-1]
+            times = list(pd.to_datetime([line.split(b',', 1)[0].decode() for line in lines], dayfirst=True))
+
+            disorder = next((i for i in range(1, len(times)) if times[i] <= times[i - 1]), None)
+            if disorder is None:
+                repair = len(lines)
+                break
+            # Rewrite from the first line that is not older than every out-of-order line
+            oldest_bad = min(times[disorder:])
+            repair = next((i for i in range(disorder) if times[i] >= oldest_bad), disorder)
+            if repair > 0 or start == data_start:
+                break
+            # The disorder may reach further back than this block
+            block_size *= 4
+
+        last_time = max(times) if times else None
+        if last_time is not None:
+            candles = candles[candles[time_col] > last_time]
+        new_rows = candles[columns].to_csv(header=False, index=False, date_format=date_format,
+                                           lineterminator=newline.decode()).encode()
+
+        repaired = b''
+        if repair < len(lines):
+            tail = dict(zip(times[repair:], lines[repair:]))
+            repaired = b''.join(tail[line_time] + newline for line_time in sorted(tail))
+            write_at = offsets[repair]
+            print(f"⚠️ Repaired {len(lines) - repair} out-of-order lines at the end of {os.path.basename(csv_path)}")
+        elif write_at == end and end > data_start:
+            f.seek(end - 1)
+            if f.read(1) != b'\n':
+                repaired = newline
+
+        f.seek(write_at)
+        f.write(repaired + new_rows)
+        f.truncate()
+
+    return len(candles)
+
+
+def read_csv_tail(csv_path, count, time_col='Gmt time', block_size=CSV_TAIL_BLOCK_SIZE):
+    """
+    The last `count` candles of an OHLCV CSV (day-first dates in `time_col`),
+    reading only the end of the file: the tail block grows until it holds
+    `count` complete lines. A partially written last line is ignored.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        end = f.seek(0, os.SEEK_END)
+        field_count = header.count(b',') + 1
+        while True:
+            start, lines, _ = _read_csv_tail(f, data_start, end, block_size)
+            if lines and lines[-1].count(b',') != field_count - 1:
+                lines = lines[:-1]
+            if len(lines) >= count or start == data_start:
+                break
+            block_size *= 4
+
+    data = header.rstrip(b'\r\n') + b'\n' + b'\n'.join(lines[-count:] if count > 0 else [])
+    return pd.read_csv(io.BytesIO(data), parse_dates=[time_col], dayfirst=True)
+
+
+def convert_csv(csv_path, symbol, timeframe, store=None):
+    """
+    One-shot import of an OHLCV CSV (day-first dates) into the store.
+    Candles already in the store are kept where both have the same time.
+    """
+    store = store or CandleStore()
+    csv_df = pd.read_csv(csv_path)
+    time_col = next(col for col in TIME_COLUMNS if col in csv_df.columns)
+    csv_df[time_col] = pd.to_datetime(csv_df[time_col], dayfirst=True)
+    csv_df = csv_df.rename(columns={time_col: 'Gmt time'}).set_index('Gmt time')
+
+    if store.exists(symbol, timeframe):
+        csv_df = pd.concat([store.read(symbol, timeframe), csv_df[list(COLUMNS.values())]])
+    store.write(symbol, timeframe, csv_df)
+    print(f"✅ Converted {csv_path} -> {store.path(symbol, timeframe)} ({store.count(symbol, timeframe)} candles)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4:
+        print(__doc__)
+        sys.exit(1)
+    convert_csv(sys.argv[1], sys.argv[2], sys.argv[3])
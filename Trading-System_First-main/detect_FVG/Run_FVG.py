@@ -27,16 +27,22 @@ warnings.filterwarnings('ignore')
 
 # Add current directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import local modules
 import fvg_analyzer
 import train_fvg_classifier
+from candle_store import CandleStore, append_csv_candles, read_csv_tail
+from model_registry import get_registry
+from fvg_features import FVGFeatureEncoder
 
 # ==================== CONFIGURATION ====================
 SYMBOL = 'XAUUSDm'
 M15_CSV = 'XAUUSD_Candlestick_15_M_BID_31.10.2022-31.10.2025.csv'
 H1_CSV = 'XAUUSD_Candlestick_1_Hour_BID_14.10.2010-31.10.2025.csv'
-FVG_ANALYSIS_CSV = 'fvg_analysis_XAUUSD_M15_4H.csv'
+FVG_ANALYSIS_CSV = 'fvg_analysis_XAUUSD_M15_4H.csv'  # Full history (training set)
+FVG_LIVE_CSV = 'fvg_analysis_XAUUSD_M15_4H_live.csv'  # Last LIVE_HORIZON_DAYS only (alerts/zones)
+LIVE_HORIZON_DAYS = fvg_analyzer.LIVE_HORIZON_DAYS
 MODEL_PATH = 'fvg_strong_classifier.joblib'
 
 # Scheduling
@@ -50,12 +56,18 @@ ENABLE_LOG_FILE = True  # Save logs to file
 
 
 class FVGTradingSystem:
-    def __init__(self):
-        self.script_dir = os.path.dirname(os.path.abspath(__file__))
+    def __init__(self, symbol=SYMBOL, script_dir=None):
+        self.symbol = symbol  # Broker symbol of the fetched and stored candles
+        self.script_dir = script_dir or os.path.dirname(os.path.abspath(__file__))  # Data, models and logs
         self.m15_csv_path = os.path.join(self.script_dir, M15_CSV)
         self.h1_csv_path = os.path.join(self.script_dir, H1_CSV)
         self.fvg_csv_path = os.path.join(self.script_dir, FVG_ANALYSIS_CSV)
         self.model_path = os.path.join(self.script_dir, MODEL_PATH)
+        self.model_registry = get_registry(os.path.join(self.script_dir, 'models'), legacy_path=self.model_path)
+        self.state_path = os.path.join(self.script_dir, fvg_analyzer.STATE_FILE)
+        self.fvg_live_csv_path = os.path.join(self.script_dir, FVG_LIVE_CSV)
+        self.live_state_path = os.path.join(self.script_dir, 'fvg_analyzer_state_live.joblib')
+        self.candle_store = CandleStore()
         self.log_path = os.path.join(self.script_dir, 'fvg_monitor.log')
         
         self.mt5_initialized = False
@@ -121,7 +133,7 @@ class FVGTradingSystem:
                 return None
         
         # Fetch last 2 candles to ensure we get the complete one
-        rates = mt5.copy_rates_from_pos(SYMBOL, mt5.TIMEFRAME_M15, 0, 2)
+        rates = mt5.copy_rates_from_pos(self.symbol, mt5.TIMEFRAME_M15, 0, 2)
         
         if rates is None or len(rates) == 0:
             self.logger.warning("⚠️ No M15 data fetched")
@@ -133,8 +145,12 @@ class FVGTradingSystem:
         
         return df.iloc[-1]  # Return latest candle
     
-    def full_data_update(self):
-        """Full data update and model retraining (daily)"""
+    def full_data_update(self, train=True):
+        """
+        Full data update and model retraining (daily). With train=False only
+        the MT5 fetch and the live analysis run; the training side can then be
+        run elsewhere with training_job().
+        """
         self.logger.info("\n" + "="*60)
         self.logger.info("🔄 DAILY DATA UPDATE & MODEL RETRAINING")
         self.logger.info("="*60)
@@ -143,11 +159,12 @@ class FVGTradingSystem:
             # Fetch and update data
             self._fetch_and_update_data()
             
-            # Run FVG analysis
+            # Run FVG analysis (live horizon)
             self._run_fvg_analysis()
             
-            # Train classifier
-            self._train_classifier()
+            # Refresh the full-history training set and train classifier
+            if train:
+                self._train_classifier()
             
             self.last_daily_update = datetime.now()
             self.logger.info(f"✅ Daily update completed at {self.last_daily_update.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -164,12 +181,12 @@ class FVGTradingSystem:
                 raise Exception("Failed to initialize MT5")
         
         # Verify symbol
-        symbol_info = mt5.symbol_info(SYMBOL)
+        symbol_info = mt5.symbol_info(self.symbol)
         if symbol_info is None:
-            raise ValueError(f"Symbol {SYMBOL} not available")
+            raise ValueError(f"Symbol {self.symbol} not available")
         
         if not symbol_info.visible:
-            mt5.symbol_select(SYMBOL, True)
+            mt5.symbol_select(self.symbol, True)
         
         # Fetch M15 data
         self.logger.info("📥 Fetching M15 data...")
@@ -190,11 +207,11 @@ class FVGTradingSystem:
         )
     
     def _update_csv_with_new_data(self, timeframe, csv_path, days, timeframe_name):
-        """Helper function to fetch data and update CSV"""
+        """Helper function to fetch data and update the candle store (or CSV)"""
         utc_to = datetime.now()
         utc_from = utc_to - timedelta(days=days)
         
-        rates = mt5.copy_rates_range(SYMBOL, timeframe, utc_from, utc_to)
+        rates = mt5.copy_rates_range(self.symbol, timeframe, utc_from, utc_to)
         
         if rates is None or len(rates) == 0:
             self.logger.warning(f"⚠️ No new data for {timeframe_name}")
@@ -213,63 +230,86 @@ class FVGTradingSystem:
         })
         new_df = new_df[['Gmt time', 'Open', 'High', 'Low', 'Close', 'Volume']]
         
-        # Load and merge with existing data
-        if os.path.exists(csv_path):
-            existing_df = pd.read_csv(csv_path, parse_dates=['Gmt time'], dayfirst=True)
-            last_timestamp = existing_df['Gmt time'].max()
-            new_df = new_df[new_df['Gmt time'] > last_timestamp]
-            
-            if len(new_df) > 0:
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                combined_df = combined_df.drop_duplicates(subset=['Gmt time'], keep='last')
-                combined_df = combined_df.sort_values('Gmt time')
-                combined_df.to_csv(csv_path, index=False, date_format='%d.%m.%Y %H:%M:%S.000')
-                self.logger.info(f"✅ Added {len(new_df)} new {timeframe_name} candles")
-            else:
-                self.logger.info(f"ℹ️ No new {timeframe_name} data to add")
+        # Candle store once converted; otherwise only the newer candles are appended to the CSV
+        if self.candle_store.exists(self.symbol, timeframe_name) or not os.path.exists(csv_path):
+            added = self.candle_store.append(self.symbol, timeframe_name, new_df)
+        else:
+            added = append_csv_candles(csv_path, new_df)
+        
+        if added > 0:
+            self.logger.info(f"✅ Added {added} new {timeframe_name} candles")
         else:
-            new_df.to_csv(csv_path, index=False, date_format='%d.%m.%Y %H:%M:%S.000')
-            self.logger.info(f"✅ Created {timeframe_name} CSV with {len(new_df)} candles")
+            self.logger.info(f"ℹ️ No new {timeframe_name} data to add")
     
     def _run_fvg_analysis(self):
-        """Run FVG analyzer"""
-        self.logger.info("🔍 Running FVG Analysis...")
-        original_dir = os.getcwd()
-        os.chdir(self.script_dir)
+        """Run FVG analyzer over the live horizon (last LIVE_HORIZON_DAYS)"""
+        self.logger.info(f"🔍 Running FVG Analysis (last {LIVE_HORIZON_DAYS} days)...")
         
         try:
-            fvg_analyzer.main()
+            # Incremental: only new candles and still-open zones are processed
+            fvg_analyzer.main(
+                incremental=True,
+                symbol=self.symbol,
+                candle_file=self.m15_csv_path,
+                bias_file=self.h1_csv_path,
+                output_file=self.fvg_live_csv_path,
+                state_file=self.live_state_path,
+                horizon_days=LIVE_HORIZON_DAYS
+            )
             self.logger.info("✅ FVG analysis completed")
         except Exception as e:
             self.logger.error(f"❌ FVG analysis failed: {e}")
             raise
-        finally:
-            os.chdir(original_dir)
     
+    def _update_training_set(self):
+        """Bring the full-history FVG analysis (training set) up to date"""
+        fvg_analyzer.main(
+            incremental=True,
+            symbol=self.symbol,
+            candle_file=self.m15_csv_path,
+            bias_file=self.h1_csv_path,
+            output_file=self.fvg_csv_path,
+            state_file=self.state_path
+        )
+    
+    def training_job(self):
+        """Files for training_worker.run_training_job() (training-set refresh + fit, no MT5 needed)"""
+        return {
+            'symbol': self.symbol,
+            'candle_file': self.m15_csv_path,
+            'bias_file': self.h1_csv_path,
+            'analysis_csv': self.fvg_csv_path,
+            'state_file': self.state_path,
+            'save_dir': self.script_dir,
+        }
+
     def _train_classifier(self):
         """Train/update the FVG classifier model"""
         self.logger.info("🤖 Training FVG Classifier...")
-        original_dir = os.getcwd()
-        os.chdir(self.script_dir)
         
         try:
-            train_fvg_classifier.train_model()
-            self.logger.info("✅ Model training completed")
+            self._update_training_set()
+            result = train_fvg_classifier.train_model(csv_path=self.fvg_csv_path, save_dir=self.script_dir)
+            if result and result['reason'] == 'rejected':
+                self.logger.warning(f"⚠️ Trained model not published ({result['rejection']}) - keeping the current model")
+            elif result and not result['trained']:
+                self.logger.info(f"⏭️ Model training skipped - training set below the retrain threshold "
+                                 f"({result['skipped_fits']} fits skipped since the last training)")
+            else:
+                self.logger.info("✅ Model training completed")
         except Exception as e:
             self.logger.error(f"❌ Model training failed: {e}")
             raise
-        finally:
-            os.chdir(original_dir)
     
     def check_for_opportunity(self):
         """Lightweight 15-minute check for trading opportunities"""
         try:
             # Load FVG analysis data
-            if not os.path.exists(self.fvg_csv_path):
+            if not os.path.exists(self.fvg_live_csv_path):
                 self.logger.warning("⚠️ FVG analysis file not found")
                 return None
             
-            fvg_data = pd.read_csv(self.fvg_csv_path)
+            fvg_data = pd.read_csv(self.fvg_live_csv_path)
             fvg_data['time_created'] = pd.to_datetime(fvg_data['time_created'])
             
             if len(fvg_data) == 0:
@@ -282,19 +322,17 @@ class FVGTradingSystem:
             if self.last_fvg_time == latest_fvg['time_created']:
                 return None
             
-            # Load model
-            if not os.path.exists(self.model_path):
+            # Load model (cached; re-read only when a new version is published)
+            model, artifacts, _ = self.model_registry.load_with_artifacts()
+            if model is None:
                 self.logger.warning("⚠️ Model not found")
                 return None
             
-            model = joblib.load(self.model_path)
-            
-            # Prepare features and predict
-            features_df = self._prepare_features(latest_fvg)
-            model_features = model.booster_.feature_name()
-            features_aligned = features_df.reindex(columns=model_features, fill_value=0)
+            # Prepare features (encoder saved with the model) and predict
+            encoder = artifacts.get('encoder') or FVGFeatureEncoder()
+            features = encoder.transform(latest_fvg.to_dict())
             
-            probability = model.predict_proba(features_aligned)[0, 1]
+            probability = model.predict_proba(features)[0, 1]
             score = int(probability * 100)
             is_strong = score >= STRONG_THRESHOLD
             
@@ -327,28 +365,16 @@ class FVGTradingSystem:
             self.logger.error(f"❌ Check failed: {e}")
             return None
     
-    def _prepare_features(self, fvg_row):
-        """Prepare features for model prediction"""
-        df = pd.DataFrame([fvg_row])
-        categorical_features = ['FVG_Type', 'session', 'bias_H1']
-        df = pd.get_dummies(df, columns=categorical_features, drop_first=True)
-        
-        expected_features = [
-            'fvg_size', 'volume_spike_at_fvg', 'FVG_Type_Bullish',
-            'session_London', 'session_New York', 'session_Other',
-            'bias_H1_Bullish', 'bias_H1_Neutral'
-        ]
-        
-        for feat in expected_features:
-            if feat not in df.columns:
-                df[feat] = 0
-        
-        return df
+    def _load_recent_candles(self, csv_path, timeframe_name, count):
+        """Load the last candles from the candle store (or CSV)"""
+        if self.candle_store.exists(self.symbol, timeframe_name):
+            return self.candle_store.tail(self.symbol, timeframe_name, count).reset_index()
+        return read_csv_tail(csv_path, count)
     
     def _calculate_direction(self, latest_fvg):
         """Calculate trading direction based on trends"""
-        m15_df = pd.read_csv(self.m15_csv_path, parse_dates=['Gmt time'], dayfirst=True)
-        h1_df = pd.read_csv(self.h1_csv_path, parse_dates=['Gmt time'], dayfirst=True)
+        m15_df = self._load_recent_candles(self.m15_csv_path, 'M15', 50)
+        h1_df = self._load_recent_candles(self.h1_csv_path, 'H1', 50)
         
         # Calculate trends
         m15_df['sma50'] = m15_df['Close'].rolling(window=50).mean()
@@ -0,0 +1,60 @@
+'''
+Process pool for the multi-symbol FVG analysis.
+
+create_pool() returns a spawn ProcessPoolExecutor (spawn is the only start
+method on Windows, where MT5 runs) whose workers stay light:
+- a spawned child normally re-imports the parent's __main__ module first;
+  for Run_System_Dual that means MetaTrader5, the database models and the
+  strategy code in every worker. The workers here are started with
+  __main__ hidden, so they only import this module and, in the
+  initializer, fvg_analyzer.
+- the initializer caps OpenMP/BLAS threads per worker before NumPy is
+  imported, so `max_workers` processes do not oversubscribe the CPUs.
+
+Worker tasks must therefore live in importable modules
+(fvg_analyzer.analyze_symbol), not in the main script.
+'''
+
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import SpawnContext, SpawnProcess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_THREADS = 1  # OpenMP/BLAS threads per worker
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+_main_lock = threading.Lock()
+
+
+class _AnalysisProcess(SpawnProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        # The preparation data sent to the child names the parent's __main__ to re-import;
+        # an empty stand-in leaves it out
+        with _main_lock:
+            main_module = sys.modules['__main__']
+            sys.modules['__main__'] = types.ModuleType('__main__')
+            try:
+                return SpawnProcess._Popen(process_obj)
+            finally:
+                sys.modules['__main__'] = main_module
+
+
+class _AnalysisContext(SpawnContext):
+    Process = _AnalysisProcess
+
+
+def _init_worker(threads):
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    import fvg_analyzer  # noqa: F401 - loaded once per worker, not on the first task
+
+
+def create_pool(max_workers=None, threads=WORKER_THREADS):
+    """Spawn pool whose workers import only fvg_analyzer"""
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=_AnalysisContext(),
+                               initializer=_init_worker, initargs=(threads,))
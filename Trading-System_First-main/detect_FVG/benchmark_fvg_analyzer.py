@@ -0,0 +1,239 @@
+'''
+Benchmarks the vectorized FVG engine in fvg_analyzer.py against the original
+per-candle code (feature prep, gap detection and retest/reaction search) and
+checks that both produce byte-identical CSV output.
+
+Usage:
+    python benchmark_fvg_analyzer.py [M15_CSV | BARS] [H1_CSV]
+
+Defaults to DEFAULT_BARS synthetic M15 candles (a random walk, about a year
+of history, the size the vectorized engine is for); a number instead of a
+CSV sets the bar count. When no H1 file is given the H1 candles are
+resampled from the M15 data. Small files such as the bundled XAUUSD-15M.csv
+(460 bars) mostly time fixed pandas overhead.
+'''
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fvg_analyzer
+
+DEFAULT_BARS = 25_000
+REPEATS = 3
+RETEST_COLUMNS = ['retest', 'retest_time', 'penetration_points', 'reaction_strength', 'label']
+
+
+def load_candles(csv_path):
+    """Loads an OHLCV CSV that uses either 'Gmt time' or 'date' as its time column."""
+    df = pd.read_csv(csv_path)
+    time_col = 'Gmt time' if 'Gmt time' in df.columns else 'date'
+    df[time_col] = pd.to_datetime(df[time_col], dayfirst=True)
+    df = df.rename(columns={time_col: 'Gmt time'}).set_index('Gmt time').sort_index()
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+
+def random_candles(n_bars, seed=42):
+    """Gold-like random-walk M15 candles (Gmt time index, Open/High/Low/Close/Volume)"""
+    rng = np.random.default_rng(seed)
+    close = 2000 + np.cumsum(rng.normal(0, 2, n_bars)).round(2)
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 1.5, n_bars)).round(2)
+    index = pd.date_range('2024-01-01', periods=n_bars, freq='15min', name='Gmt time')
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(100, 10_000, n_bars).astype(np.float64),
+    }, index=index)
+
+
+def resample_h1(m15_df):
+    return m15_df.resample('1h').agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna()
+
+
+def legacy_prepare_features(m15_df, h1_df):
+    """The original feature prep: masked H1 filter, ffill reindex and per-timestamp sessions."""
+    h1_df = h1_df[h1_df.index >= m15_df.index.min()].copy()
+    h1_df['ema50_h1'] = h1_df['Close'].ewm(span=50, adjust=False).mean()
+    h1_df['bias_H1'] = np.where(h1_df['Close'] > h1_df['ema50_h1'], 'Bullish', 'Bearish')
+
+    m15_df = m15_df.copy()
+    m15_df['bias_H1'] = h1_df['bias_H1'].reindex(m15_df.index, method='ffill')
+    m15_df['ema50'] = m15_df['Close'].ewm(span=50, adjust=False).mean()
+    m15_df['ema200'] = m15_df['Close'].ewm(span=200, adjust=False).mean()
+    m15_df['ema50_dir'] = np.where(m15_df['Close'] > m15_df['ema50'], 'Above', 'Below')
+    m15_df['ema200_dir'] = np.where(m15_df['Close'] > m15_df['ema200'], 'Above', 'Below')
+    high_low = m15_df['High'] - m15_df['Low']
+    high_close = np.abs(m15_df['High'] - m15_df['Close'].shift())
+    low_close = np.abs(m15_df['Low'] - m15_df['Close'].shift())
+    true_range = np.max(pd.concat([high_low, high_close, low_close], axis=1), axis=1)
+    m15_df['atr'] = true_range.ewm(alpha=1/fvg_analyzer.ATR_PERIOD, adjust=False).mean()
+    m15_df['session'] = [fvg_analyzer.get_session(dt) for dt in m15_df.index]
+    m15_df['volume_ma'] = m15_df['Volume'].rolling(window=fvg_analyzer.VOLUME_MA_PERIOD).mean()
+    m15_df['volume_spike_at_fvg'] = m15_df['Volume'] > (m15_df['volume_ma'] * fvg_analyzer.VOLUME_SPIKE_MULTIPLIER)
+    return m15_df
+
+
+def prepare_features(m15_df, h1_df):
+    """The current feature prep stage of fvg_analyzer.main()."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        h1_df = fvg_analyzer.calculate_h1_bias(h1_df, m15_df.index.min(), m15_df.index.max())
+        return fvg_analyzer.calculate_indicators(m15_df.copy(), h1_df)
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def legacy_detect_fvgs(m15_df):
+    """The original iloc-based detection loop, kept here as the reference."""
+    fvg_list = []
+    for i in range(max(1, fvg_analyzer.ATR_PERIOD), len(m15_df) - 1):
+        prev_candle = m15_df.iloc[i-1]
+        curr_candle = m15_df.iloc[i]
+        next_candle = m15_df.iloc[i+1]
+
+        fvg_data = None
+        if next_candle['Low'] > prev_candle['High']:
+            fvg_data = {'FVG_Type': 'Bullish', 'fvg_bottom': prev_candle['High'], 'fvg_top': next_candle['Low']}
+        elif prev_candle['Low'] > next_candle['High']:
+            fvg_data = {'FVG_Type': 'Bearish', 'fvg_bottom': next_candle['High'], 'fvg_top': prev_candle['Low']}
+
+        if fvg_data:
+            fvg_data['time_created'] = curr_candle.name
+            fvg_data['fvg_size'] = fvg_data['fvg_top'] - fvg_data['fvg_bottom']
+            fvg_data['fvg_center'] = fvg_data['fvg_bottom'] + fvg_data['fvg_size'] / 2
+
+            atr_at_creation = next_candle['atr']
+            fvg_data['fvg_size_vs_atr'] = fvg_data['fvg_size'] / atr_at_creation if atr_at_creation > 0 else 0
+
+            body_size = abs(next_candle['Close'] - next_candle['Open'])
+            total_range = next_candle['High'] - next_candle['Low']
+            fvg_data['creating_candle_body_size'] = body_size
+            fvg_data['creating_candle_body_ratio'] = body_size / total_range if total_range > 0 else 0
+
+            for col in ['volume_spike_at_fvg', 'session', 'ema50_dir', 'ema200_dir', 'bias_H1']:
+                fvg_data[col] = curr_candle[col]
+            fvg_list.append(fvg_data)
+
+    return pd.DataFrame(fvg_list)
+
+
+def legacy_analyze_retest(fvg, future_candles):
+    """The original iterrows-based retest and reaction search for one FVG."""
+    retest_info = {'retest': False, 'retest_time': None, 'reaction_strength': 0,
+                   'penetration_points': 0, 'label': 'No Retest'}
+    retest_candle_index = -1
+
+    for i, candle in future_candles.iterrows():
+        if fvg['FVG_Type'] == 'Bullish' and candle['Low'] <= fvg['fvg_top']:
+            retest_info.update(retest=True, retest_time=candle.name, penetration_points=fvg['fvg_top'] - candle['Low'])
+            retest_candle_index = i
+            break
+        elif fvg['FVG_Type'] == 'Bearish' and candle['High'] >= fvg['fvg_bottom']:
+            retest_info.update(retest=True, retest_time=candle.name, penetration_points=candle['High'] - fvg['fvg_bottom'])
+            retest_candle_index = i
+            break
+
+    if not retest_info['retest']:
+        return retest_info
+
+    reaction_candles = future_candles.loc[retest_candle_index:]
+    if fvg['FVG_Type'] == 'Bullish':
+        if reaction_candles.iloc[0]['Close'] < fvg['fvg_bottom']:
+            retest_info['label'] = 'Weak'
+            return retest_info
+        reaction_points = reaction_candles['High'].max() - reaction_candles.iloc[0]['Low']
+    else:
+        if reaction_candles.iloc[0]['Close'] > fvg['fvg_top']:
+            retest_info['label'] = 'Weak'
+            return retest_info
+        reaction_points = reaction_candles.iloc[0]['High'] - reaction_candles['Low'].min()
+
+    if fvg['fvg_size'] > 0:
+        reaction_strength = reaction_points / fvg['fvg_size']
+        retest_info['reaction_strength'] = round(reaction_strength, 2)
+        if reaction_strength >= 2.0:
+            retest_info['label'] = 'Strong'
+        elif 0.5 <= reaction_strength < 2.0:
+            retest_info['label'] = 'Medium'
+        else:
+            retest_info['label'] = 'Weak'
+    return retest_info
+
+
+def legacy_analyze_retests(m15_df, fvgs):
+    analyzed = []
+    for fvg in fvgs.to_dict('records'):
+        future_candles = m15_df.loc[fvg['time_created']:].iloc[2:fvg_analyzer.RETEST_WINDOW+2]
+        analyzed.append(legacy_analyze_retest(fvg, future_candles) if not future_candles.empty else {})
+    return pd.DataFrame(analyzed, index=fvgs.index, columns=RETEST_COLUMNS)
+
+
+def to_csv_text(df):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, date_format='%Y-%m-%d %H:%M:%S')
+    return buffer.getvalue()
+
+
+def best_of(func, *args):
+    best, result = float('inf'), None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def report(stage, legacy_time, fast_time, identical, detail):
+    print(f"\n--- {stage} ({detail}) ---")
+    print(f"Legacy loop : {legacy_time * 1000:10.2f} ms")
+    print(f"Vectorized  : {fast_time * 1000:10.2f} ms")
+    print(f"Speedup     : {legacy_time / fast_time:10.1f}x")
+    print(f"Identical   : {identical}")
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else str(DEFAULT_BARS)
+    if source.isdigit():
+        m15_df, name = random_candles(int(source)), 'synthetic random walk'
+    else:
+        m15_df, name = load_candles(source), os.path.basename(source)
+    h1_df = load_candles(sys.argv[2]) if len(sys.argv) > 2 else resample_h1(m15_df)
+
+    print(f"\nBenchmarking FVG analysis on {len(m15_df)} M15 candles ({name})")
+
+    legacy_time, legacy_prepared = best_of(legacy_prepare_features, m15_df, h1_df)
+    fast_time, m15_df = best_of(prepare_features, m15_df, h1_df)
+    prep_identical = to_csv_text(legacy_prepared) == to_csv_text(m15_df)
+    report('Feature prep', legacy_time, fast_time, prep_identical, f"{len(h1_df)} H1 candles")
+    print(f"Memory      : {memory_mb(legacy_prepared):7.1f} MB -> {memory_mb(m15_df):.1f} MB")
+
+    legacy_time, legacy_fvgs = best_of(legacy_detect_fvgs, m15_df)
+    fast_time, fast_fvgs = best_of(fvg_analyzer.detect_fvgs, m15_df)
+    detect_identical = to_csv_text(legacy_fvgs) == to_csv_text(fast_fvgs[list(legacy_fvgs.columns)])
+    report('FVG detection', legacy_time, fast_time, detect_identical, f"{len(fast_fvgs)} FVGs")
+
+    # Both retest engines run on the same detected FVGs
+    legacy_time, legacy_retests = best_of(legacy_analyze_retests, m15_df, fast_fvgs)
+    fast_time, fast_retests = best_of(fvg_analyzer.analyze_fvg_retests, m15_df, fast_fvgs)
+    retest_identical = to_csv_text(legacy_retests) == to_csv_text(fast_retests[RETEST_COLUMNS])
+    report('Retest search', legacy_time, fast_time, retest_identical, f"{int(fast_retests['retest'].eq(True).sum())} retested")
+
+    if not (prep_identical and detect_identical and retest_identical):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,8 @@ import numpy as np
 import joblib
 from datetime import timedelta
 
+from fvg_features import ENCODER_FILE, load_encoder
+
 def run_backtest():
     # --- Configuration ---
     INITIAL_CAPITAL = 100.0
@@ -60,15 +62,9 @@ def run_backtest():
 
     # --- Feature Engineering for Prediction (from predict_on_unlabeled_data.py) ---
     print("Running model predictions...")
-    fvg_for_pred = fvg_data.copy()
-    quantiles = fvg_for_pred['fvg_size'].quantile([0.33, 0.66]).tolist()
-    fvg_for_pred['fvg_size_category'] = pd.cut(fvg_for_pred['fvg_size'], bins=[-np.inf] + quantiles + [np.inf], labels=['Small', 'Medium', 'Large'])
-    categorical_features = ['FVG_Type', 'session', 'bias_H1', 'ema50_dir', 'ema200_dir', 'fvg_size_category']
-    fvg_for_pred = pd.get_dummies(fvg_for_pred, columns=categorical_features, drop_first=True)
-    model_features = model.booster_.feature_name()
-    fvg_aligned = fvg_for_pred.reindex(columns=model_features, fill_value=0)
-    
-    probabilities = model.predict_proba(fvg_aligned)[:, 1]
+    # Same features as training (encoder saved next to the model)
+    encoder = load_encoder(ENCODER_FILE)
+    probabilities = model.predict_proba(encoder.transform(fvg_data))[:, 1]
     fvg_data['score'] = (probabilities * 100).astype(int)
     conditions = [
         (fvg_data['score'] >= 85),
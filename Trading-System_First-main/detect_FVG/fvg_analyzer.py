@@ -6,15 +6,48 @@ and evaluates their historical performance.
 
 import pandas as pd
 import numpy as np
+import joblib
+import io
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candle_store import CandleStore
 
 # --- Configuration ---
 M15_FILE = "XAUUSD_Candlestick_15_M_BID_31.10.2022-31.10.2025.csv"
 H1_FILE = "XAUUSD_Candlestick_1_Hour_BID_14.10.2010-31.10.2025.csv"
+CANDLE_SYMBOL = "XAUUSDm" # Candle store series, used instead of the CSVs once converted
+BIAS_TIMEFRAMES = {'M15': 'H1', 'H1': 'H4'} # Higher timeframe used for the bias_H1 column
 OUTPUT_FILE = "fvg_analysis_XAUUSD_M15_4H.csv"
 RETEST_WINDOW = 200  # Number of candles to look for a retest
 VOLUME_SPIKE_MULTIPLIER = 2.0 # Volume must be this much higher than rolling average
 ATR_PERIOD = 14 # Period for Average True Range calculation
+VOLUME_MA_PERIOD = 20 # Rolling window for the volume average
+RETEST_CHUNK_SIZE = 4096 # FVGs evaluated per batch in the retest search
+STATE_FILE = "fvg_analyzer_state.joblib" # Analyzer state used by incremental runs
+STATE_TAIL_CANDLES = RETEST_WINDOW + 3 # Processed candles kept so open FVGs can be re-checked
+CSV_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+LIVE_HORIZON_DAYS = 30 # Days of FVGs kept by live analyses (full history is only used for training sets)
+HORIZON_WARMUP_CANDLES = 1000 # Candles analysed before the horizon; EMA200's seed weight falls below 0.1% after ~700
+TIMEFRAME_MINUTES = {'M15': 15, 'H1': 60, 'H4': 240}
+# Session per UTC hour, matching get_session()
+SESSION_BY_HOUR = np.array(['Asian'] * 8 + ['London'] * 4 + ['New York'] * 5 + ['London Close'] * 7, dtype=object)
+# Context columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = {
+    'bias_H1': ['Bearish', 'Bullish'],
+    'ema50_dir': ['Above', 'Below'],
+    'ema200_dir': ['Above', 'Below'],
+    'session': ['Asian', 'London', 'New York', 'London Close'],
+}
+OUTPUT_COLUMNS = [
+    'time_created', 'FVG_Type', 'label', 'retest', 'retest_time', 'penetration_points', 'reaction_strength', 
+    'fvg_top', 'fvg_bottom', 'fvg_center', 'fvg_size', 'bias_H1', 
+    'ema50_dir', 'ema200_dir', 'session', 'volume_spike_at_fvg',
+    # New Features
+    'fvg_size_vs_atr', 'creating_candle_body_size', 'creating_candle_body_ratio'
+]
 
 # --- Helper Functions ---
 
@@ -31,111 +64,50 @@ def get_session(dt):
         return 'London Close'
     return 'N/A'
 
-def analyze_fvg_retest_and_reaction(fvg, future_candles):
-    """
-    Analyzes the price action after an FVG is formed to find retests and reactions.
-    """
-    fvg_size = fvg['fvg_size']
-    retest_info = {
-        'retest': False,
-        'retest_time': None,
-        'reaction_strength': 0,
-        'penetration_points': 0, # Initialize penetration
-        'label': 'No Retest' # Default label
-    }
-
-    retest_candle_index = -1
-
-    # Find the first retest
-    for i, candle in future_candles.iterrows():
-        if fvg['FVG_Type'] == 'Bullish' and candle['Low'] <= fvg['fvg_top']:
-            retest_info['retest'] = True
-            retest_candle_index = i
-            retest_info['retest_time'] = candle.name
-            retest_info['penetration_points'] = fvg['fvg_top'] - candle['Low']
-            break
-        elif fvg['FVG_Type'] == 'Bearish' and candle['High'] >= fvg['fvg_bottom']:
-            retest_info['retest'] = True
-            retest_candle_index = i
-            retest_info['retest_time'] = candle.name
-            retest_info['penetration_points'] = candle['High'] - fvg['fvg_bottom']
-            break
-
-    if not retest_info['retest']:
-        return retest_info # No retest found in the window
-
-    # If retested, analyze the reaction from the point of retest
-    reaction_candles = future_candles.loc[retest_candle_index:]
-    
-    if fvg['FVG_Type'] == 'Bullish':
-        # Price broke through the FVG
-        if reaction_candles.iloc[0]['Close'] < fvg['fvg_bottom']:
-             retest_info['label'] = 'Weak'
-             retest_info['reaction_strength'] = 0
-             return retest_info
-        
-        max_reaction_high = reaction_candles['High'].max()
-        reaction_points = max_reaction_high - reaction_candles.iloc[0]['Low']
-        
-    elif fvg['FVG_Type'] == 'Bearish':
-        # Price broke through the FVG
-        if reaction_candles.iloc[0]['Close'] > fvg['fvg_top']:
-             retest_info['label'] = 'Weak'
-             retest_info['reaction_strength'] = 0
-             return retest_info
-
-        min_reaction_low = reaction_candles['Low'].min()
-        reaction_points = reaction_candles.iloc[0]['High'] - min_reaction_low
+def session_labels(index):
+    """Vectorized get_session(): looks up the session of every timestamp by its hour."""
+    return SESSION_BY_HOUR[index.hour]
 
-    # Calculate reaction strength relative to FVG size
-    if fvg_size > 0:
-        reaction_strength = reaction_points / fvg_size
-        retest_info['reaction_strength'] = round(reaction_strength, 2)
 
-        # Classify the label based on strength
-        if reaction_strength >= 2.0:
-            retest_info['label'] = 'Strong'
-        elif 0.5 <= reaction_strength < 2.0:
-            retest_info['label'] = 'Medium'
-        else:
-            retest_info['label'] = 'Weak'
-            
-    return retest_info
+def calculate_h1_bias(h1_df, start_date, end_date=None):
+    """
+    Trims the H1 data to the M15 date range and adds the EMA50 bias.
+    `h1_df` must be sorted; the trim is a binary search, not a full-frame mask.
+    """
+    # 2. Align H1 data to M15 start date
+    first = h1_df.index.searchsorted(start_date, side='left')
+    last = h1_df.index.searchsorted(end_date, side='right') if end_date is not None else len(h1_df)
+    h1_df = h1_df.iloc[first:last].copy()
+    print(f"Data aligned. M15 starts: {start_date}, H1 now starts: {h1_df.index.min()}")
 
+    # H1 Bias
+    h1_df['ema50_h1'] = h1_df['Close'].ewm(span=50, adjust=False).mean()
+    h1_df['bias_H1'] = np.where(h1_df['Close'] > h1_df['ema50_h1'], 'Bullish', 'Bearish')
+    return h1_df
 
-# --- Main Script ---
-def main():
-    print("Starting FVG analysis for XAU/USD...")
 
-    # 1. Load and preprocess data
-    print(f"Loading data from {M15_FILE} and {H1_FILE}...")
-    try:
-        m15_df = pd.read_csv(M15_FILE, parse_dates=['Gmt time'], dayfirst=True)
-        # إزالة الأسطر المكررة من بيانات الـ 15 دقيقة، مع الإبقاء على أول ظهور للطابع الزمني المكرر
+def align_h1_bias(m15_index, h1_df):
+    """Latest H1 bias at or before each M15 timestamp, joined with merge_asof."""
+    h1_bias = h1_df['bias_H1'].rename_axis('time').reset_index()
+    merged = pd.merge_asof(pd.DataFrame({'time': m15_index}), h1_bias, on='time', direction='backward')
+    return merged['bias_H1'].to_numpy()
 
-        h1_df = pd.read_csv(H1_FILE, parse_dates=['Gmt time'], dayfirst=True)
-    except FileNotFoundError as e:
-        print(f"Error: {e}. Make sure the CSV files are in the same directory as the script.")
-        return
 
-    m15_df.set_index('Gmt time', inplace=True)
-    h1_df.set_index('Gmt time', inplace=True)
-    m15_df.sort_index(inplace=True)
-    h1_df.sort_index(inplace=True)
+def _as_categories(df):
+    for col, categories in CATEGORICAL_COLUMNS.items():
+        df[col] = pd.Categorical(df[col], categories=categories)
+    return df
 
-    # 2. Align H1 data to M15 start date
-    start_date = m15_df.index.min()
-    h1_df = h1_df[h1_df.index >= start_date]
-    print(f"Data aligned. M15 starts: {start_date}, H1 now starts: {h1_df.index.min()}")
 
+def calculate_indicators(m15_df, h1_df):
+    """
+    Adds the H1 bias, EMA direction, ATR, session and volume spike columns
+    used as FVG context. `h1_df` must come from calculate_h1_bias().
+    """
     # 3. Calculate Indicators and Features
     print("Calculating indicators and features...")
-    # H1 Bias
-    h1_df['ema50_h1'] = h1_df['Close'].ewm(span=50, adjust=False).mean()
-    h1_df['bias_H1'] = np.where(h1_df['Close'] > h1_df['ema50_h1'], 'Bullish', 'Bearish')
-    
     # Resample H1 bias to M15 timeframe
-    m15_df['bias_H1'] = h1_df['bias_H1'].reindex(m15_df.index, method='ffill')
+    m15_df['bias_H1'] = align_h1_bias(m15_df.index, h1_df)
 
     # M15 Indicators
     m15_df['ema50'] = m15_df['Close'].ewm(span=50, adjust=False).mean()
@@ -152,108 +124,549 @@ def main():
     m15_df['atr'] = true_range.ewm(alpha=1/ATR_PERIOD, adjust=False).mean()
 
     # Session
-    m15_df['session'] = [get_session(dt) for dt in m15_df.index]
+    m15_df['session'] = session_labels(m15_df.index)
     
     # Volume Spike
-    m15_df['volume_ma'] = m15_df['Volume'].rolling(window=20).mean()
+    m15_df['volume_ma'] = m15_df['Volume'].rolling(window=VOLUME_MA_PERIOD).mean()
     m15_df['volume_spike_at_fvg'] = m15_df['Volume'] > (m15_df['volume_ma'] * VOLUME_SPIKE_MULTIPLIER)
 
+    return _as_categories(m15_df)
+
+
+def detect_fvgs(m15_df, start=0):
+    """
+    Finds every bullish and bearish FVG with shifted array comparisons
+    (prev = i-1, curr = i, next = i+1) and computes their enriched features.
+    Only FVG candles at position `start` or later are considered.
+    Returns one row per FVG in chronological order.
+    """
+    high = m15_df['High'].to_numpy(dtype=float)
+    low = m15_df['Low'].to_numpy(dtype=float)
+    open_ = m15_df['Open'].to_numpy(dtype=float)
+    close = m15_df['Close'].to_numpy(dtype=float)
+    atr = m15_df['atr'].to_numpy(dtype=float)
+
+    # Ensure there's enough data for ATR calculation to be stable
+    curr = np.arange(max(1, ATR_PERIOD, start), len(m15_df) - 1)
+
+    # Bullish FVG: Gap between prev high and next low
+    is_bullish = low[curr + 1] > high[curr - 1]
+    # Bearish FVG: Gap between prev low and next high
+    is_bearish = ~is_bullish & (low[curr - 1] > high[curr + 1])
+
+    found = is_bullish | is_bearish
+    curr = curr[found]
+    is_bullish = is_bullish[found]
+    prev, nxt = curr - 1, curr + 1
+
+    fvg_bottom = np.where(is_bullish, high[prev], high[nxt])
+    fvg_top = np.where(is_bullish, low[nxt], low[prev])
+    fvg_size = fvg_top - fvg_bottom
+
+    # ATR Context
+    atr_at_creation = atr[nxt]
+    fvg_size_vs_atr = np.divide(fvg_size, atr_at_creation,
+                                out=np.zeros_like(fvg_size), where=atr_at_creation > 0)
+
+    # Displacement Candle Analysis (using next candle)
+    creating_candle_body_size = np.abs(close[nxt] - open_[nxt])
+    creating_candle_total_range = high[nxt] - low[nxt]
+    creating_candle_body_ratio = np.divide(creating_candle_body_size, creating_candle_total_range,
+                                           out=np.zeros_like(fvg_size), where=creating_candle_total_range > 0)
+
+    return pd.DataFrame({
+        'FVG_Type': np.where(is_bullish, 'Bullish', 'Bearish'),
+        'fvg_bottom': fvg_bottom,
+        'fvg_top': fvg_top,
+        'time_created': m15_df.index[curr],
+        'fvg_size': fvg_size,
+        'fvg_center': fvg_bottom + fvg_size / 2,
+        'fvg_size_vs_atr': fvg_size_vs_atr,
+        'creating_candle_body_size': creating_candle_body_size,
+        'creating_candle_body_ratio': creating_candle_body_ratio,
+        # Add original context from the FVG candle
+        'volume_spike_at_fvg': m15_df['volume_spike_at_fvg'].to_numpy()[curr],
+        'session': m15_df['session'].to_numpy()[curr],
+        'ema50_dir': m15_df['ema50_dir'].to_numpy()[curr],
+        'ema200_dir': m15_df['ema200_dir'].to_numpy()[curr],
+        'bias_H1': m15_df['bias_H1'].to_numpy()[curr],
+    })
+
+
+def _inferred_column(values, present, default, has_window):
+    """
+    Builds an object column holding `values` where `present` is set, `default`
+    elsewhere and NaN for FVGs without future candles, matching what the
+    per-FVG retest dicts produced before pandas infers the dtype.
+    """
+    column = np.full(len(values), default, dtype=object)
+    column[present] = values[present]
+    column[~has_window] = np.nan
+    return column
+
+
+def analyze_fvg_retests(m15_df, fvgs):
+    """
+    Analyzes the price action after every FVG at once to find retests and reactions.
+    Each FVG is checked against the RETEST_WINDOW candles starting two candles
+    after time_created, using contiguous High/Low/Close arrays.
+    """
+    times = m15_df.index
+    high = m15_df['High'].to_numpy(dtype=float)
+    low = m15_df['Low'].to_numpy(dtype=float)
+    close = m15_df['Close'].to_numpy(dtype=float)
+    n_candles = len(m15_df)
+
+    is_bullish = fvgs['FVG_Type'].to_numpy() == 'Bullish'
+    fvg_top = fvgs['fvg_top'].to_numpy(dtype=float)
+    fvg_bottom = fvgs['fvg_bottom'].to_numpy(dtype=float)
+    fvg_size = fvgs['fvg_size'].to_numpy(dtype=float)
+
+    # Future candles start two candles after the first candle stamped time_created
+    start = times.searchsorted(fvgs['time_created'].to_numpy(), side='left') + 2
+    has_window = start < n_candles
+    start = np.minimum(start, n_candles)
+
+    # Pad so every window holds RETEST_WINDOW candles; padding can never retest or react
+    high_padded = np.concatenate([high, np.full(RETEST_WINDOW, -np.inf)])
+    low_padded = np.concatenate([low, np.full(RETEST_WINDOW, np.inf)])
+    offsets = np.arange(RETEST_WINDOW)
+    # .loc[label:] restarts at the first candle sharing the retest timestamp
+    first_with_time = times.searchsorted(times, side='left')
+
+    retested = np.zeros(len(fvgs), dtype=bool)
+    retest_idx = np.zeros(len(fvgs), dtype=np.int64)
+    reaction_idx = np.zeros(len(fvgs), dtype=np.int64)
+    reaction_high = np.full(len(fvgs), np.nan)
+    reaction_low = np.full(len(fvgs), np.nan)
+
+    for chunk_start in range(0, len(fvgs), RETEST_CHUNK_SIZE):
+        chunk = slice(chunk_start, chunk_start + RETEST_CHUNK_SIZE)
+        window = start[chunk, None] + offsets
+        highs = high_padded[window]
+        lows = low_padded[window]
+
+        # Find the first retest
+        touched = np.where(is_bullish[chunk, None],
+                           lows <= fvg_top[chunk, None],
+                           highs >= fvg_bottom[chunk, None])
+        found = touched.any(axis=1) & has_window[chunk]
+        first = start[chunk] + touched.argmax(axis=1)
+        retested[chunk] = found
+        retest_idx[chunk] = np.where(found, first, 0)
+
+        # Reaction is measured from the retest candle to the end of the window
+        reaction_start = np.where(found, np.maximum(start[chunk], first_with_time[np.minimum(first, n_candles - 1)]), 0)
+        reaction_idx[chunk] = reaction_start
+        after_retest = window >= reaction_start[:, None]
+        reaction_high[chunk] = np.nanmax(np.where(after_retest, highs, -np.inf), axis=1)
+        reaction_low[chunk] = np.nanmin(np.where(after_retest, lows, np.inf), axis=1)
+
+    penetration_points = np.where(is_bullish, fvg_top - low[retest_idx], high[retest_idx] - fvg_bottom)
+
+    # Price broke through the FVG on the retest candle
+    broke_through = np.where(is_bullish, close[reaction_idx] < fvg_bottom, close[reaction_idx] > fvg_top)
+    reaction_points = np.where(is_bullish, reaction_high - low[reaction_idx], high[reaction_idx] - reaction_low)
+
+    # Calculate reaction strength relative to FVG size
+    scored = retested & ~broke_through & (fvg_size > 0)
+    reaction_strength = np.divide(reaction_points, fvg_size, out=np.zeros_like(fvg_size), where=scored)
+
+    # Classify the label based on strength
+    label = np.select(
+        [~retested, broke_through, ~scored, reaction_strength >= 2.0, reaction_strength >= 0.5],
+        ['No Retest', 'Weak', 'No Retest', 'Strong', 'Medium'],
+        default='Weak'
+    )
+
+    retest_time = np.asarray(times[retest_idx].astype(object))
+    columns = {
+        'retest': _inferred_column(retested, has_window, False, has_window),
+        'retest_time': _inferred_column(retest_time, retested, None, has_window),
+        'penetration_points': _inferred_column(penetration_points, retested, 0, has_window),
+        'reaction_strength': _inferred_column(np.round(reaction_strength, 2), scored, 0, has_window),
+        'label': _inferred_column(label, has_window, 'No Retest', has_window),
+    }
+    return pd.DataFrame(columns, index=fvgs.index).infer_objects()
+
+
+def _still_open(m15_df, fvgs):
+    """Marks FVGs whose RETEST_WINDOW extends past the last available candle."""
+    start = m15_df.index.searchsorted(fvgs['time_created'].to_numpy(), side='left') + 2
+    return start + RETEST_WINDOW > len(m15_df)
+
+
+def _finalize(fvgs, retests):
+    final_df = pd.concat([fvgs, retests], axis=1)
+    # Reorder columns for clarity
+    return final_df.reindex(columns=OUTPUT_COLUMNS)
+
+
+def _write_analysis(final_df, is_open, output_file, open_offset=None):
+    """
+    Writes resolved FVGs followed by the still-open ones to `output_file`.
+    With open_offset=None the file is rewritten; otherwise it is truncated at
+    open_offset (where the previous open rows started) and the rows are appended.
+    Returns the new open-rows offset and the final file size.
+    """
+    resolved_text = final_df[~is_open].to_csv(index=False, header=open_offset is None, date_format=CSV_DATE_FORMAT)
+    open_text = final_df[is_open].to_csv(index=False, header=False, date_format=CSV_DATE_FORMAT)
+
+    with open(output_file, 'wb' if open_offset is None else 'r+b') as f:
+        if open_offset is not None:
+            f.seek(open_offset)
+            f.truncate()
+        f.write(resolved_text.encode('utf-8'))
+        new_open_offset = f.tell()
+        f.write(open_text.encode('utf-8'))
+        return new_open_offset, f.tell()
+
+
+def _continue_ewm(seed, values, com):
+    """
+    Continues an adjust=False EWM from its last value using the same recurrence
+    as pandas, so the result matches ewm() over the full history exactly.
+    """
+    alpha = 1. / (1. + com)
+    old_wt = 1. - alpha
+    result = np.empty(len(values))
+    weighted = seed
+    for i, cur in enumerate(values):
+        if weighted != cur:
+            weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        result[i] = weighted
+    return result
+
+
+def _line_time(line):
+    return pd.to_datetime(line.split(b',', 1)[0].decode(), dayfirst=True)
+
+
+def read_candles_after(csv_path, last_time, chunk_size=64 * 1024):
+    """
+    Reads the candles stamped after `last_time` by scanning the CSV backwards
+    from its end, so only the tail of a multi-year file is parsed.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        while pos > data_start:
+            step = min(chunk_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            # The first line may be cut by the chunk boundary, so check the second one
+            lines = tail.split(b'\n', 2)
+            if pos > data_start and len(lines) == 3 and lines[1].strip() and _line_time(lines[1]) <= last_time:
+                tail = tail.split(b'\n', 1)[1]
+                break
+
+    candles = pd.read_csv(io.BytesIO(header + tail), parse_dates=['Gmt time'], dayfirst=True)
+    candles.set_index('Gmt time', inplace=True)
+    if candles.empty:
+        return candles
+    candles.sort_index(inplace=True)
+    return candles[candles.index > last_time]
+
+
+def load_candles(csv_file, symbol, timeframe, after=None):
+    """
+    Loads candles from the candle store when the series has been converted,
+    otherwise from `csv_file`. With `after`, only newer candles are returned.
+    """
+    store = CandleStore()
+    if store.exists(symbol, timeframe):
+        return store.read(symbol, timeframe, start=after, include_start=False)
+    if csv_file is None:
+        raise FileNotFoundError(f"No {timeframe} candles stored for {symbol}")
+    if after is not None:
+        return read_candles_after(csv_file, after)
+    candles = pd.read_csv(csv_file, parse_dates=['Gmt time'], dayfirst=True)
+    candles.set_index('Gmt time', inplace=True)
+    candles.sort_index(inplace=True)
+    return candles
+
+
+def _last_candle_time(csv_file, symbol, timeframe, block_size=4096):
+    store = CandleStore()
+    if store.exists(symbol, timeframe):
+        return store.last_time(symbol, timeframe)
+    if csv_file is None or not os.path.exists(csv_file):
+        return None
+    with open(csv_file, 'rb') as f:
+        f.readline()
+        data_start = f.tell()
+        end = f.seek(0, os.SEEK_END)
+        f.seek(max(data_start, end - block_size))
+        lines = [line for line in f.read().split(b'\n') if line.strip()]
+    return _line_time(lines[-1]) if lines else None
+
+
+def live_horizon(job):
+    """
+    (load_from, horizon_start) for a live analysis: FVGs are reported from
+    `horizon_days` before the last candle, and candles are loaded from
+    HORIZON_WARMUP_CANDLES earlier (weekends included) so EMA200/ATR have converged.
+    """
+    last_time = _last_candle_time(job['candle_file'], job['symbol'], job['timeframe'])
+    if last_time is None:
+        return None, None
+    horizon_start = last_time - pd.Timedelta(days=job['horizon_days'])
+    warmup = pd.Timedelta(minutes=HORIZON_WARMUP_CANDLES * TIMEFRAME_MINUTES[job['timeframe']] * 7 / 5)
+    return horizon_start - warmup, horizon_start
+
+
+def _first_candle_time(csv_file, symbol, timeframe):
+    store = CandleStore()
+    if store.exists(symbol, timeframe):
+        return store.first_time(symbol, timeframe)
+    if csv_file is None or not os.path.exists(csv_file):
+        return None
+    first_rows = pd.read_csv(csv_file, parse_dates=['Gmt time'], dayfirst=True, nrows=1)
+    return first_rows['Gmt time'].iloc[0] if not first_rows.empty else None
+
+
+def _extend_indicators(state, new_m15, new_h1):
+    """
+    Calculates the indicator columns for newly arrived M15 candles by continuing
+    the H1/M15 EMA and ATR seeds and the volume window kept in the state.
+    """
+    tail = state['tail']
+    last = tail.iloc[-1]
+
+    # H1 Bias
+    h1_bias = pd.Series([state['h1_bias']], index=[state['h1_last_time']])
+    if not new_h1.empty:
+        h1_ema = _continue_ewm(state['h1_ema50'], new_h1['Close'].to_numpy(dtype=float), com=(50 - 1) / 2)
+        h1_bias = pd.concat([h1_bias, pd.Series(np.where(new_h1['Close'] > h1_ema, 'Bullish', 'Bearish'), index=new_h1.index)])
+        state.update(h1_last_time=new_h1.index[-1], h1_ema50=h1_ema[-1], h1_bias=h1_bias.iloc[-1])
+    new_m15['bias_H1'] = align_h1_bias(new_m15.index, h1_bias.to_frame('bias_H1'))
+
+    # M15 Indicators
+    close = new_m15['Close'].to_numpy(dtype=float)
+    new_m15['ema50'] = _continue_ewm(last['ema50'], close, com=(50 - 1) / 2)
+    new_m15['ema200'] = _continue_ewm(last['ema200'], close, com=(200 - 1) / 2)
+    new_m15['ema50_dir'] = np.where(new_m15['Close'] > new_m15['ema50'], 'Above', 'Below')
+    new_m15['ema200_dir'] = np.where(new_m15['Close'] > new_m15['ema200'], 'Above', 'Below')
+
+    # ATR for volatility context
+    high = new_m15['High'].to_numpy(dtype=float)
+    low = new_m15['Low'].to_numpy(dtype=float)
+    prev_close = np.concatenate([[last['Close']], close[:-1]])
+    true_range = np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+    atr_alpha = 1 / ATR_PERIOD
+    new_m15['atr'] = _continue_ewm(last['atr'], true_range, com=(1 - atr_alpha) / atr_alpha)
+
+    # Session
+    new_m15['session'] = session_labels(new_m15.index)
+
+    # Volume Spike
+    volume = pd.concat([tail['Volume'].iloc[-(VOLUME_MA_PERIOD - 1):], new_m15['Volume']])
+    new_m15['volume_ma'] = volume.rolling(window=VOLUME_MA_PERIOD).mean().iloc[-len(new_m15):].to_numpy()
+    new_m15['volume_spike_at_fvg'] = new_m15['Volume'] > (new_m15['volume_ma'] * VOLUME_SPIKE_MULTIPLIER)
+
+    return _as_categories(new_m15)
+
+
+def load_state(state_file=STATE_FILE):
+    if not os.path.exists(state_file):
+        return None
+    try:
+        return joblib.load(state_file)
+    except Exception as e:
+        print(f"Warning: could not load analyzer state ({e}).")
+        return None
+
+
+def save_state(state_file, m15_start, m15_df, h1_seed, fvgs, is_open, open_offset, output_size,
+               horizon_days=None):
+    """
+    Persists what the next incremental run needs. `h1_seed` holds the last H1
+    time, EMA50 and bias. Skipped for histories shorter than the state tail.
+    """
+    if len(m15_df) < STATE_TAIL_CANDLES or h1_seed is None:
+        return
+    h1_last_time, h1_ema50, h1_bias = h1_seed
+    state = {
+        'config': (RETEST_WINDOW, VOLUME_SPIKE_MULTIPLIER, ATR_PERIOD),
+        'horizon_days': horizon_days,
+        'm15_start': m15_start,
+        'tail': m15_df.iloc[-STATE_TAIL_CANDLES:].copy(),
+        'h1_last_time': h1_last_time,
+        'h1_ema50': h1_ema50,
+        'h1_bias': h1_bias,
+        'open_fvgs': fvgs[is_open].reset_index(drop=True),
+        'open_offset': open_offset,
+        'output_size': output_size,
+    }
+    temp_file = state_file + '.tmp'
+    joblib.dump(state, temp_file)
+    os.replace(temp_file, state_file)
+
+
+def _state_matches_files(state, job):
+    """Checks that the output and candle files are the ones the state was built from."""
+    if state.get('config') != (RETEST_WINDOW, VOLUME_SPIKE_MULTIPLIER, ATR_PERIOD):
+        return False
+    if state.get('horizon_days') != job['horizon_days']:
+        return False
+    output_file = job['output_file']
+    if not os.path.exists(output_file) or os.path.getsize(output_file) != state['output_size']:
+        return False
+    if job['horizon_days']:
+        # The live window is rebuilt once it has grown to twice the horizon
+        load_from, _ = live_horizon(job)
+        return load_from is not None and state['m15_start'] >= load_from - pd.Timedelta(days=job['horizon_days'])
+    return _first_candle_time(job['candle_file'], job['symbol'], job['timeframe']) == state['m15_start']
+
+
+def run_incremental(state, job):
+    """
+    Updates the analysis with the candles that arrived since the last run.
+    Only new candles are scanned for FVGs and only FVGs still inside their
+    RETEST_WINDOW are re-labelled; resolved rows in the output file are kept as is.
+    Returns False when the state no longer matches the data files.
+    """
+    if not _state_matches_files(state, job):
+        return False
+
+    tail = state['tail']
+    new_m15 = load_candles(job['candle_file'], job['symbol'], job['timeframe'], after=tail.index[-1])
+    if new_m15.empty:
+        print(f"No new {job['timeframe']} candles since the last analysis.")
+        return True
+    new_h1 = load_candles(job['bias_file'], job['symbol'], job['bias_timeframe'], after=state['h1_last_time'])
+    print(f"Analyzing {len(new_m15)} new {job['timeframe']} candles and {len(state['open_fvgs'])} open FVGs...")
+
+    new_m15 = _extend_indicators(state, new_m15, new_h1)
+    m15_df = pd.concat([tail, new_m15])
+
+    # Only FVG candles from the last processed candle onwards are new
+    new_fvgs = detect_fvgs(m15_df, start=len(tail) - 1)
+    fvgs = pd.concat([state['open_fvgs'], new_fvgs], ignore_index=True)
+    print(f"Found {len(new_fvgs)} new FVGs.")
+
+    if fvgs.empty:
+        is_open = np.zeros(0, dtype=bool)
+        open_offset, output_size = state['open_offset'], state['output_size']
+    else:
+        final_df = _finalize(fvgs, analyze_fvg_retests(m15_df, fvgs))
+        final_df = final_df.astype({'penetration_points': float, 'reaction_strength': float})
+        is_open = _still_open(m15_df, fvgs)
+        open_offset, output_size = _write_analysis(final_df, is_open, job['output_file'], state['open_offset'])
+
+    h1_seed = (state['h1_last_time'], state['h1_ema50'], state['h1_bias'])
+    save_state(job['state_file'], state['m15_start'], m15_df, h1_seed, fvgs, is_open, open_offset, output_size,
+               job['horizon_days'])
+    print(f"Incremental analysis complete. Results saved to {job['output_file']}")
+    return True
+
+
+# --- Main Script ---
+def main(incremental=False, symbol=CANDLE_SYMBOL, timeframe='M15', candle_file=M15_FILE,
+         bias_file=H1_FILE, output_file=OUTPUT_FILE, state_file=STATE_FILE, horizon_days=None):
+    """
+    Runs the FVG analysis of one symbol/timeframe. Candles come from the
+    candle store, or from `candle_file` / `bias_file` (CSV) when the series
+    has not been converted; all paths are used as given, so several analyses
+    can run side by side. With incremental=True only candles added since the
+    previous run are processed, falling back to a full run when no valid
+    analyzer state exists.
+    With `horizon_days` (live use) only FVGs from the last `horizon_days` are
+    analysed, so the cost no longer depends on the length of the archive;
+    without it the whole history is analysed (training-set generation).
+    """
+    job = {
+        'symbol': symbol, 'timeframe': timeframe, 'bias_timeframe': BIAS_TIMEFRAMES[timeframe],
+        'candle_file': candle_file, 'bias_file': bias_file,
+        'output_file': output_file, 'state_file': state_file, 'horizon_days': horizon_days,
+    }
+    print(f"Starting FVG analysis for {symbol} {timeframe}...")
+
+    if incremental:
+        state = load_state(state_file)
+        if state is not None and run_incremental(state, job):
+            return
+        print("No usable analyzer state, running full analysis...")
+
+    # 1. Load and preprocess data
+    print(f"Loading {timeframe} and {job['bias_timeframe']} candles for {symbol}...")
+    try:
+        load_from, horizon_start = live_horizon(job) if horizon_days else (None, None)
+        if horizon_start is not None:
+            print(f"Live horizon: FVGs since {horizon_start} (candles from {load_from})")
+        m15_df = load_candles(candle_file, symbol, timeframe, after=load_from)
+        # إزالة الأسطر المكررة من بيانات الـ 15 دقيقة، مع الإبقاء على أول ظهور للطابع الزمني المكرر
+
+        h1_df = load_candles(bias_file, symbol, job['bias_timeframe'], after=load_from)
+    except FileNotFoundError as e:
+        print(f"Error: {e}. Make sure the CSV files are in the same directory as the script.")
+        return
+
+    # 2-3. Align H1 data and calculate indicators and features
+    h1_df = calculate_h1_bias(h1_df, m15_df.index.min(), m15_df.index.max())
+    m15_df = calculate_indicators(m15_df, h1_df)
+
     # 4. Identify FVGs
     print("Identifying Fair Value Gaps (FVGs) with enhanced features...")
-    fvg_list = []
-    # Ensure there's enough data for ATR calculation to be stable
-    for i in range(max(1, ATR_PERIOD), len(m15_df) - 1):
-        prev_candle = m15_df.iloc[i-1]
-        curr_candle = m15_df.iloc[i]
-        next_candle = m15_df.iloc[i+1]
-
-        fvg_data = None
-
-        # Bullish FVG: Gap between prev high and next low
-        if next_candle['Low'] > prev_candle['High']:
-            fvg_data = {
-                'FVG_Type': 'Bullish',
-                'fvg_bottom': prev_candle['High'],
-                'fvg_top': next_candle['Low']
-            }
-
-        # Bearish FVG: Gap between prev low and next high
-        elif prev_candle['Low'] > next_candle['High']:
-            fvg_data = {
-                'FVG_Type': 'Bearish',
-                'fvg_bottom': next_candle['High'],
-                'fvg_top': prev_candle['Low']
-            }
-
-        if fvg_data:
-            fvg_data['time_created'] = curr_candle.name
-            fvg_data['fvg_size'] = fvg_data['fvg_top'] - fvg_data['fvg_bottom']
-            fvg_data['fvg_center'] = fvg_data['fvg_bottom'] + fvg_data['fvg_size'] / 2
-            
-            # --- Add Enhanced Features ---
-            # ATR Context
-            atr_at_creation = next_candle['atr']
-            if atr_at_creation > 0:
-                fvg_data['fvg_size_vs_atr'] = fvg_data['fvg_size'] / atr_at_creation
-            else:
-                fvg_data['fvg_size_vs_atr'] = 0
-
-            # Displacement Candle Analysis (using next_candle)
-            creating_candle_body_size = abs(next_candle['Close'] - next_candle['Open'])
-            creating_candle_total_range = next_candle['High'] - next_candle['Low']
-            fvg_data['creating_candle_body_size'] = creating_candle_body_size
-            if creating_candle_total_range > 0:
-                fvg_data['creating_candle_body_ratio'] = creating_candle_body_size / creating_candle_total_range
-            else:
-                fvg_data['creating_candle_body_ratio'] = 0
-
-            # Add original context from the FVG candle
-            fvg_data['volume_spike_at_fvg'] = curr_candle['volume_spike_at_fvg']
-            fvg_data['session'] = curr_candle['session']
-            fvg_data['ema50_dir'] = curr_candle['ema50_dir']
-            fvg_data['ema200_dir'] = curr_candle['ema200_dir']
-            fvg_data['bias_H1'] = curr_candle['bias_H1']
-            
-            fvg_list.append(fvg_data)
-
-    if not fvg_list:
+    fvgs = detect_fvgs(m15_df, start=m15_df.index.searchsorted(horizon_start) if horizon_start is not None else 0)
+
+    if fvgs.empty:
         print("No FVGs found.")
         return
         
-    print(f"Found {len(fvg_list)} potential FVGs. Now analyzing retests...")
+    print(f"Found {len(fvgs)} potential FVGs. Now analyzing retests...")
 
     # 5. Analyze Retests and Reactions
-    analyzed_fvgs = []
-    total_fvgs = len(fvg_list)
-    for i, fvg in enumerate(fvg_list):
-        # Get future candles from the point FVG was created
-        future_candles_slice = m15_df.loc[fvg['time_created']:].iloc[2:RETEST_WINDOW+2]
-        
-        if not future_candles_slice.empty:
-            retest_analysis = analyze_fvg_retest_and_reaction(fvg, future_candles_slice)
-            fvg.update(retest_analysis)
-        
-        analyzed_fvgs.append(fvg)
-        
-        if (i + 1) % 1000 == 0:
-            print(f"Analyzed {i+1}/{total_fvgs} FVGs...")
+    retests = analyze_fvg_retests(m15_df, fvgs)
 
     # 6. Create and Save Final DataFrame
     print("Finalizing analysis and saving results...")
-    final_df = pd.DataFrame(analyzed_fvgs)
-    
-    # Reorder columns for clarity
-    column_order = [
-        'time_created', 'FVG_Type', 'label', 'retest', 'retest_time', 'penetration_points', 'reaction_strength', 
-        'fvg_top', 'fvg_bottom', 'fvg_center', 'fvg_size', 'bias_H1', 
-        'ema50_dir', 'ema200_dir', 'session', 'volume_spike_at_fvg',
-        # New Features
-        'fvg_size_vs_atr', 'creating_candle_body_size', 'creating_candle_body_ratio'
-    ]
-    final_df = final_df.reindex(columns=column_order)
-
-    final_df.to_csv(OUTPUT_FILE, index=False, date_format='%Y-%m-%d %H:%M:%S')
-    print(f"Analysis complete. Results saved to {OUTPUT_FILE}")
+    final_df = _finalize(fvgs, retests)
+    is_open = _still_open(m15_df, fvgs)
+    open_offset, output_size = _write_analysis(final_df, is_open, output_file)
+    h1_seed = (h1_df.index[-1], h1_df['ema50_h1'].iloc[-1], h1_df['bias_H1'].iloc[-1]) if not h1_df.empty else None
+    save_state(state_file, m15_df.index[0], m15_df, h1_seed, fvgs, is_open, open_offset, output_size, horizon_days)
+    print(f"Analysis complete. Results saved to {output_file}")
+
+
+def analysis_files(output_dir, symbol, timeframe):
+    """Output CSV and state file used for one symbol/timeframe."""
+    return (os.path.join(output_dir, f'fvg_analysis_{symbol}_{timeframe}_4H.csv'),
+            os.path.join(output_dir, f'fvg_analyzer_state_{symbol}_{timeframe}.joblib'))
+
+
+def read_recent_fvgs(output_file, count, chunk_size=64 * 1024):
+    """Reads the last `count` rows of an analysis CSV without parsing the whole file."""
+    if not os.path.exists(output_file):
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    with open(output_file, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        while pos > data_start and tail.count(b'\n') <= count:
+            step = min(chunk_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+        if pos > data_start:
+            tail = tail.split(b'\n', 1)[1]
+    return pd.read_csv(io.BytesIO(header + tail)).tail(count).reset_index(drop=True)
+
+
+def analyze_symbol(symbol, timeframe, output_dir, recent=10, horizon_days=LIVE_HORIZON_DAYS):
+    """
+    Process-pool entry point: incrementally analyzes the live horizon of one
+    symbol/timeframe from the candle store and returns its `recent` latest FVGs.
+    """
+    output_file, state_file = analysis_files(output_dir, symbol, timeframe)
+    main(incremental=True, symbol=symbol, timeframe=timeframe, candle_file=None, bias_file=None,
+         output_file=output_file, state_file=state_file, horizon_days=horizon_days)
+    return read_recent_fvgs(output_file, recent)
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+'''
+Feature encoding shared by FVG classifier training and every scorer.
+
+FVGFeatureEncoder turns raw FVGs straight into the float32 matrix the
+booster expects, in the booster's feature order:
+- a list of FVG dicts (live/streamed zones) - pure Python, a few
+  microseconds per zone
+- a NumPy structured array or a DataFrame of analysis rows - one
+  vectorized comparison per feature
+
+The feature layout is fixed (FEATURE_SPEC, the columns the classifier has
+always been trained on), so every retrain produces compatible columns.
+One-hot features are encoded by category value, which is what
+pd.get_dummies(drop_first=True) plus the former column patching yields: a
+category without a flag in the spec (e.g. 'London Close') encodes like the
+dropped reference category (all flags 0). The encoder is fitted when the
+model is trained - fit() records the training categories and reports the
+ones without a flag - and saved next to it (fvg_feature_encoder.joblib and
+in the model registry), so training and inference always use identical
+features.
+'''
+
+import os
+
+import joblib
+import numpy as np
+
+ENCODER_FILE = 'fvg_feature_encoder.joblib'
+
+# (column, category): category None = numeric column, otherwise a one-hot flag
+FEATURE_SPEC = [
+    ('fvg_size', None),
+    ('volume_spike_at_fvg', None),
+    ('FVG_Type', 'Bullish'),
+    ('session', 'London'),
+    ('session', 'New York'),
+    ('session', 'Other'),
+    ('bias_H1', 'Bullish'),
+    ('bias_H1', 'Neutral'),
+]
+
+
+def _feature_name(column, category):
+    # LightGBM replaces spaces in feature names ('session_New York' -> 'session_New_York')
+    name = column if category is None else f'{column}_{category}'
+    return name.replace(' ', '_')
+
+
+def _columns(fvgs):
+    """Column names of a structured array or DataFrame"""
+    names = getattr(fvgs, 'dtype', None) is not None and fvgs.dtype.names
+    return set(names) if names else set(fvgs.columns)
+
+
+class FVGFeatureEncoder:
+    def __init__(self, spec=FEATURE_SPEC):
+        self.spec = [tuple(item) for item in spec]
+        self.feature_names = [_feature_name(column, category) for column, category in self.spec]
+        self.categories_ = None
+
+    def fit(self, fvgs):
+        """
+        Records the category values of the training rows (DataFrame or
+        structured array) and reports those without a flag in the spec. The
+        feature layout itself stays the spec's.
+        """
+        available = _columns(fvgs)
+        self.categories_ = {
+            column: sorted({str(value) for value in np.asarray(fvgs[column]) if value is not None and value == value})
+            for column in dict.fromkeys(column for column, category in self.spec if category is not None)
+            if column in available
+        }
+        flagged = {(column, category) for column, category in self.spec if category is not None}
+        unflagged = {column: [value for value in values if (column, value) not in flagged]
+                     for column, values in self.categories_.items()}
+        # One category per column is the dropped reference; more share its all-zero encoding
+        shared = {column: values for column, values in unflagged.items() if len(values) > 1}
+        if shared:
+            print(f"⚠️ Categories encoded alike (no feature of their own): {shared}")
+        return self
+
+    def transform(self, fvgs):
+        """(n_fvgs, n_features) float32 matrix in feature_names order"""
+        if isinstance(fvgs, dict):
+            fvgs = [fvgs]
+        if isinstance(fvgs, (list, tuple)):
+            return self._transform_records(fvgs)
+
+        available = _columns(fvgs)
+        matrix = np.zeros((len(fvgs), len(self.spec)), dtype=np.float32)
+        for i, (column, category) in enumerate(self.spec):
+            if column not in available:
+                continue
+            values = np.asarray(fvgs[column])
+            matrix[:, i] = values.astype(np.float32) if category is None else values == category
+        return matrix
+
+    def _transform_records(self, records):
+        rows = []
+        for fvg in records:
+            row = []
+            for column, category in self.spec:
+                value = fvg.get(column)
+                if category is not None:
+                    row.append(1.0 if value == category else 0.0)
+                else:
+                    row.append(0.0 if value is None else float(value))
+            rows.append(row)
+        return np.array(rows, dtype=np.float32).reshape(len(rows), len(self.spec))
+
+    def check_model(self, model):
+        """Raises if the model was trained on other features than this encoder produces"""
+        booster_names = model.booster_.feature_name()
+        if booster_names != self.feature_names:
+            raise ValueError(f"Model features {booster_names} do not match encoder features {self.feature_names}")
+
+
+def save_encoder(encoder, path):
+    joblib.dump(encoder, path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def load_encoder(path=ENCODER_FILE):
+    """The encoder saved with the model; the default FEATURE_SPEC encoder for models trained before it existed"""
+    if path and os.path.exists(path):
+        return joblib.load(path)
+    return FVGFeatureEncoder()
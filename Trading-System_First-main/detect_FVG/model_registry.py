@@ -0,0 +1,144 @@
+"""
+model_registry.py - Versioned FVG Classifier Registry
+=====================================================
+
+Trained models are published as numbered versions:
+
+    models/<name>/v0001/model.joblib
+    models/<name>/v0002/model.joblib
+    models/<name>/v0002/encoder.joblib   (artifacts published with the model)
+    models/<name>/manifest.json      {"version": 2, "path": "v0002/model.joblib", ...}
+
+publish() writes the new version into a temporary directory, renames it into
+place and then atomically replaces the manifest, so readers (other threads or
+processes) only ever see a complete model. load() keeps the model in memory and
+re-reads it only when the manifest version changes, so consumers pick up a
+retrained model without a restart and without a joblib.load() per call.
+
+Before the first publish, load() falls back to the legacy flat model file
+(e.g. fvg_strong_classifier.joblib) as version 0.
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import joblib
+
+MODEL_NAME = 'fvg_strong_classifier'
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+KEEP_VERSIONS = 5  # Older versions are removed after a publish
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+class ModelRegistry:
+    def __init__(self, root=DEFAULT_ROOT, name=MODEL_NAME, legacy_path=None):
+        self.model_dir = os.path.join(root, name)
+        self.manifest_path = os.path.join(self.model_dir, 'manifest.json')
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._manifest_stat = None
+        self._version = None
+        self._model = None
+        self._artifacts = {}
+
+    def manifest(self):
+        """The current manifest, or None before the first publish"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def current_version(self):
+        manifest = self.manifest()
+        return manifest['version'] if manifest else None
+
+    def publish(self, model, metadata=None, artifacts=None):
+        """
+        Stores `model` (and `artifacts`, e.g. {'encoder': encoder}) as the next
+        version and makes it current. Returns the new version.
+        """
+        os.makedirs(self.model_dir, exist_ok=True)
+        version = (self.current_version() or 0) + 1
+        version_name = f'v{version:04d}'
+        temp_dir = os.path.join(self.model_dir, f'.{version_name}.tmp')
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+        joblib.dump(model, os.path.join(temp_dir, 'model.joblib'))
+        for name, artifact in (artifacts or {}).items():
+            joblib.dump(artifact, os.path.join(temp_dir, f'{name}.joblib'))
+        os.replace(temp_dir, os.path.join(self.model_dir, version_name))
+
+        manifest = {
+            'version': version,
+            'path': f'{version_name}/model.joblib',
+            'artifacts': {name: f'{version_name}/{name}.joblib' for name in (artifacts or {})},
+            'published_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'metadata': metadata or {},
+        }
+        temp_manifest = self.manifest_path + '.tmp'
+        with open(temp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_manifest, self.manifest_path)
+
+        self._prune(version)
+        return version
+
+    def _prune(self, current):
+        for entry in os.listdir(self.model_dir):
+            if entry.startswith('v') and entry[1:].isdigit() and int(entry[1:]) <= current - KEEP_VERSIONS:
+                shutil.rmtree(os.path.join(self.model_dir, entry), ignore_errors=True)
+
+    def load(self):
+        """
+        (model, version) of the current model; (None, None) when there is none.
+        Only the manifest is checked on each call - the model is re-read when
+        its version changed.
+        """
+        model, _, version = self.load_with_artifacts()
+        return model, version
+
+    def load_with_artifacts(self):
+        """(model, artifacts, version), the artifacts always belonging to that model version"""
+        try:
+            stat = os.stat(self.manifest_path)
+            manifest_stat = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            manifest_stat = None
+
+        with self._lock:
+            if self._model is not None and manifest_stat == self._manifest_stat:
+                return self._model, self._artifacts, self._version
+
+            manifest = self.manifest() if manifest_stat else None
+            if manifest:
+                path, version = os.path.join(self.model_dir, manifest['path']), manifest['version']
+                artifact_paths = {name: os.path.join(self.model_dir, artifact_path)
+                                  for name, artifact_path in manifest.get('artifacts', {}).items()}
+            elif self.legacy_path and os.path.exists(self.legacy_path):
+                path, version, artifact_paths = self.legacy_path, 0, {}
+            else:
+                return None, {}, None
+
+            if version != self._version or self._model is None:
+                self._model = joblib.load(path)
+                self._artifacts = {name: joblib.load(artifact_path) for name, artifact_path in artifact_paths.items()}
+                self._version = version
+            self._manifest_stat = manifest_stat
+            return self._model, self._artifacts, self._version
+
+
+def get_registry(root=DEFAULT_ROOT, name=MODEL_NAME, legacy_path=None):
+    """Process-wide registry instance, so every consumer shares one cached model"""
+    key = (os.path.abspath(root), name)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(root, name, legacy_path)
+        elif legacy_path and _registries[key].legacy_path is None:
+            _registries[key].legacy_path = legacy_path
+        return _registries[key]
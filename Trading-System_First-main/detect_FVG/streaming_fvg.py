@@ -0,0 +1,184 @@
+'''
+Online FVG detector that processes one closed M15 candle at a time.
+
+Instead of re-running fvg_analyzer.py over the whole history, the detector
+keeps a three-candle window plus rolling EMA50/EMA200, ATR and volume-MA
+state, and emits zone events as soon as a candle closes:
+
+- zone_created:     a new gap formed between candles i-1 and i+1
+- zone_retested:    price came back into the gap (first touch only)
+- zone_invalidated: a candle closed through the far side of the gap
+                    ('broken') or the retest window ran out ('expired')
+
+Gap detection, features and the retest window follow fvg_analyzer.py, so the
+created zones carry the same columns as the rows of the analysis CSV.
+'''
+
+import os
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fvg_analyzer import ATR_PERIOD, RETEST_WINDOW, VOLUME_MA_PERIOD, VOLUME_SPIKE_MULTIPLIER, get_session
+
+ZONE_CREATED = 'zone_created'
+ZONE_RETESTED = 'zone_retested'
+ZONE_INVALIDATED = 'zone_invalidated'
+
+
+def _ewm_step(weighted, value, alpha):
+    """One step of pandas' ewm(adjust=False).mean(), including its rounding."""
+    if weighted is None:
+        return value
+    old_wt = 1. - alpha
+    if weighted != value:
+        weighted = (old_wt * weighted + alpha * value) / (old_wt + alpha)
+    return weighted
+
+
+class StreamingFVGDetector:
+    """
+    Incremental FVG detector. Feed closed H1 candles with update_h1() and
+    closed M15 candles with update(); each update() call returns the list of
+    zone events triggered by that candle.
+    """
+
+    def __init__(self, retest_window=RETEST_WINDOW):
+        self.retest_window = retest_window
+        self.candles = deque(maxlen=3)
+        self.volumes = deque(maxlen=VOLUME_MA_PERIOD)
+        self.candle_count = 0
+        self.ema50 = None
+        self.ema200 = None
+        self.atr = None
+        self.h1_ema50 = None
+        self.h1_bias = None
+        self.last_time = None
+        # Active zones as [fvg, first_retest_index, retested]
+        self.zones = []
+
+    def update_h1(self, close):
+        """Updates the H1 EMA50 bias with one closed H1 candle."""
+        self.h1_ema50 = _ewm_step(self.h1_ema50, close, 2. / 51.)
+        self.h1_bias = 'Bullish' if close > self.h1_ema50 else 'Bearish'
+
+    def update(self, time, open_, high, low, close, volume):
+        """Processes one closed M15 candle and returns the zone events it triggered."""
+        prev_close = self.candles[-1]['close'] if self.candles else None
+
+        # Rolling indicators
+        self.ema50 = _ewm_step(self.ema50, close, 2. / 51.)
+        self.ema200 = _ewm_step(self.ema200, close, 2. / 201.)
+        true_range = high - low
+        if prev_close is not None:
+            true_range = max(true_range, abs(high - prev_close), abs(low - prev_close))
+        self.atr = _ewm_step(self.atr, true_range, 1. / ATR_PERIOD)
+
+        self.volumes.append(volume)
+        volume_spike = False
+        if len(self.volumes) == VOLUME_MA_PERIOD:
+            volume_spike = volume > (sum(self.volumes) / VOLUME_MA_PERIOD) * VOLUME_SPIKE_MULTIPLIER
+
+        index = self.candle_count
+        self.candle_count += 1
+        self.last_time = time
+        self.candles.append({
+            'time': time, 'open': open_, 'high': high, 'low': low, 'close': close,
+            'atr': self.atr,
+            'session': get_session(time),
+            'ema50_dir': 'Above' if close > self.ema50 else 'Below',
+            'ema200_dir': 'Above' if close > self.ema200 else 'Below',
+            'bias_H1': self.h1_bias,
+            'volume_spike_at_fvg': volume_spike,
+        })
+
+        # Existing zones first: a new zone cannot be retested by its own creating candle
+        events = self._check_zones(index)
+
+        # Ensure there's enough data for ATR calculation to be stable
+        if len(self.candles) == 3 and index - 1 >= max(1, ATR_PERIOD):
+            fvg = self._detect_fvg()
+            if fvg is not None:
+                self.zones.append([fvg, index + 1, False])
+                events.append({'event': ZONE_CREATED, 'time': time, 'zone': fvg})
+        return events
+
+    def warm_up(self, m15_candles, h1_candles=()):
+        """
+        Replays history through the detector. Both inputs are iterables of
+        (time, open, high, low, close, volume) tuples in chronological order;
+        each H1 candle is applied before the first M15 candle at or after its
+        time. Returns the zones still active at the end of the history.
+        """
+        h1_candles = iter(h1_candles)
+        pending_h1 = next(h1_candles, None)
+        for candle in m15_candles:
+            while pending_h1 is not None and pending_h1[0] <= candle[0]:
+                self.update_h1(pending_h1[4])
+                pending_h1 = next(h1_candles, None)
+            self.update(*candle)
+        return self.active_zones()
+
+    def active_zones(self):
+        """Zones that were created and have not been invalidated yet."""
+        return [dict(fvg, retested=retested) for fvg, _, retested in self.zones]
+
+    def _detect_fvg(self):
+        prev_candle, curr_candle, next_candle = self.candles
+
+        if next_candle['low'] > prev_candle['high']:
+            fvg = {'FVG_Type': 'Bullish', 'fvg_bottom': prev_candle['high'], 'fvg_top': next_candle['low']}
+        elif prev_candle['low'] > next_candle['high']:
+            fvg = {'FVG_Type': 'Bearish', 'fvg_bottom': next_candle['high'], 'fvg_top': prev_candle['low']}
+        else:
+            return None
+
+        fvg['time_created'] = curr_candle['time']
+        fvg['fvg_size'] = fvg['fvg_top'] - fvg['fvg_bottom']
+        fvg['fvg_center'] = fvg['fvg_bottom'] + fvg['fvg_size'] / 2
+
+        # ATR Context
+        atr_at_creation = next_candle['atr']
+        fvg['fvg_size_vs_atr'] = fvg['fvg_size'] / atr_at_creation if atr_at_creation > 0 else 0
+
+        # Displacement Candle Analysis (using next candle)
+        body_size = abs(next_candle['close'] - next_candle['open'])
+        total_range = next_candle['high'] - next_candle['low']
+        fvg['creating_candle_body_size'] = body_size
+        fvg['creating_candle_body_ratio'] = body_size / total_range if total_range > 0 else 0
+
+        for col in ['volume_spike_at_fvg', 'session', 'ema50_dir', 'ema200_dir', 'bias_H1']:
+            fvg[col] = curr_candle[col]
+        return fvg
+
+    def _check_zones(self, index):
+        """Checks the active zones against the newest candle."""
+        candle = self.candles[-1]
+        events = []
+        still_active = []
+        for zone in self.zones:
+            fvg, first_index, retested = zone
+            is_bullish = fvg['FVG_Type'] == 'Bullish'
+
+            if not retested:
+                if is_bullish and candle['low'] <= fvg['fvg_top']:
+                    penetration = fvg['fvg_top'] - candle['low']
+                elif not is_bullish and candle['high'] >= fvg['fvg_bottom']:
+                    penetration = candle['high'] - fvg['fvg_bottom']
+                else:
+                    penetration = None
+                if penetration is not None:
+                    zone[2] = True
+                    events.append({'event': ZONE_RETESTED, 'time': candle['time'], 'zone': fvg,
+                                   'penetration_points': penetration})
+
+            broken = candle['close'] < fvg['fvg_bottom'] if is_bullish else candle['close'] > fvg['fvg_top']
+            if broken:
+                events.append({'event': ZONE_INVALIDATED, 'time': candle['time'], 'zone': fvg, 'reason': 'broken'})
+            elif index >= first_index + self.retest_window - 1:
+                events.append({'event': ZONE_INVALIDATED, 'time': candle['time'], 'zone': fvg, 'reason': 'expired'})
+            else:
+                still_active.append(zone)
+        self.zones = still_active
+        return events
@@ -9,22 +9,140 @@ import pandas as pd
 import numpy as np
 import lightgbm as lgb
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
 import joblib
 import os
+import sys
+import time
+import hashlib
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import get_registry
+from fvg_features import ENCODER_FILE, FVGFeatureEncoder, save_encoder
+from tree_predictor import compiled_path, export_model
+
+MODEL_PARAMS = {'objective': 'binary', 'is_unbalance': True, 'random_state': 42}
+TRAINING_CACHE_FILE = 'fvg_training_cache.joblib'  # Row hashes of the last fit, next to the model
+RETRAIN_CHANGE_THRESHOLD = 0.01  # Retrain when more than 1% of the labeled rows changed...
+RETRAIN_MAX_AGE_HOURS = 24  # ...or the last fit is older than this (daily deadline)
+VALIDATION_FRACTION = 0.1  # Last part of the training rows, held out for early stopping
+MIN_BOOSTING_ROUNDS = 20  # Fewer trees (early/time-limit stop) are never published
+
+
+def _row_hashes(X, y):
+    """One 64-bit hash per labeled row (features + target)"""
+    return pd.util.hash_pandas_object(X.assign(is_strong=y), index=False).to_numpy()
+
+
+def _changed_rows(old_hashes, new_hashes):
+    """Rows that differ position by position, plus rows added or removed"""
+    common = min(len(old_hashes), len(new_hashes))
+    return int((old_hashes[:common] != new_hashes[:common]).sum()) + abs(len(new_hashes) - len(old_hashes))
+
+
+def load_training_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        return joblib.load(cache_path)
+    except Exception as e:
+        print(f"⚠️ Could not load training cache ({e}).")
+        return None
+
+
+def save_training_cache(cache_path, cache):
+    temp_path = cache_path + '.tmp'
+    joblib.dump(cache, temp_path)
+    os.replace(temp_path, cache_path)
+
+
+def _fit_config(encoder, early_stopping_rounds=None):
+    """Hyperparameters and feature definitions of a fit"""
+    config = (MODEL_PARAMS, encoder.spec)
+    if early_stopping_rounds:
+        config += (('early_stopping_rounds', early_stopping_rounds),)
+    return repr(config)
+
+
+def _time_limit(seconds, min_rounds=MIN_BOOSTING_ROUNDS):
+    """
+    LightGBM callback that stops boosting after `seconds`, but not before
+    `min_rounds` trees; the trees built so far are kept
+    """
+    deadline = time.monotonic() + seconds
+
+    def _callback(env):
+        if env.iteration + 1 >= min_rounds and time.monotonic() > deadline:
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list or [])
+    _callback.order = 40
+    return _callback
+
+
+def _unseen_auc(model, X_test, y_test):
+    """ROC AUC on the unseen test rows, None when they hold a single class"""
+    if y_test.nunique() < 2:
+        return None
+    return float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
 
-def train_model():
+
+def publish_rejection(iterations, test_auc, current_metadata):
+    """Why a fitted model must not replace the current one, or None when it can be published"""
+    if iterations < MIN_BOOSTING_ROUNDS:
+        return f"only {iterations} trees (minimum {MIN_BOOSTING_ROUNDS})"
+    current_auc = (current_metadata or {}).get('test_auc')
+    if current_auc is not None and test_auc is not None and test_auc <= current_auc:
+        return f"test AUC {test_auc:.4f} does not beat the current version's {current_auc:.4f}"
+    return None
+
+
+def retrain_reason(cache, digest, row_hashes, model_path, fit_config):
+    """Why the model must be refit, or None when the last fit can be kept"""
+    if cache is None or not os.path.exists(model_path):
+        return "no previous fit"
+    if cache['digest'] == digest:
+        changed = 0
+    elif cache['params'] != fit_config:
+        return "hyperparameters or features changed"
+    else:
+        changed = _changed_rows(cache['row_hashes'], row_hashes)
+    if changed > RETRAIN_CHANGE_THRESHOLD * len(row_hashes):
+        return f"{changed} of {len(row_hashes)} labeled rows changed"
+    if datetime.now() - cache['trained_at'] >= timedelta(hours=RETRAIN_MAX_AGE_HOURS):
+        return f"last fit is older than {RETRAIN_MAX_AGE_HOURS}h"
+    return None
+
+
+def train_model(csv_path=None, save_dir=None, force=False, n_jobs=None, time_limit=None,
+                early_stopping_rounds=None):
+    """
+    Trains the FVG classifier on the analysis CSV. Unless `force` is set, the
+    fit is skipped when the labeled rows are (nearly) the ones of the previous
+    fit, see retrain_reason(). Returns a summary dict with 'trained',
+    'reason' and 'skipped_fits' (skips since the last fit).
+
+    A fit is only published when it has at least MIN_BOOSTING_ROUNDS trees
+    and its AUC on the unseen test rows beats the current registry version;
+    otherwise the result has reason 'rejected' and the 'rejection' message.
+
+    `n_jobs` caps LightGBM's threads, `time_limit` (seconds) stops boosting
+    early, and `early_stopping_rounds` stops on the last VALIDATION_FRACTION
+    of the chronological training rows (the test rows stay unseen).
+    """
     # Load the data
-    # Ensure we are in the right directory or use absolute path if needed
-    # Assuming script is run from its location or paths are relative to it
-    csv_path = 'fvg_analysis_XAUUSD_M15_4H.csv'
-    if not os.path.exists(csv_path):
-        # Try looking in the same directory as this script if running from elsewhere
-        csv_path = os.path.join(os.path.dirname(__file__), 'fvg_analysis_XAUUSD_M15_4H.csv')
+    # Callers can pass explicit paths; otherwise paths are relative to the
+    # current directory, then to this script's directory
+    if csv_path is None:
+        csv_path = 'fvg_analysis_XAUUSD_M15_4H.csv'
+        if not os.path.exists(csv_path):
+            # Try looking in the same directory as this script if running from elsewhere
+            csv_path = os.path.join(os.path.dirname(__file__), 'fvg_analysis_XAUUSD_M15_4H.csv')
     
     if not os.path.exists(csv_path):
         print(f"❌ Error: {csv_path} not found.")
-        return
+        return None
 
     df = pd.read_csv(csv_path)
 
@@ -33,47 +151,83 @@ def train_model():
     # 1. Target Variable
     df['is_strong'] = (df['label'] == 'Strong').astype(int)
 
-    # 2. Handle Categorical Features that the backtester can create
-    categorical_features = ['FVG_Type', 'session', 'bias_H1']
-    df = pd.get_dummies(df, columns=categorical_features, drop_first=True)
-
-    # 3. Define features (X) and target (y) to match backtest_strategy.py
-    # This list MUST match the one in the 'prepare_features' function of the backtester
-    features_to_use = [
-        'fvg_size',
-        'volume_spike_at_fvg',
-        'FVG_Type_Bullish',
-        'session_London',
-        'session_New York',
-        'session_Other',
-        'bias_H1_Bullish',
-        'bias_H1_Neutral'
-    ]
-
-    # Ensure all expected columns exist in the dataframe, add if not
-    for col in features_to_use:
-        if col not in df.columns:
-            df[col] = 0 # Add missing feature column, fill with 0
-
-    X = df[features_to_use]
+    # 2-3. Features (X) and target (y), encoded by the encoder shared with every scorer
+    # (it is saved with the model, so inference uses exactly these features)
+    encoder = FVGFeatureEncoder().fit(df)
+    X = pd.DataFrame(encoder.transform(df), columns=encoder.feature_names)
     y = df['is_strong']
 
+    # --- Skip the fit when the training set has not changed ---
+    model_path = 'fvg_strong_classifier.joblib'
+    save_dir = save_dir or os.path.dirname(__file__)
+    model_full_path = os.path.join(save_dir, model_path)
+    cache_path = os.path.join(save_dir, TRAINING_CACHE_FILE)
+    cache = load_training_cache(cache_path)
+
+    row_hashes = _row_hashes(X, y)
+    fit_config = _fit_config(encoder, early_stopping_rounds)
+    digest = hashlib.sha256(row_hashes.tobytes() + fit_config.encode()).hexdigest()
+    reason = "forced" if force else retrain_reason(cache, digest, row_hashes, model_full_path, fit_config)
+    skipped_fits = cache.get('skipped_fits', 0) if cache else 0
+
+    if reason is None:
+        skipped_fits += 1
+        save_training_cache(cache_path, dict(cache, skipped_fits=skipped_fits))
+        age_hours = (datetime.now() - cache['trained_at']).total_seconds() / 3600
+        print(f"⏭️ Skipping fit: {_changed_rows(cache['row_hashes'], row_hashes)} of {len(row_hashes)} labeled rows "
+              f"changed (threshold {RETRAIN_CHANGE_THRESHOLD:.0%}), last fit {age_hours:.1f}h ago "
+              f"- {skipped_fits} fits skipped since")
+        return {'trained': False, 'reason': 'unchanged', 'skipped_fits': skipped_fits}
+    print(f"🔄 Retraining: {reason} ({skipped_fits} fits skipped since the last one)")
+
     # Split data chronologically
     split_index = int(len(df) * 0.8)
     X_train, X_test = X.iloc[:split_index], X.iloc[split_index:]
     y_train, y_test = y.iloc[:split_index], y.iloc[split_index:]
 
     # --- Model Training ---
-    lgbm = lgb.LGBMClassifier(objective='binary', is_unbalance=True, random_state=42)
+    lgbm = lgb.LGBMClassifier(**MODEL_PARAMS, **({'n_jobs': n_jobs} if n_jobs else {}))
+    fit_kwargs = {'callbacks': []}
+    if early_stopping_rounds:
+        valid_index = int(split_index * (1 - VALIDATION_FRACTION))
+        fit_kwargs['eval_set'] = [(X_train.iloc[valid_index:], y_train.iloc[valid_index:])]
+        # AUC: with is_unbalance the (unweighted) validation logloss worsens from the first tree on
+        fit_kwargs['eval_metric'] = 'auc'
+        fit_kwargs['callbacks'].append(lgb.early_stopping(early_stopping_rounds, first_metric_only=True, verbose=False))
+        X_train, y_train = X_train.iloc[:valid_index], y_train.iloc[:valid_index]
+    if time_limit:
+        fit_kwargs['callbacks'].append(_time_limit(time_limit))
 
     print("Training the harmonized model...")
-    lgbm.fit(X_train, y_train)
+    started = time.monotonic()
+    lgbm.fit(X_train, y_train, **fit_kwargs)
+    iterations = lgbm.best_iteration_ or lgbm.n_estimators
+    print(f"Trained {iterations} trees in {time.monotonic() - started:.1f}s")
+    encoder.check_model(lgbm)
 
     # --- Evaluation ---
     print("\n--- Model Evaluation on Unseen Data ---")
     y_pred = lgbm.predict(X_test)
+    test_auc = _unseen_auc(lgbm, X_test, y_test)
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred, target_names=['Not Strong', 'Strong']))
+    if test_auc is not None:
+        print(f"ROC AUC: {test_auc:.4f}")
+
+    # --- Publish gate: a degenerate or weaker fit keeps the current model ---
+    registry = get_registry(os.path.join(save_dir, 'models'), legacy_path=model_full_path)
+    current = registry.manifest()
+    rejection = publish_rejection(iterations, test_auc, current and current.get('metadata'))
+    if rejection:
+        print(f"\n⚠️ Not publishing the new model: {rejection}. "
+              f"Keeping version {registry.current_version() or 0}.")
+        # Recorded as a fit, so the same rows are not refit until they change or age out
+        save_training_cache(cache_path, {
+            'digest': digest, 'params': fit_config, 'row_hashes': row_hashes,
+            'trained_at': datetime.now(), 'skipped_fits': 0,
+        })
+        return {'trained': False, 'reason': 'rejected', 'rejection': rejection, 'skipped_fits': skipped_fits,
+                'iterations': iterations}
 
     # --- Feature Importance ---
     feature_importance = pd.DataFrame({'feature': X.columns, 'importance': lgbm.feature_importances_}).sort_values('importance', ascending=False)
@@ -81,21 +235,36 @@ def train_model():
     print(feature_importance)
 
     # --- Save the final model and reports ---
-    model_path = 'fvg_strong_classifier.joblib'
     # Save in the same dir as the script if possible, or current dir
     # If running from main_loop, we might want to save in TestAllModels/detect_FVG
     # But let's stick to relative path or absolute based on script location
-    save_dir = os.path.dirname(__file__)
-    model_full_path = os.path.join(save_dir, model_path)
-    
-    print(f"\nSaving the trained model to '{model_full_path}'...")
-    joblib.dump(lgbm, model_full_path)
+    version = registry.publish(lgbm, metadata={'rows': len(df), 'reason': reason, 'digest': digest,
+                                               'iterations': iterations, 'test_auc': test_auc},
+                               artifacts={'encoder': encoder})
+    print(f"\nPublished the trained model as version {version} in '{registry.model_dir}'")
+
+    # Flat copy for the backtest scripts, replaced atomically
+    print(f"Saving the trained model to '{model_full_path}'...")
+    joblib.dump(lgbm, model_full_path + '.tmp')
+    os.replace(model_full_path + '.tmp', model_full_path)
+    save_encoder(encoder, os.path.join(save_dir, ENCODER_FILE))
+    # Compiled NumPy copy for processes that only score (no lightgbm import), see tree_predictor.py
+    export_model(lgbm, compiled_path(model_full_path))
     
     report_path = os.path.join(save_dir, 'feature_importance.txt')
     with open(report_path, 'w') as f:
         f.write(feature_importance.to_string())
+        f.write(f"\n\nTrained: {datetime.now():%Y-%m-%d %H:%M:%S} ({reason}), model version {version}")
+        f.write(f"\nFits skipped since the previous training: {skipped_fits}")
+
+    save_training_cache(cache_path, {
+        'digest': digest, 'params': fit_config, 'row_hashes': row_hashes,
+        'trained_at': datetime.now(), 'skipped_fits': 0,
+    })
 
     print("\nProcess complete.")
+    return {'trained': True, 'reason': reason, 'skipped_fits': skipped_fits, 'version': version,
+            'iterations': iterations}
 
 if __name__ == "__main__":
-    train_model()
+    train_model(force=True)
@@ -0,0 +1,152 @@
+'''
+Background training of the FVG classifier.
+
+TrainingWorker runs training jobs (training-set refresh + train_model) in a
+separate process, so no thread waits on LightGBM and no MT5 lock is held
+while it trains. The data fetching that needs MT5 stays with the caller;
+a job only reads the candle files and the analysis CSV.
+
+- One job at a time: submit() returns False while a job is still running.
+- `threads` caps LightGBM's threads (and OpenMP/BLAS in the worker).
+- `time_limit` stops boosting after that many seconds (the trees built so
+  far are kept, never fewer than MIN_BOOSTING_ROUNDS); the worker is
+  terminated if it runs TERMINATE_GRACE seconds past the limit.
+- `early_stopping_rounds` stops on a held-out chronological slice.
+
+The trained model is published to the model registry, so consumers keep
+using the last published version until the new one is ready. A fit that
+fails the publish gate (train_fvg_classifier.publish_rejection) is reported
+with reason 'rejected' and never replaces it.
+'''
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_THREADS = 2
+DEFAULT_TIME_LIMIT = 600  # Seconds of boosting per job
+DEFAULT_EARLY_STOPPING_ROUNDS = 20
+TERMINATE_GRACE = 300  # Seconds past the time limit (data prep, publishing) before the worker is killed
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS')
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def run_training_job(job, threads=DEFAULT_THREADS, time_limit=DEFAULT_TIME_LIMIT,
+                     early_stopping_rounds=DEFAULT_EARLY_STOPPING_ROUNDS):
+    """
+    Brings the full-history analysis up to date and trains the classifier.
+    `job` holds the files: symbol, candle_file, bias_file, analysis_csv,
+    state_file and save_dir (see FVGTradingSystem.training_job()).
+    """
+    import fvg_analyzer
+    import train_fvg_classifier
+
+    fvg_analyzer.main(
+        incremental=True,
+        symbol=job['symbol'],
+        candle_file=job['candle_file'],
+        bias_file=job['bias_file'],
+        output_file=job['analysis_csv'],
+        state_file=job['state_file']
+    )
+    return train_fvg_classifier.train_model(
+        csv_path=job['analysis_csv'], save_dir=job['save_dir'], n_jobs=threads,
+        time_limit=time_limit, early_stopping_rounds=early_stopping_rounds
+    )
+
+
+def _worker_main(job, threads, time_limit, early_stopping_rounds, results):
+    # Before lightgbm/numpy are imported in this process
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        results.put(('ok', run_training_job(job, threads, time_limit, early_stopping_rounds)))
+    except Exception as e:
+        results.put(('error', f"{type(e).__name__}: {e}"))
+
+
+class TrainingWorker:
+    def __init__(self, threads=DEFAULT_THREADS, time_limit=DEFAULT_TIME_LIMIT,
+                 early_stopping_rounds=DEFAULT_EARLY_STOPPING_ROUNDS):
+        self.threads = threads
+        self.time_limit = time_limit
+        self.early_stopping_rounds = early_stopping_rounds
+        # spawn: the worker does not inherit the parent's threads, locks or MT5 session
+        self._context = multiprocessing.get_context('spawn')
+        self._lock = threading.Lock()
+        self._process = None
+        self._results = None
+        self._started = None
+        self.last_result = None
+
+    def busy(self):
+        with self._lock:
+            return self._process is not None and self._process.is_alive()
+
+    def submit(self, job):
+        """Starts a training job; False when one is still running"""
+        with self._lock:
+            if self._process is not None:
+                if self._process.is_alive():
+                    return False
+                self._collect()
+            self._results = self._context.Queue()
+            self._process = self._context.Process(
+                target=_worker_main,
+                args=(job, self.threads, self.time_limit, self.early_stopping_rounds, self._results),
+                name='fvg-training', daemon=True
+            )
+            self._process.start()
+            self._started = time.monotonic()
+            return True
+
+    def poll(self):
+        """
+        The finished job's outcome as ('ok', train_model() summary) or
+        ('error', message), once; None while it runs or when there is none.
+        Kills a job that overran its time limit.
+        """
+        with self._lock:
+            if self._process is None:
+                return None
+            if self._process.is_alive():
+                if self.time_limit and time.monotonic() - self._started > self.time_limit + TERMINATE_GRACE:
+                    self._process.terminate()
+                    self._process.join(5)
+                    self._process = None
+                    self.last_result = ('error', f"training exceeded {self.time_limit + TERMINATE_GRACE}s and was stopped")
+                    return self.last_result
+                return None
+            return self._collect()
+
+    def _collect(self):
+        try:
+            self.last_result = self._results.get(timeout=1)
+        except Exception:
+            self.last_result = ('error', f"training process exited with code {self._process.exitcode}")
+        self._process.join()
+        self._process = None
+        return self.last_result
+
+    def shutdown(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._process.terminate()
+                self._process.join(5)
+            self._process = None
+
+
+def get_training_worker(threads=DEFAULT_THREADS, time_limit=DEFAULT_TIME_LIMIT,
+                        early_stopping_rounds=DEFAULT_EARLY_STOPPING_ROUNDS):
+    """Process-wide worker, so every updater shares one training process"""
+    key = (threads, time_limit, early_stopping_rounds)
+    with _workers_lock:
+        if key not in _workers:
+            _workers[key] = TrainingWorker(threads, time_limit, early_stopping_rounds)
+        return _workers[key]
@@ -0,0 +1,155 @@
+'''
+Walk-forward evaluation of the FVG classifier.
+
+The analysis rows (chronological) are split into FOLDS + 1 blocks; fold i
+tests on block i + 1 and trains on
+- expanding: every row before it
+- rolling:   the `window` rows just before it (one block by default)
+
+Features are encoded once (FVGFeatureEncoder, as in train_fvg_classifier)
+and written to .npy files that every worker opens memory-mapped, so a fold
+only receives its row range instead of a pickled copy of the data. Folds
+(of every parameter set) are trained in parallel in a process pool, each
+fit capped at cpu_count // workers threads.
+
+Reports precision/recall of the "Strong" class per fold, the mean per
+parameter set, and the total wall time.
+
+Usage:
+    python walk_forward.py [ANALYSIS_CSV] [FOLDS] [expanding|rolling] [WORKERS] [PARAMS_JSON]
+
+PARAMS_JSON is a list of LightGBM parameter overrides, one per candidate,
+e.g. '[{"num_leaves": 15}, {"num_leaves": 63, "learning_rate": 0.05}]'.
+'''
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fvg_features import FVGFeatureEncoder
+from train_fvg_classifier import MODEL_PARAMS
+
+DEFAULT_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fvg_analysis_XAUUSD_M15_4H.csv')
+DEFAULT_FOLDS = 5
+MODES = ('expanding', 'rolling')
+
+
+def make_folds(n_rows, folds=DEFAULT_FOLDS, mode='expanding', window=None):
+    """[(train_start, train_end, test_start, test_end)] row ranges, in time order"""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got '{mode}'")
+    block = n_rows // (folds + 1)
+    if block == 0:
+        raise ValueError(f"{n_rows} rows are too few for {folds} folds")
+    window = window or block
+    ranges = []
+    for i in range(folds):
+        test_start = (i + 1) * block
+        test_end = n_rows if i == folds - 1 else test_start + block
+        train_start = 0 if mode == 'expanding' else max(0, test_start - window)
+        ranges.append((train_start, test_start, test_start, test_end))
+    return ranges
+
+
+def _fit_fold(x_path, y_path, fold, ranges, params, n_jobs):
+    """Trains one fold on its memory-mapped row range (runs in a worker process)"""
+    import lightgbm as lgb
+    from sklearn.metrics import precision_score, recall_score
+
+    X = np.load(x_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+    train_start, train_end, test_start, test_end = ranges
+    started = time.perf_counter()
+    model = lgb.LGBMClassifier(**{**MODEL_PARAMS, 'verbose': -1, **params, 'n_jobs': n_jobs})
+    model.fit(X[train_start:train_end], y[train_start:train_end])
+    fit_seconds = time.perf_counter() - started
+
+    y_test = np.asarray(y[test_start:test_end])
+    y_pred = model.predict(X[test_start:test_end])
+    return {
+        'fold': fold,
+        'train_rows': train_end - train_start,
+        'test_rows': test_end - test_start,
+        'precision_strong': precision_score(y_test, y_pred, pos_label=1, zero_division=0),
+        'recall_strong': recall_score(y_test, y_pred, pos_label=1, zero_division=0),
+        'fit_seconds': fit_seconds,
+    }
+
+
+def walk_forward(csv_path=DEFAULT_CSV, folds=DEFAULT_FOLDS, mode='expanding', workers=None,
+                 param_sets=None, window=None):
+    """
+    Trains every (parameter set, fold) pair in a process pool. Returns
+    (per-fold results DataFrame, wall time in seconds).
+    """
+    started = time.perf_counter()
+    df = pd.read_csv(csv_path)
+    if 'time_created' in df.columns:
+        df = df.sort_values('time_created', kind='stable').reset_index(drop=True)
+    encoder = FVGFeatureEncoder().fit(df)
+    X = encoder.transform(df)
+    y = (df['label'] == 'Strong').to_numpy(dtype=np.int8)
+
+    ranges = make_folds(len(df), folds, mode, window)
+    param_sets = param_sets or [{}]
+    workers = workers or min(os.cpu_count() or 1, len(ranges) * len(param_sets))
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+
+    shared_dir = tempfile.mkdtemp(prefix='fvg_walk_forward_')
+    try:
+        x_path, y_path = os.path.join(shared_dir, 'X.npy'), os.path.join(shared_dir, 'y.npy')
+        np.save(x_path, X)
+        np.save(y_path, y)
+
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for set_index, params in enumerate(param_sets):
+                for fold, fold_ranges in enumerate(ranges):
+                    future = executor.submit(_fit_fold, x_path, y_path, fold, fold_ranges, params, n_jobs)
+                    futures[future] = (set_index, fold_ranges)
+            for future in as_completed(futures):
+                set_index, (_, _, test_start, test_end) = futures[future]
+                result = future.result()
+                result['param_set'] = set_index
+                if 'time_created' in df.columns:
+                    result['test_from'] = df['time_created'].iloc[test_start]
+                    result['test_to'] = df['time_created'].iloc[test_end - 1]
+                results.append(result)
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+    results = pd.DataFrame(results).sort_values(['param_set', 'fold']).reset_index(drop=True)
+    return results, time.perf_counter() - started
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    folds = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_FOLDS
+    mode = sys.argv[3] if len(sys.argv) > 3 else 'expanding'
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    param_sets = json.loads(sys.argv[5]) if len(sys.argv) > 5 else [{}]
+
+    results, wall_seconds = walk_forward(csv_path, folds, mode, workers, param_sets)
+
+    print(f"\nWalk-forward ({mode}, {folds} folds) on {csv_path}")
+    for set_index, params in enumerate(param_sets):
+        fold_results = results[results['param_set'] == set_index]
+        print(f"\n--- Parameter set {set_index}: {params or 'MODEL_PARAMS'} ---")
+        print(fold_results.drop(columns='param_set').to_string(index=False, float_format=lambda v: f'{v:.3f}'))
+        print(f"Mean: precision {fold_results['precision_strong'].mean():.3f}, "
+              f"recall {fold_results['recall_strong'].mean():.3f}")
+    print(f"\nTotal wall time: {wall_seconds:.1f}s (sum of fits: {results['fit_seconds'].sum():.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
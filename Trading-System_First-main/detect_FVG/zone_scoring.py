@@ -0,0 +1,58 @@
+'''
+Batched FVG zone scoring with the Strong classifier.
+
+All candidate zones are encoded into one feature matrix in the booster's
+feature order (FVGFeatureEncoder, saved with the model) and scored with a
+single predict_proba() call, so the same code serves the live zone refresh
+(a handful of zones) and offline analysis of a whole analysis CSV.
+
+Usage (offline):
+    python zone_scoring.py <FVG_ANALYSIS_CSV> [OUTPUT_CSV]
+'''
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fvg_features import FVGFeatureEncoder
+from model_registry import get_registry
+
+DEFAULT_SCORE = 50  # Used when no model is available
+
+
+def score_fvgs(model, fvgs, encoder=None):
+    """
+    Strong-probability scores (0-100) for every FVG, with one predict_proba()
+    call. `fvgs` is a DataFrame, structured array or list of FVG dicts;
+    `encoder` is the one saved with the model (default feature set otherwise).
+    """
+    count = len(fvgs)
+    if model is None or count == 0:
+        return np.full(count, DEFAULT_SCORE, dtype=int)
+    return (model.predict_proba((encoder or FVGFeatureEncoder()).transform(fvgs))[:, 1] * 100).astype(int)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    registry = get_registry(os.path.join(script_dir, 'models'),
+                            legacy_path=os.path.join(script_dir, 'fvg_strong_classifier.joblib'))
+    model, artifacts, version = registry.load_with_artifacts()
+    fvgs = pd.read_csv(sys.argv[1])
+    fvgs['score'] = score_fvgs(model, fvgs, artifacts.get('encoder'))
+    print(f"Scored {len(fvgs)} FVGs with model version {version}")
+    print(fvgs['score'].describe().to_string())
+    if len(sys.argv) > 2:
+        fvgs.to_csv(sys.argv[2], index=False)
+        print(f"✅ Saved scores to {sys.argv[2]}")
+
+
+if __name__ == '__main__':
+    main()
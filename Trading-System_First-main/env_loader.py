@@ -48,6 +48,18 @@ class Config:
     REALTIME_CHECK_SECONDS = int(os.getenv('REALTIME_CHECK_SECONDS', '1'))
     NEWS_WINDOW_MINUTES = int(os.getenv('NEWS_WINDOW_MINUTES', '30'))
 
+    # FVG zones
+    ENABLE_STREAMING_FVG = os.getenv('ENABLE_STREAMING_FVG', 'false').lower() == 'true'
+    STREAM_WARMUP_CANDLES = int(os.getenv('STREAM_WARMUP_CANDLES', '1000'))
+    # Multi-symbol analysis: comma-separated MT5 symbols, analysed in a process pool (0 workers = one per CPU)
+    FVG_SYMBOLS = [s.strip() for s in os.getenv('FVG_SYMBOLS', '').split(',') if s.strip()]
+    FVG_TIMEFRAMES = [t.strip() for t in os.getenv('FVG_TIMEFRAMES', 'M15,H1').split(',') if t.strip()]
+    FVG_WORKERS = int(os.getenv('FVG_WORKERS', '0'))
+    # Background classifier training: LightGBM threads, boosting time limit (seconds), early-stopping patience
+    FVG_TRAIN_THREADS = int(os.getenv('FVG_TRAIN_THREADS', '2'))
+    FVG_TRAIN_TIME_LIMIT_SECONDS = int(os.getenv('FVG_TRAIN_TIME_LIMIT_SECONDS', '600'))
+    FVG_TRAIN_EARLY_STOPPING_ROUNDS = int(os.getenv('FVG_TRAIN_EARLY_STOPPING_ROUNDS', '20'))
+
     
     @classmethod
     def validate_advanced(cls):
@@ -6,10 +6,56 @@ import joblib
 import os
 from datetime import datetime, timedelta
 import warnings
-from tensorflow import keras
+
+from indicator_engine import MODEL_FEATURES, IndicatorEngine
+from model_cache import load_keras_model, load_scaler
 
 warnings.filterwarnings('ignore')
 
+# أعمدة التطبيع لكل نموذج (MinMax / Standard)
+NORMALIZATION_CONFIG = {
+    'momentum': {
+        'minmax_cols': ['rsi', 'stoch_k', 'stoch_d', 'mfi', 'williams_r'],
+        'standard_cols': ['volume', 'cci']
+    },
+    'support_resistance': {
+        'minmax_cols': [],
+        'standard_cols': ['close', 'r1', 'r2', 'r3', 'sma_20', 'donchian_middle', 's1', 's2', 's3', 'volume']
+    },
+    'trend': {
+        'minmax_cols': [],
+        'standard_cols': ['close', 'macd_histogram', 'plus_di', 'minus_di', 'macd', 'sma_200', 'sma_50',
+                          'volume']
+    },
+    'volatility': {
+        'minmax_cols': [],
+        'standard_cols': ['close', 'kc_upper', 'atr', 'kc_lower', 'bb_squeeze', 'bb_width', 'bb_middle',
+                          'volume']
+    },
+    'volume': {
+        'minmax_cols': [],
+        'standard_cols': ['close', 'vwap', 'volume_roc', 'cmf', 'ad_line_change', 'volume']
+    },
+    'impulse': {
+        'minmax_cols': [],
+        'standard_cols': ['open', 'high', 'low', 'close', 'volume',
+                          'Stoch_K', 'Stoch_D', 'RSI',
+                          'MA_Fast_Blue', 'MA_Slow_Red',
+                          'MFI', 'OBV', 'ADX', 'Plus_DI', 'Minus_DI',
+                          'ATR', 'BB_Upper', 'BB_Middle', 'BB_Lower', 'Trend_Slope']
+    },
+    'unified': {
+        'minmax_cols': [],
+        'standard_cols': ['open', 'high', 'low', 'close', 'volume', 'rsi', 'mfi', 'cci', 'sma_20',
+                          'sma_50', 'sma_200', 'macd', 'macd_histogram', 'adx', 'plus_di', 'minus_di',
+                          'atr', 'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'vwap', 'cmf',
+                          'volume_roc', 'pivot', 'r1', 's1', 'donchian_upper', 'donchian_lower',
+                          'donchian_middle']
+    }
+}
+
+_normalization_plans = {}  # (scalers_dir, model, columns) -> (scalers, plan), see normalize_data
+
 
 class MarketPredictionSystem:
     def __init__(self, symbol='XAUUSD', models_dir='models', scalers_dir='scalers'):
@@ -29,6 +75,8 @@ class MarketPredictionSystem:
         self.models_dir = models_dir
         self.scalers_dir = scalers_dir
         self.df = None
+        self._indicator_engine = None  # مؤشرات self.df المحسوبة، انظر indicator_engine()
+        self._indicator_engine_df = None
         self.mt5_initialized = False
 
         # تعريف أوزان النماذج (يمكن تعديلها حسب الأداء)
@@ -167,400 +215,200 @@ class MarketPredictionSystem:
             print("✅ تم إغلاق الاتصال بـ MetaTrader 5")
             self.mt5_initialized = False
 
+    def indicator_engine(self):
+        """محرك المؤشرات لبيانات self.df الحالية - كل مؤشر يُحسب مرة واحدة ويُشارك بين النماذج"""
+        if self._indicator_engine is None or self._indicator_engine_df is not self.df:
+            self._indicator_engine = IndicatorEngine(self.df, rows=1)
+            self._indicator_engine_df = self.df
+        return self._indicator_engine
+
     def calculate_momentum_indicators(self):
         """حساب مؤشرات الزخم"""
-        df = self.df.copy()
-
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-
-        # Stochastic
-        low_14 = df['low'].rolling(window=14).min()
-        high_14 = df['high'].rolling(window=14).max()
-        df['stoch_k'] = 100 * ((df['close'] - low_14) / (high_14 - low_14))
-        df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
-
-        # CCI
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        sma_tp = tp.rolling(window=20).mean()
-        mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
-        df['cci'] = (tp - sma_tp) / (0.015 * mad)
-
-        # MFI
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        mf = tp * df['volume']
-        mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
-        mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
-        df['mfi'] = 100 - (100 / (1 + mf_pos / mf_neg))
-
-        # Williams %R
-        df['williams_r'] = -100 * ((high_14 - df['close']) / (high_14 - low_14))
-
-        return df[['volume', 'rsi', 'stoch_k', 'stoch_d', 'cci', 'mfi', 'williams_r']].iloc[-1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['momentum'])
 
     def calculate_support_resistance_indicators(self):
         """حساب مؤشرات الدعم والمقاومة"""
-        df = self.df.copy()
-
-        # Pivot Points
-        df['pivot'] = (df['high'] + df['low'] + df['close']) / 3
-        df['r1'] = 2 * df['pivot'] - df['low']
-        df['r2'] = df['pivot'] + (df['high'] - df['low'])
-        df['r3'] = df['high'] + 2 * (df['pivot'] - df['low'])
-        df['s1'] = 2 * df['pivot'] - df['high']
-        df['s2'] = df['pivot'] - (df['high'] - df['low'])
-        df['s3'] = df['low'] - 2 * (df['high'] - df['pivot'])
-
-        # SMA
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-
-        # Donchian Channel
-        df['donchian_upper'] = df['high'].rolling(window=20).max()
-        df['donchian_lower'] = df['low'].rolling(window=20).min()
-        df['donchian_middle'] = (df['donchian_upper'] + df['donchian_lower']) / 2
-
-        return df[['close', 'r1', 'r2', 'r3', 'sma_20', 'donchian_middle', 's1', 's2', 's3', 'volume']].iloc[-1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['support_resistance'])
 
     def calculate_trend_indicators(self):
         """حساب مؤشرات الاتجاه"""
-        df = self.df.copy()
-
-        # MACD
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
-
-        # ADX and DI
-        high_diff = df['high'].diff()
-        low_diff = -df['low'].diff()
-
-        plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
-        minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
-
-        tr1 = df['high'] - df['low']
-        tr2 = abs(df['high'] - df['close'].shift(1))
-        tr3 = abs(df['low'] - df['close'].shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-        atr = tr.rolling(window=14).mean()
-        df['plus_di'] = 100 * (plus_dm.rolling(window=14).mean() / atr)
-        df['minus_di'] = 100 * (minus_dm.rolling(window=14).mean() / atr)
-
-        # SMAs
-        df['sma_50'] = df['close'].rolling(window=50).mean()
-        df['sma_200'] = df['close'].rolling(window=200).mean()
-
-        return df[['close', 'macd_histogram', 'plus_di', 'minus_di', 'macd', 'sma_200', 'sma_50', 'volume']].iloc[
-               -1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['trend'])
 
     def calculate_volatility_indicators(self):
         """حساب مؤشرات التقلب"""
-        df = self.df.copy()
-
-        # ATR
-        tr1 = df['high'] - df['low']
-        tr2 = abs(df['high'] - df['close'].shift(1))
-        tr3 = abs(df['low'] - df['close'].shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        df['atr'] = tr.rolling(window=14).mean()
-
-        # Bollinger Bands
-        df['bb_middle'] = df['close'].rolling(window=20).mean()
-        bb_std = df['close'].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-        df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-        df['bb_width'] = df['bb_upper'] - df['bb_lower']
-
-        # Keltner Channels
-        df['kc_middle'] = df['close'].ewm(span=20, adjust=False).mean()
-        df['kc_upper'] = df['kc_middle'] + (df['atr'] * 2)
-        df['kc_lower'] = df['kc_middle'] - (df['atr'] * 2)
-
-        # BB Squeeze
-        df['bb_squeeze'] = ((df['bb_upper'] - df['bb_lower']) < (df['kc_upper'] - df['kc_lower'])).astype(int)
-
-        return df[['close', 'kc_upper', 'atr', 'kc_lower', 'bb_squeeze', 'bb_width', 'bb_middle', 'volume']].iloc[
-               -1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['volatility'])
 
     def calculate_volume_indicators(self):
         """حساب مؤشرات الحجم"""
-        df = self.df.copy()
-
-        # VWAP
-        df['vwap'] = (df['volume'] * (df['high'] + df['low'] + df['close']) / 3).cumsum() / df['volume'].cumsum()
-
-        # Volume ROC
-        df['volume_roc'] = df['volume'].pct_change(periods=14) * 100
-
-        # CMF (Chaikin Money Flow)
-        mf_multiplier = ((df['close'] - df['low']) - (df['high'] - df['close'])) / (df['high'] - df['low'])
-        mf_volume = mf_multiplier * df['volume']
-        df['cmf'] = mf_volume.rolling(window=20).sum() / df['volume'].rolling(window=20).sum()
-
-        # A/D Line Change
-        df['ad_line'] = (mf_multiplier * df['volume']).cumsum()
-        df['ad_line_change'] = df['ad_line'].diff()
-
-        return df[['close', 'vwap', 'volume_roc', 'cmf', 'ad_line_change', 'volume']].iloc[-1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['volume'])
 
     def calculate_impulse_indicators(self):
         """حساب مؤشرات Impulse"""
-        df = self.df.copy()
-
-        # Stochastic
-        low_14 = df['low'].rolling(window=14).min()
-        high_14 = df['high'].rolling(window=14).max()
-        df['Stoch_K'] = 100 * ((df['close'] - low_14) / (high_14 - low_14))
-        df['Stoch_D'] = df['Stoch_K'].rolling(window=3).mean()
-
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        # Moving Averages
-        df['MA_Fast_Blue'] = df['close'].ewm(span=12, adjust=False).mean()
-        df['MA_Slow_Red'] = df['close'].ewm(span=26, adjust=False).mean()
-
-        # MFI (Money Flow Index)
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        mf = tp * df['volume']
-        mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
-        mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
-        df['MFI'] = 100 - (100 / (1 + mf_pos / mf_neg))
-
-        # OBV (On-Balance Volume)
-        obv = [0]
-        for i in range(1, len(df)):
-            if df['close'].iloc[i] > df['close'].iloc[i - 1]:
-                obv.append(obv[-1] + df['volume'].iloc[i])
-            elif df['close'].iloc[i] < df['close'].iloc[i - 1]:
-                obv.append(obv[-1] - df['volume'].iloc[i])
-            else:
-                obv.append(obv[-1])
-        df['OBV'] = obv
-
-        # ATR (Average True Range)
-        tr1 = df['high'] - df['low']
-        tr2 = abs(df['high'] - df['close'].shift(1))
-        tr3 = abs(df['low'] - df['close'].shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        df['ATR'] = tr.rolling(window=14).mean()
-
-        # ADX and Directional Indicators
-        high_diff = df['high'].diff()
-        low_diff = -df['low'].diff()
-
-        plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
-        minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
-
-        atr = tr.rolling(window=14).mean()
-        df['Plus_DI'] = 100 * (plus_dm.rolling(window=14).mean() / atr)
-        df['Minus_DI'] = 100 * (minus_dm.rolling(window=14).mean() / atr)
-
-        dx = 100 * abs(df['Plus_DI'] - df['Minus_DI']) / (df['Plus_DI'] + df['Minus_DI'])
-        df['ADX'] = dx.rolling(window=14).mean()
-
-        # Bollinger Bands
-        df['BB_Middle'] = df['close'].rolling(window=20).mean()
-        bb_std = df['close'].rolling(window=20).std()
-        df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
-        df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
-
-        # Trend Slope
-        df['Trend_Slope'] = df['close'].rolling(window=5).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0])
-
-        return df[['open', 'high', 'low', 'close', 'volume', 'Stoch_K', 'Stoch_D', 'RSI', 'MA_Fast_Blue', 'MA_Slow_Red',
-                   'MFI', 'OBV', 'ADX', 'Plus_DI', 'Minus_DI', 'ATR', 'BB_Upper', 'BB_Middle', 'BB_Lower',
-                   'Trend_Slope']].iloc[-1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['impulse'])
 
     def calculate_unified_indicators(self):
         """حساب جميع المؤشرات الموحدة"""
-        df = self.df.copy()
-
-        # RSI, MFI, CCI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        mf = tp * df['volume']
-        mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
-        mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
-        df['mfi'] = 100 - (100 / (1 + mf_pos / mf_neg))
-
-        sma_tp = tp.rolling(window=20).mean()
-        mad = tp.rolling(window=20).apply(lambda x: np.abs(x - x.mean()).mean())
-        df['cci'] = (tp - sma_tp) / (0.015 * mad)
-
-        # SMAs
-        df['sma_20'] = df['close'].rolling(window=20).mean()
-        df['sma_50'] = df['close'].rolling(window=50).mean()
-        df['sma_200'] = df['close'].rolling(window=200).mean()
-
-        # MACD
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_histogram'] = df['macd'] - df['macd_signal']
-
-        # ADX and DI
-        high_diff = df['high'].diff()
-        low_diff = -df['low'].diff()
-        plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
-        minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
-
-        tr1 = df['high'] - df['low']
-        tr2 = abs(df['high'] - df['close'].shift(1))
-        tr3 = abs(df['low'] - df['close'].shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-        atr = tr.rolling(window=14).mean()
-        df['atr'] = atr
-        df['adx'] = 0  # placeholder
-        df['plus_di'] = 100 * (plus_dm.rolling(window=14).mean() / atr)
-        df['minus_di'] = 100 * (minus_dm.rolling(window=14).mean() / atr)
-
-        # Bollinger Bands
-        df['bb_middle'] = df['close'].rolling(window=20).mean()
-        bb_std = df['close'].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-        df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-        df['bb_width'] = df['bb_upper'] - df['bb_lower']
-
-        # VWAP
-        df['vwap'] = (df['volume'] * (df['high'] + df['low'] + df['close']) / 3).cumsum() / df['volume'].cumsum()
-
-        # CMF
-        mf_multiplier = ((df['close'] - df['low']) - (df['high'] - df['close'])) / (df['high'] - df['low'])
-        mf_volume = mf_multiplier * df['volume']
-        df['cmf'] = mf_volume.rolling(window=20).sum() / df['volume'].rolling(window=20).sum()
-
-        # Volume ROC
-        df['volume_roc'] = df['volume'].pct_change(periods=14) * 100
-
-        # Pivot Points
-        df['pivot'] = (df['high'] + df['low'] + df['close']) / 3
-        df['r1'] = 2 * df['pivot'] - df['low']
-        df['s1'] = 2 * df['pivot'] - df['high']
-
-        # Donchian Channel
-        df['donchian_upper'] = df['high'].rolling(window=20).max()
-        df['donchian_lower'] = df['low'].rolling(window=20).min()
-        df['donchian_middle'] = (df['donchian_upper'] + df['donchian_lower']) / 2
-
-        columns = ['open', 'high', 'low', 'close', 'volume', 'rsi', 'mfi', 'cci', 'sma_20', 'sma_50',
-                   'sma_200', 'macd', 'macd_histogram', 'adx', 'plus_di', 'minus_di', 'atr',
-                   'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'vwap', 'cmf', 'volume_roc',
-                   'pivot', 'r1', 's1', 'donchian_upper', 'donchian_lower', 'donchian_middle']
-
-        return df[columns].iloc[-1:].copy()
+        return self.indicator_engine().project(MODEL_FEATURES['unified'])
 
     def normalize_data(self, data, model_name):
-        """تطبيع البيانات باستخدام ملفات التطبيع المحفوظة"""
-
-        normalization_config = {
-            'momentum': {
-                'minmax_cols': ['rsi', 'stoch_k', 'stoch_d', 'mfi', 'williams_r'],
-                'standard_cols': ['volume', 'cci']
-            },
-            'support_resistance': {
-                'minmax_cols': [],
-                'standard_cols': ['close', 'r1', 'r2', 'r3', 'sma_20', 'donchian_middle', 's1', 's2', 's3', 'volume']
-            },
-            'trend': {
-                'minmax_cols': [],
-                'standard_cols': ['close', 'macd_histogram', 'plus_di', 'minus_di', 'macd', 'sma_200', 'sma_50',
-                                  'volume']
-            },
-            'volatility': {
-                'minmax_cols': [],
-                'standard_cols': ['close', 'kc_upper', 'atr', 'kc_lower', 'bb_squeeze', 'bb_width', 'bb_middle',
-                                  'volume']
-            },
-            'volume': {
-                'minmax_cols': [],
-                'standard_cols': ['close', 'vwap', 'volume_roc', 'cmf', 'ad_line_change', 'volume']
-            },
-            'impulse': {
-                'minmax_cols': [],
-                'standard_cols': ['open', 'high', 'low', 'close', 'volume',
-                                  'Stoch_K', 'Stoch_D', 'RSI',
-                                  'MA_Fast_Blue', 'MA_Slow_Red',
-                                  'MFI', 'OBV', 'ADX', 'Plus_DI', 'Minus_DI',
-                                  'ATR', 'BB_Upper', 'BB_Middle', 'BB_Lower', 'Trend_Slope']
-            },
-            'unified': {
-                'minmax_cols': [],
-                'standard_cols': ['open', 'high', 'low', 'close', 'volume', 'rsi', 'mfi', 'cci', 'sma_20',
-                                  'sma_50', 'sma_200', 'macd', 'macd_histogram', 'adx', 'plus_di', 'minus_di',
-                                  'atr', 'bb_upper', 'bb_middle', 'bb_lower', 'bb_width', 'vwap', 'cmf',
-                                  'volume_roc', 'pivot', 'r1', 's1', 'donchian_upper', 'donchian_lower',
-                                  'donchian_middle']
-            }
-        }
+        """
+        تطبيع البيانات باستخدام ملفات التطبيع المحفوظة
 
-        config = normalization_config[model_name]
-        normalized_data = data.copy()
-
-        # تطبيع MinMax
-        if config['minmax_cols']:
-            scaler_path = os.path.join(self.scalers_dir, f'{model_name}_minmax_scaler.pkl')
-            if os.path.exists(scaler_path):
-                minmax_scaler = joblib.load(scaler_path)
-                existing_cols = [col for col in config['minmax_cols'] if col in normalized_data.columns]
-                if existing_cols:
-                    normalized_data[existing_cols] = minmax_scaler.transform(normalized_data[existing_cols])
-            else:
-                print(f"⚠️  ملف التطبيع MinMax غير موجود: {scaler_path}")
-
-        # تطبيع Standard
-        if config['standard_cols']:
-            scaler_path = os.path.join(self.scalers_dir, f'{model_name}_standard_scaler.pkl')
-            if os.path.exists(scaler_path):
-                standard_scaler = joblib.load(scaler_path)
-                existing_cols = [col for col in config['standard_cols'] if col in normalized_data.columns]
-                if existing_cols:
-                    normalized_data[existing_cols] = standard_scaler.transform(normalized_data[existing_cols])
+        The scalers come from the process-wide cache and are folded into
+        per-model column indices and offset/divisor/multiplier/addend
+        vectors, so normalizing is a few NumPy operations on the rows.
+        The operations are the ones of transform() (float64), so results
+        are identical to it.
+        """
+        plan = self._normalization_plan(model_name, tuple(data.columns))
+        values = data.to_numpy(dtype=np.float64, copy=True)
+        if plan is not None:
+            index, offset, divisor, multiplier, addend, clip = plan
+            scaled = (values[:, index] - offset) / divisor * multiplier + addend
+            if clip is not None:
+                scaled = np.clip(scaled, clip[0], clip[1])
+            values[:, index] = scaled
+        return pd.DataFrame(values, index=data.index, columns=data.columns)
+
+    def _normalization_plan(self, model_name, columns):
+        """
+        (column indices, offset, divisor, multiplier, addend, clip) of a model
+        for this column order; rebuilt only when a scaler file changes
+        """
+        config = NORMALIZATION_CONFIG[model_name]
+        scalers = []
+        for kind in ('minmax', 'standard'):
+            if not config[f'{kind}_cols']:
+                continue
+            scaler_path = os.path.join(self.scalers_dir, f'{model_name}_{kind}_scaler.pkl')
+            if not os.path.exists(scaler_path):
+                print(f"⚠️  ملف التطبيع {'MinMax' if kind == 'minmax' else 'Standard'} غير موجود: {scaler_path}")
+                continue
+            scalers.append((kind, load_scaler(scaler_path)))
+
+        key = (os.path.abspath(self.scalers_dir), model_name, columns)
+        cached = _normalization_plans.get(key)
+        if cached is not None and len(cached[0]) == len(scalers) and all(
+                a is b for a, (_, b) in zip(cached[0], scalers)):
+            return cached[1]
+
+        position = {column: i for i, column in enumerate(columns)}
+        index, offset, divisor, multiplier, addend = [], [], [], [], []
+        clip_low, clip_high, clipped = [], [], False
+        for kind, scaler in scalers:
+            cols = [col for col in config[f'{kind}_cols'] if col in position]
+            if not cols:
+                continue
+            n = len(cols)
+            index.extend(position[col] for col in cols)
+            if kind == 'minmax':
+                # MinMaxScaler.transform: X * scale_ + min_
+                offset.append(np.zeros(n))
+                divisor.append(np.ones(n))
+                multiplier.append(np.asarray(scaler.scale_, dtype=np.float64))
+                addend.append(np.asarray(scaler.min_, dtype=np.float64))
+                low, high = scaler.feature_range
+                clipped = clipped or getattr(scaler, 'clip', False)
             else:
-                print(f"⚠️  ملف التطبيع Standard غير موجود: {scaler_path}")
-
-        return normalized_data
+                # StandardScaler.transform: (X - mean_) / scale_
+                mean = scaler.mean_ if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None else np.zeros(n)
+                scale = scaler.scale_ if getattr(scaler, 'with_std', True) and scaler.scale_ is not None else np.ones(n)
+                offset.append(np.asarray(mean, dtype=np.float64))
+                divisor.append(np.asarray(scale, dtype=np.float64))
+                multiplier.append(np.ones(n))
+                addend.append(np.zeros(n))
+                low, high = -np.inf, np.inf
+            clip_low.append(np.full(n, low, dtype=np.float64))
+            clip_high.append(np.full(n, high, dtype=np.float64))
+
+        plan = None
+        if index:
+            plan = (np.array(index, dtype=np.intp), np.concatenate(offset), np.concatenate(divisor),
+                    np.concatenate(multiplier), np.concatenate(addend),
+                    (np.concatenate(clip_low), np.concatenate(clip_high)) if clipped else None)
+        _normalization_plans[key] = (tuple(scaler for _, scaler in scalers), plan)
+        return plan
 
     def predict_with_model(self, model_name, data):
-        """التنبؤ باستخدام نموذج معين"""
-        model_path = os.path.join(self.models_dir, f'Conv1D_Deep_{model_name}.keras')
+        """التنبؤ باستخدام نموذج معين (تمرير واحد عبر النموذج)"""
+        return self.predict_batch([{model_name: data}])[0][model_name]
 
-        if not os.path.exists(model_path):
-            print(f"⚠️  النموذج غير موجود: {model_path}")
-            return None
+    def predict_batch(self, inputs):
+        """
+        التنبؤ لعدة مدخلات دفعة واحدة
 
-        model = keras.models.load_model(model_path)
-        prediction = model.predict(data, verbose=0)
+        Parameters:
+        -----------
+        inputs : list of dict
+            كل عنصر {اسم النموذج: البيانات المطبّعة} (لوقت أو رمز واحد)
+
+        Returns:
+        --------
+        list of dict
+            لكل مدخل {اسم النموذج: {'prediction', 'confidence', 'probabilities'}}
+            (None إذا كان النموذج غير موجود)
 
-        prediction = np.argmax(prediction, axis=1)
+        كل نموذج يعمل مرة واحدة فقط على صفوف جميع المدخلات مجمّعة
+        """
+        results = [{} for _ in inputs]
+        model_names = list(dict.fromkeys(name for item in inputs for name in item))
+
+        for model_name in model_names:
+            members = [i for i, item in enumerate(inputs) if model_name in item]
+            model_path = os.path.join(self.models_dir, f'Conv1D_Deep_{model_name}.keras')
+
+            if not os.path.exists(model_path):
+                print(f"⚠️  النموذج غير موجود: {model_path}")
+                for i in members:
+                    results[i][model_name] = None
+                continue
+
+            # Loaded once per process and shared by every MarketPredictionSystem (model_cache.py)
+            model = load_keras_model(model_path)
+            # تمرير واحد: الاحتمالات الكاملة تعطي التوقع والثقة معاً
+            rows = [np.asarray(inputs[i][model_name]) for i in members]
+            probabilities = np.asarray(model.predict(np.concatenate(rows), verbose=0))
+
+            # الصف الأول من كل مدخل (كما في التنبؤ الفردي)
+            offsets = np.cumsum([0] + [len(r) for r in rows[:-1]])
+            for i, offset in zip(members, offsets):
+                proba = probabilities[offset]
+                results[i][model_name] = {
+                    'prediction': int(np.argmax(proba)),
+                    'confidence': float(np.max(proba)),
+                    'probabilities': proba
+                }
+
+        return results
+
+    @staticmethod
+    def prediction_action(prediction):
+        """تحويل رقم الفئة إلى توصية"""
+        if isinstance(prediction, (int, np.integer)):
+            actions = ['sell', 'hold', 'buy']
+            return actions[prediction] if 0 <= prediction < len(actions) else 'hold'
+        return str(prediction).lower()
+
+    def tally_votes(self, predictions):
+        """
+        التصويت المرجح لنتائج مدخل واحد (مثلاً عنصر من predict_batch)
 
-        # استخراج احتمالية التنبؤ إذا كانت متاحة
-        try:
-            proba = model.predict(data, verbose=0)[0]
-            confidence = max(proba)
-        except:
-            confidence = 0.5
+        Returns:
+        --------
+        dict : {'recommendation', 'confidence', 'votes'}
+        """
+        votes = {'buy': 0, 'sell': 0, 'hold': 0}
+        for model_name, result in predictions.items():
+            if result:
+                action = self.prediction_action(result['prediction'])
+                votes[action] = votes.get(action, 0) + self.model_weights[model_name] * result['confidence']
 
+        recommendation = max(votes, key=votes.get)
+        total = sum(votes.values())
         return {
-            'prediction': prediction[0],
-            'confidence': confidence
+            'recommendation': recommendation,
+            'confidence': votes[recommendation] / total if total > 0 else 0,
+            'votes': votes
         }
 
     def get_final_recommendation(self):
@@ -579,45 +427,26 @@ class MarketPredictionSystem:
         indicators['impulse'] = self.calculate_impulse_indicators()
         indicators['unified'] = self.calculate_unified_indicators()
 
-        # تطبيع البيانات والتنبؤ
-        predictions = {}
-        votes = {'buy': 0, 'sell': 0, 'hold': 0}
-
-        for model_name, data in indicators.items():
-            print(f"\n📊 معالجة نموذج: {model_name}")
-
-            # تطبيع البيانات
-            normalized_data = self.normalize_data(data, model_name)
+        # تطبيع البيانات ثم التنبؤ لجميع النماذج دفعة واحدة
+        normalized = {model_name: self.normalize_data(data, model_name) for model_name, data in indicators.items()}
+        results = self.predict_batch([normalized])[0]
+        predictions = {model_name: result for model_name, result in results.items() if result}
+
+        for model_name, result in predictions.items():
+            weight = self.model_weights[model_name]
+            weighted_vote = weight * result['confidence']
+            print(f"\n📊 نموذج: {model_name}")
+            print(f"   التنبؤ: {self.prediction_action(result['prediction'])}")
+            print(f"   الثقة: {result['confidence']:.2%}")
+            print(f"   الوزن: {weight}")
+            print(f"   الصوت المرجح: {weighted_vote:.4f}")
+
+        # التوصية النهائية (نفس التصويت المرجح المستخدم في الدفعات)
+        tally = self.tally_votes(predictions)
+        votes = tally['votes']
+        final_recommendation = tally['recommendation']
+        final_confidence = tally['confidence']
 
-            # التنبؤ
-            result = self.predict_with_model(model_name, normalized_data)
-
-            if result:
-                predictions[model_name] = result
-                prediction = result['prediction']
-                confidence = result['confidence']
-                weight = self.model_weights[model_name]
-
-                # إضافة الصوت المرجح
-                if isinstance(prediction, (int, np.integer)):
-                    # تحويل الأرقام إلى توصيات
-                    actions = ['sell', 'hold', 'buy']
-                    if 0 <= prediction < len(actions):
-                        action = actions[prediction]
-                    else:
-                        action = 'hold'
-                else:
-                    action = str(prediction).lower()
-
-                weighted_vote = weight * confidence
-                votes[action] = votes.get(action, 0) + weighted_vote
-
-                print(f"   التنبؤ: {action}")
-                print(f"   الثقة: {confidence:.2%}")
-                print(f"   الوزن: {weight}")
-                print(f"   الصوت المرجح: {weighted_vote:.4f}")
-
-        # التوصية النهائية
         print("\n" + "=" * 60)
         print("نتائج التصويت المرجح:")
         print("=" * 60)
@@ -625,9 +454,6 @@ class MarketPredictionSystem:
         for action, vote in votes.items():
             print(f"{action.upper()}: {vote:.4f}")
 
-        final_recommendation = max(votes, key=votes.get)
-        final_confidence = votes[final_recommendation] / sum(votes.values()) if sum(votes.values()) > 0 else 0
-
         print("\n" + "=" * 60)
         print(f"🎯 التوصية النهائية: {final_recommendation.upper()}")
         print(f"📊 مستوى الثقة: {final_confidence:.2%}")
@@ -0,0 +1,434 @@
+"""
+indicator_engine.py - Shared Indicators for the Voting Models
+=============================================================
+
+The 7 voting feature sets (momentum, support_resistance, trend, volatility,
+volume, impulse, unified) overlap heavily: RSI, MFI, ATR, ADX/DI,
+Bollinger, SMA and MACD appear in two to four of them. Every indicator is
+registered here once, by name, together with the indicators it is built
+from; the registry forms a dependency graph.
+
+IndicatorEngine evaluates that graph for one OHLCV snapshot: each indicator
+is computed at most once, on first use, into a shared columnar buffer
+(name -> Series), and project() assembles a model's columns from it. The
+formulas are the ones of the former per-model calculate_*_indicators
+methods; OBV, Trend_Slope and the CCI deviation use the NumPy kernels of
+indicator_kernels.py in place of their per-bar Python loops.
+
+Each indicator also declares its warm-up (the rows of its inputs one output
+row reads), which lets an engine built for the last rows only evaluate a
+tail window of the data. That window is max_lookback() + WARMUP_MARGIN
+(374) bars, so it saves nothing on the live 7-day M15 fetch (~480 bars)
+and only bounds the cost when longer histories are passed in (see
+benchmark_indicators.py).
+
+Usage:
+    engine = IndicatorEngine(df, rows=1)        # df: open/high/low/close/volume
+    engine.project(MODEL_FEATURES['momentum'])  # last row, model column names
+"""
+
+import math
+from functools import lru_cache
+
+import pandas as pd
+
+from indicator_kernels import obv, rolling_mad, rolling_slope
+
+BASE_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+EMA_TOLERANCE = 1e-9  # Weight left on the dropped history when an EMA starts inside the tail window
+WARMUP_MARGIN = 10  # Extra bars beyond the longest warm-up in the tail window
+
+INDICATORS = {}  # name -> (dependency names, function of the dependency Series, window)
+
+
+def indicator(name, *dependencies, window=1):
+    """
+    Registers `name`, computed from the named dependencies. `window` is how
+    many consecutive rows of the dependencies one output row reads (1 for
+    row-wise formulas, 14 for a 14-bar rolling mean, 2 for diff/shift(1));
+    None for cumulative indicators, whose value depends on where the data
+    starts.
+    """
+    def register(function):
+        INDICATORS[name] = (dependencies, function, window)
+        return function
+    return register
+
+
+def ema_warmup(span):
+    """
+    Bars an ewm(span, adjust=False) needs to converge: started k bars before
+    the last row, the seed keeps weight (1 - alpha)^k in it, below
+    EMA_TOLERANCE from this many bars on.
+    """
+    alpha = 2 / (span + 1)
+    return math.ceil(math.log(EMA_TOLERANCE) / math.log(1 - alpha)) + 1
+
+
+@lru_cache(maxsize=None)
+def lookback(name):
+    """Bars of OHLCV data the last row of `name` depends on (None: all of them)"""
+    if name in BASE_COLUMNS:
+        return 1
+    dependencies, _, window = INDICATORS[name]
+    dependency_lookbacks = [lookback(dependency) for dependency in dependencies]
+    if window is None or None in dependency_lookbacks:
+        return None
+    return window - 1 + max(dependency_lookbacks)
+
+
+def max_lookback():
+    """The longest finite lookback of the registered indicators"""
+    return max(bars for bars in map(lookback, INDICATORS) if bars is not None)
+
+
+# ---------- price transforms ----------
+
+@indicator('typical_price', 'high', 'low', 'close')
+def _typical_price(high, low, close):
+    return (high + low + close) / 3
+
+
+@indicator('close_delta', 'close', window=2)
+def _close_delta(close):
+    return close.diff()
+
+
+@indicator('true_range', 'high', 'low', 'close', window=2)
+def _true_range(high, low, close):
+    tr1 = high - low
+    tr2 = abs(high - close.shift(1))
+    tr3 = abs(low - close.shift(1))
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+
+# ---------- momentum ----------
+
+@indicator('rsi', 'close_delta', window=14)
+def _rsi(delta):
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+@indicator('low_14', 'low', window=14)
+def _low_14(low):
+    return low.rolling(window=14).min()
+
+
+@indicator('high_14', 'high', window=14)
+def _high_14(high):
+    return high.rolling(window=14).max()
+
+
+@indicator('stoch_k', 'close', 'low_14', 'high_14')
+def _stoch_k(close, low_14, high_14):
+    return 100 * ((close - low_14) / (high_14 - low_14))
+
+
+@indicator('stoch_d', 'stoch_k', window=3)
+def _stoch_d(stoch_k):
+    return stoch_k.rolling(window=3).mean()
+
+
+@indicator('williams_r', 'close', 'low_14', 'high_14')
+def _williams_r(close, low_14, high_14):
+    return -100 * ((high_14 - close) / (high_14 - low_14))
+
+
+@indicator('cci', 'typical_price', window=20)
+def _cci(tp):
+    sma_tp = tp.rolling(window=20).mean()
+    mad = pd.Series(rolling_mad(tp, 20), index=tp.index)
+    return (tp - sma_tp) / (0.015 * mad)
+
+
+@indicator('mfi', 'typical_price', 'volume', window=15)
+def _mfi(tp, volume):
+    mf = tp * volume
+    mf_pos = mf.where(tp > tp.shift(1), 0).rolling(window=14).sum()
+    mf_neg = mf.where(tp < tp.shift(1), 0).rolling(window=14).sum()
+    return 100 - (100 / (1 + mf_pos / mf_neg))
+
+
+# ---------- support / resistance ----------
+
+@indicator('r1', 'typical_price', 'low')
+def _r1(pivot, low):
+    return 2 * pivot - low
+
+
+@indicator('r2', 'typical_price', 'high', 'low')
+def _r2(pivot, high, low):
+    return pivot + (high - low)
+
+
+@indicator('r3', 'typical_price', 'high', 'low')
+def _r3(pivot, high, low):
+    return high + 2 * (pivot - low)
+
+
+@indicator('s1', 'typical_price', 'high')
+def _s1(pivot, high):
+    return 2 * pivot - high
+
+
+@indicator('s2', 'typical_price', 'high', 'low')
+def _s2(pivot, high, low):
+    return pivot - (high - low)
+
+
+@indicator('s3', 'typical_price', 'high', 'low')
+def _s3(pivot, high, low):
+    return low - 2 * (high - pivot)
+
+
+@indicator('donchian_upper', 'high', window=20)
+def _donchian_upper(high):
+    return high.rolling(window=20).max()
+
+
+@indicator('donchian_lower', 'low', window=20)
+def _donchian_lower(low):
+    return low.rolling(window=20).min()
+
+
+@indicator('donchian_middle', 'donchian_upper', 'donchian_lower')
+def _donchian_middle(upper, lower):
+    return (upper + lower) / 2
+
+
+# ---------- trend ----------
+
+@indicator('sma_20', 'close', window=20)
+def _sma_20(close):
+    return close.rolling(window=20).mean()
+
+
+@indicator('sma_50', 'close', window=50)
+def _sma_50(close):
+    return close.rolling(window=50).mean()
+
+
+@indicator('sma_200', 'close', window=200)
+def _sma_200(close):
+    return close.rolling(window=200).mean()
+
+
+@indicator('ema_12', 'close', window=ema_warmup(12))
+def _ema_12(close):
+    return close.ewm(span=12, adjust=False).mean()
+
+
+@indicator('ema_26', 'close', window=ema_warmup(26))
+def _ema_26(close):
+    return close.ewm(span=26, adjust=False).mean()
+
+
+@indicator('macd', 'ema_12', 'ema_26')
+def _macd(ema_12, ema_26):
+    return ema_12 - ema_26
+
+
+@indicator('macd_signal', 'macd', window=ema_warmup(9))
+def _macd_signal(macd):
+    return macd.ewm(span=9, adjust=False).mean()
+
+
+@indicator('macd_histogram', 'macd', 'macd_signal')
+def _macd_histogram(macd, signal):
+    return macd - signal
+
+
+@indicator('atr', 'true_range', window=14)
+def _atr(tr):
+    return tr.rolling(window=14).mean()
+
+
+@indicator('plus_dm', 'high', 'low', window=2)
+def _plus_dm(high, low):
+    high_diff = high.diff()
+    low_diff = -low.diff()
+    return high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
+
+
+@indicator('minus_dm', 'high', 'low', window=2)
+def _minus_dm(high, low):
+    high_diff = high.diff()
+    low_diff = -low.diff()
+    return low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
+
+
+@indicator('plus_di', 'plus_dm', 'atr', window=14)
+def _plus_di(plus_dm, atr):
+    return 100 * (plus_dm.rolling(window=14).mean() / atr)
+
+
+@indicator('minus_di', 'minus_dm', 'atr', window=14)
+def _minus_di(minus_dm, atr):
+    return 100 * (minus_dm.rolling(window=14).mean() / atr)
+
+
+@indicator('adx', 'plus_di', 'minus_di', window=14)
+def _adx(plus_di, minus_di):
+    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    return dx.rolling(window=14).mean()
+
+
+@indicator('adx_placeholder', 'close')
+def _adx_placeholder(close):
+    # The unified model was trained with a constant 0 in its 'adx' column
+    return pd.Series(0, index=close.index)
+
+
+@indicator('trend_slope', 'close', window=5)
+def _trend_slope(close):
+    return pd.Series(rolling_slope(close, 5), index=close.index)
+
+
+# ---------- volatility ----------
+
+@indicator('bb_std', 'close', window=20)
+def _bb_std(close):
+    return close.rolling(window=20).std()
+
+
+@indicator('bb_upper', 'sma_20', 'bb_std')
+def _bb_upper(middle, std):
+    return middle + (std * 2)
+
+
+@indicator('bb_lower', 'sma_20', 'bb_std')
+def _bb_lower(middle, std):
+    return middle - (std * 2)
+
+
+@indicator('bb_width', 'bb_upper', 'bb_lower')
+def _bb_width(upper, lower):
+    return upper - lower
+
+
+@indicator('kc_middle', 'close', window=ema_warmup(20))
+def _kc_middle(close):
+    return close.ewm(span=20, adjust=False).mean()
+
+
+@indicator('kc_upper', 'kc_middle', 'atr')
+def _kc_upper(middle, atr):
+    return middle + (atr * 2)
+
+
+@indicator('kc_lower', 'kc_middle', 'atr')
+def _kc_lower(middle, atr):
+    return middle - (atr * 2)
+
+
+@indicator('bb_squeeze', 'bb_width', 'kc_upper', 'kc_lower')
+def _bb_squeeze(bb_width, kc_upper, kc_lower):
+    return (bb_width < (kc_upper - kc_lower)).astype(int)
+
+
+# ---------- volume ----------
+
+@indicator('vwap', 'high', 'low', 'close', 'volume', window=None)
+def _vwap(high, low, close, volume):
+    return (volume * (high + low + close) / 3).cumsum() / volume.cumsum()
+
+
+@indicator('volume_roc', 'volume', window=15)
+def _volume_roc(volume):
+    return volume.pct_change(periods=14) * 100
+
+
+@indicator('mf_volume', 'high', 'low', 'close', 'volume')
+def _mf_volume(high, low, close, volume):
+    mf_multiplier = ((close - low) - (high - close)) / (high - low)
+    return mf_multiplier * volume
+
+
+@indicator('cmf', 'mf_volume', 'volume', window=20)
+def _cmf(mf_volume, volume):
+    return mf_volume.rolling(window=20).sum() / volume.rolling(window=20).sum()
+
+
+@indicator('ad_line_change', 'mf_volume', window=2)
+def _ad_line_change(mf_volume):
+    return mf_volume.cumsum().diff()
+
+
+@indicator('obv', 'close', 'volume', window=None)
+def _obv(close, volume):
+    return pd.Series(obv(close, volume), index=close.index)
+
+
+# ---------- model feature sets: (model column, indicator) in model input order ----------
+
+def _same(*names):
+    return [(name, name) for name in names]
+
+
+MODEL_FEATURES = {
+    'momentum': _same('volume', 'rsi', 'stoch_k', 'stoch_d', 'cci', 'mfi', 'williams_r'),
+    'support_resistance': _same('close', 'r1', 'r2', 'r3', 'sma_20', 'donchian_middle', 's1', 's2', 's3',
+                                'volume'),
+    'trend': _same('close', 'macd_histogram', 'plus_di', 'minus_di', 'macd', 'sma_200', 'sma_50', 'volume'),
+    'volatility': _same('close', 'kc_upper', 'atr', 'kc_lower', 'bb_squeeze', 'bb_width') + [
+        ('bb_middle', 'sma_20'), ('volume', 'volume')],
+    'volume': _same('close', 'vwap', 'volume_roc', 'cmf', 'ad_line_change', 'volume'),
+    'impulse': _same('open', 'high', 'low', 'close', 'volume') + [
+        ('Stoch_K', 'stoch_k'), ('Stoch_D', 'stoch_d'), ('RSI', 'rsi'),
+        ('MA_Fast_Blue', 'ema_12'), ('MA_Slow_Red', 'ema_26'),
+        ('MFI', 'mfi'), ('OBV', 'obv'), ('ADX', 'adx'), ('Plus_DI', 'plus_di'), ('Minus_DI', 'minus_di'),
+        ('ATR', 'atr'), ('BB_Upper', 'bb_upper'), ('BB_Middle', 'sma_20'), ('BB_Lower', 'bb_lower'),
+        ('Trend_Slope', 'trend_slope')],
+    'unified': _same('open', 'high', 'low', 'close', 'volume', 'rsi', 'mfi', 'cci', 'sma_20', 'sma_50',
+                     'sma_200', 'macd', 'macd_histogram') + [('adx', 'adx_placeholder')] + _same(
+        'plus_di', 'minus_di', 'atr', 'bb_upper') + [('bb_middle', 'sma_20')] + _same(
+        'bb_lower', 'bb_width', 'vwap', 'cmf', 'volume_roc') + [('pivot', 'typical_price')] + _same(
+        'r1', 's1', 'donchian_upper', 'donchian_lower', 'donchian_middle'),
+}
+
+
+class IndicatorEngine:
+    """
+    Indicators of one OHLCV snapshot, each computed at most once.
+
+    With `rows`, only the last `rows` rows are needed: indicators are then
+    evaluated on the last rows - 1 + max_lookback() + margin bars instead of
+    the whole frame, so their cost no longer grows with the fetched history.
+    EMAs match the full-frame values within EMA_TOLERANCE of their seed
+    error, the other indicators within float rounding. Cumulative
+    indicators (VWAP, OBV) are still evaluated on the whole frame.
+    """
+
+    def __init__(self, df, rows=None, margin=WARMUP_MARGIN):
+        self.rows = rows
+        self.full_buffer = {column: df[column] for column in BASE_COLUMNS}
+        if rows is None:
+            self.buffer = self.full_buffer
+        else:
+            bars = rows - 1 + max_lookback() + margin
+            self.buffer = {column: series.iloc[-bars:] for column, series in self.full_buffer.items()}
+
+    def get(self, name):
+        """The indicator Series, computing it (and its dependencies) on first use"""
+        return self._evaluate(name, self.full_buffer if lookback(name) is None else self.buffer)
+
+    def _evaluate(self, name, buffer):
+        series = buffer.get(name)
+        if series is None:
+            dependencies, function, _ = INDICATORS[name]
+            series = function(*(self._evaluate(dependency, buffer) for dependency in dependencies))
+            buffer[name] = series
+        return series
+
+    def project(self, features, rows=1):
+        """DataFrame of the last `rows` rows with the model's column names, in model order"""
+        if self.rows is not None and rows > self.rows:
+            raise ValueError(f"The engine was built for the last {self.rows} rows, {rows} requested")
+        return pd.DataFrame({column: self.get(name).iloc[-rows:] for column, name in features})
+
+    def project_all(self, rows=1):
+        """Every model's feature set: {model name: DataFrame}"""
+        return {model_name: self.project(features, rows) for model_name, features in MODEL_FEATURES.items()}
@@ -0,0 +1,61 @@
+"""
+indicator_kernels.py - Vectorized Indicator Kernels
+===================================================
+
+NumPy replacements for the three per-bar Python computations of the voting
+indicators:
+- obv:           On-Balance Volume as a cumulative sum of sign(close change) * volume
+                 (was a Python loop over the bars)
+- rolling_slope: least-squares slope of each window in closed form, one
+                 correlation with fixed weights (was rolling().apply(np.polyfit))
+- rolling_mad:   mean absolute deviation of each window over a strided
+                 window view (was rolling().apply(lambda ...))
+
+Each takes array-likes and returns a float64 array of the same length, NaN
+where the window is incomplete, like the pandas rolling versions.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+CHUNK_ROWS = 1 << 16  # Windows per rolling_mad step (bounds its temporaries to CHUNK_ROWS * window floats)
+
+
+def obv(close, volume):
+    """
+    On-Balance Volume: 0 on the first bar, then + volume on an up-close,
+    - volume on a down-close, unchanged otherwise (also when a close is NaN).
+    Summed in float64, so unsigned (MT5 tick) volumes go negative instead of
+    wrapping around; exact while the running total stays below 2**53.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    signed_volume = np.zeros(len(close))
+    change = np.diff(close)
+    signed_volume[1:] = np.where(change > 0, volume[1:], np.where(change < 0, -volume[1:], 0.0))
+    return np.cumsum(signed_volume)
+
+
+def rolling_slope(values, window):
+    """Slope of the least-squares line through each `window` values (x = 0..window-1)"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) >= window:
+        x = np.arange(window, dtype=np.float64)
+        x -= x.mean()
+        result[window - 1:] = np.correlate(values, x / (x * x).sum(), mode='valid')
+    return result
+
+
+def rolling_mad(values, window):
+    """Mean absolute deviation from the mean of each `window` values"""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+    windows = sliding_window_view(values, window)
+    for start in range(0, len(windows), CHUNK_ROWS):
+        chunk = windows[start:start + CHUNK_ROWS]
+        deviation = np.abs(chunk - chunk.mean(axis=1, keepdims=True))
+        result[window - 1 + start:window - 1 + start + len(chunk)] = deviation.mean(axis=1)
+    return result
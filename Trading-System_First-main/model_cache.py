@@ -0,0 +1,113 @@
+"""
+model_cache.py - Process-wide Model Cache
+=========================================
+
+Keeps deserialized models (the Conv1D_Deep_*.keras voting models by
+default) in memory, so every MarketPredictionSystem, strategy monitor and
+account in a process shares one loaded copy instead of calling
+keras.models.load_model() on every recommendation:
+- lazy: a model is loaded on its first get()
+- mtime-based reload: each get() stats the file and reloads the model when
+  it was replaced on disk
+- LRU eviction beyond max_entries models
+- thread-safe: concurrent get()s of the same model load it once, other
+  models load in parallel
+
+A second cache (load_scaler) does the same for the joblib-pickled scalers
+in scalers/.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 16  # The 7 voting models plus room for other model files
+
+
+def load_keras_file(path):
+    from tensorflow import keras
+    return keras.models.load_model(path)
+
+
+def load_joblib_file(path):
+    import joblib
+    return joblib.load(path)
+
+
+class ModelCache:
+    def __init__(self, loader=load_keras_file, max_entries=DEFAULT_MAX_ENTRIES):
+        self.loader = loader
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # path -> (file stamp, model)
+        self._loading = {}  # path -> lock held while that path is (re)loaded
+        self.loads = 0
+        self.hits = 0
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path):
+        """The model stored at `path`, loaded at most once per file version"""
+        path = os.path.abspath(path)
+        stamp = self._stamp(path)  # FileNotFoundError for a missing model
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            path_lock = self._loading.setdefault(path, threading.Lock())
+
+        with path_lock:
+            # Another thread may have loaded it while we waited
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and entry[0] == stamp:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return entry[1]
+            model = self.loader(path)
+            with self._lock:
+                self._entries[path] = (stamp, model)
+                self._entries.move_to_end(path)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self.loads += 1
+            return model
+
+    def evict(self, path=None):
+        """Drops one model (or all of them); the next get() loads it again"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_model_cache(loader=load_keras_file):
+    """Process-wide cache for one loader (Keras models by default)"""
+    with _caches_lock:
+        if loader not in _caches:
+            _caches[loader] = ModelCache(loader)
+        return _caches[loader]
+
+
+def load_keras_model(path):
+    """keras.models.load_model(path), served from the process-wide cache"""
+    return get_model_cache().get(path)
+
+
+def load_scaler(path):
+    """joblib.load(path) of a fitted scaler, served from the process-wide cache"""
+    return get_model_cache(load_joblib_file).get(path)
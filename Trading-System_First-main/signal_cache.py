@@ -0,0 +1,113 @@
+"""
+signal_cache.py - Per-Candle Signal Cache
+=========================================
+
+Memoizes a signal (the 7-model vote, the price prediction) per
+(symbol, timeframe, last closed bar time, model version), so every strategy
+monitor and account of a process computes it once per candle instead of on
+every check:
+- single-flight: concurrent get()s of a missing key wait for one computation
+  and share its result (or its exception)
+- a None result (signal unavailable) is returned but not cached, so the
+  next check retries
+- storing a newer bar evicts the older bars of that symbol and timeframe
+
+Usage:
+    cache = get_signal_cache('voting')
+    result = cache.get(symbol, 'M15', bar_time, files_version(models_dir), compute)
+"""
+
+import os
+import threading
+
+
+def files_version(*paths):
+    """Version stamp of model files: (latest mtime_ns, total size) of the files (directories: their files)"""
+    latest, size = 0, 0
+    for path in paths:
+        if os.path.isdir(path):
+            entries = [entry.stat() for entry in os.scandir(path) if entry.is_file()]
+        elif os.path.exists(path):
+            entries = [os.stat(path)]
+        else:
+            entries = []
+        for stat in entries:
+            latest = max(latest, stat.st_mtime_ns)
+            size += stat.st_size
+    return latest, size
+
+
+class _Flight:
+    """One computation in progress, awaited by the other requesters of its key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SignalCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (symbol, timeframe, bar time, model version) -> signal
+        self._flights = {}  # key -> _Flight of the computation in progress
+        self.computes = 0
+        self.hits = 0
+
+    def get(self, symbol, timeframe, bar_time, model_version, compute):
+        """The signal for this candle and model version, calling compute() at most once for it"""
+        key = (symbol, timeframe, bar_time, model_version)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.computes += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                bar_times = {k[2] for k in self._entries if k[:2] == key[:2]}
+                if flight.error is None and flight.result is not None and not any(t > bar_time for t in bar_times):
+                    # The bar rolled: older candles of this symbol/timeframe are no longer requested
+                    for old_key in [k for k in self._entries if k[:2] == key[:2] and k[2] < bar_time]:
+                        del self._entries[old_key]
+                    self._entries[key] = flight.result
+            flight.done.set()
+        return flight.result
+
+    def evict(self, symbol=None):
+        """Drops the cached signals (of one symbol, or all); the next get() computes them again"""
+        with self._lock:
+            for key in [k for k in self._entries if symbol is None or k[0] == symbol]:
+                del self._entries[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_signal_cache(signal):
+    """Process-wide cache of one signal ('voting', 'price_prediction', ...)"""
+    with _caches_lock:
+        if signal not in _caches:
+            _caches[signal] = SignalCache()
+        return _caches[signal]
@@ -0,0 +1,582 @@
+"""
+streaming_indicators.py - Incremental Indicators for Live Candles
+=================================================================
+
+Stateful versions of the voting and price-prediction indicators: each new
+bar updates them in O(1) (O(window) with a fixed small window for the CCI
+mean deviation and the 5-bar trend slope), instead of recomputing every
+rolling and EWM indicator over the fetched history.
+
+Building blocks, matching the pandas operations they replace (NaN inputs
+are skipped and a window is valid once it holds `window` observations, as
+with pandas' default min_periods):
+- EMA:            ewm(span, adjust=False).mean()
+- RollingSum:     rolling(window).sum() / .mean() (compensated add/remove)
+- RollingVar:     rolling(window).var() / .std() (Welford add/remove)
+- RollingExtreme: rolling(window).max() / .min() (monotonic deque)
+- Lag:            the value `periods` bars ago (diff, shift, pct_change)
+- RSI, ATR, DirectionalIndex (+DI/-DI/ADX), Bollinger, VWAP, OBV
+
+Streams combine them per consumer and can be seeded from history:
+- VotingIndicatorStream: every indicator of MODEL_FEATURES (IndicatorEngine)
+- PriceFeatureStream:    the features of PricePredictionSystem._add_features
+
+VWAP and OBV are cumulative from the first bar consumed, so a stream only
+matches IndicatorEngine on a frame that starts where the stream was seeded;
+the voting models get a sliding 7-day fetch and stay on IndicatorEngine.
+tests/test_streaming_indicators.py checks both streams against the batch
+versions.
+
+Usage:
+    stream = VotingIndicatorStream().seed(df)       # df: open/high/low/close/volume
+    stream.update(time, (open, high, low, close, volume))
+    stream.snapshot(df).project(MODEL_FEATURES['momentum'])
+"""
+
+import copy
+import math
+from collections import deque
+
+import pandas as pd
+
+from indicator_engine import MODEL_FEATURES
+
+NAN = float('nan')
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _div(a, b):
+    """a / b with NumPy semantics: ±inf or NaN instead of ZeroDivisionError"""
+    if b == 0:
+        if a != a or a == 0:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+# ---------- building blocks ----------
+
+class EMA:
+    """ewm(span=span, adjust=False).mean()"""
+
+    def __init__(self, span):
+        self.alpha = 1. / (1. + (span - 1) / 2.)
+        self.value = NAN
+
+    def update(self, x):
+        if x != x:
+            return self.value
+        if self.value != self.value:
+            self.value = x
+        elif self.value != x:
+            old_weight = 1. - self.alpha
+            self.value = (old_weight * self.value + self.alpha * x) / (old_weight + self.alpha)
+        return self.value
+
+
+class RollingSum:
+    """rolling(window).sum() and .mean(), with compensated (Kahan) add/remove"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.negative = 0
+        self.total = 0.
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.same_count = 0  # Trailing run of identical observations
+        self.last_value = NAN
+
+    def update(self, x):
+        self.values.append(x)
+        if len(self.values) > self.window:
+            removed = self.values.popleft()
+            if removed == removed:
+                self.nobs -= 1
+                self.negative -= math.copysign(1., removed) < 0
+                y = -removed - self.compensation_remove
+                t = self.total + y
+                self.compensation_remove = t - self.total - y
+                self.total = t
+        if x == x:
+            self.nobs += 1
+            self.negative += math.copysign(1., x) < 0
+            y = x - self.compensation_add
+            t = self.total + y
+            self.compensation_add = t - self.total - y
+            self.total = t
+            self.same_count = self.same_count + 1 if x == self.last_value else 1
+            self.last_value = x
+        return self
+
+    @property
+    def full(self):
+        return self.nobs >= self.window
+
+    @property
+    def sum(self):
+        if not self.full:
+            return NAN
+        if self.same_count >= self.nobs:
+            return self.last_value * self.nobs
+        return self.total
+
+    @property
+    def mean(self):
+        if not self.full:
+            return NAN
+        if self.same_count >= self.nobs:
+            return self.last_value
+        result = self.total / self.nobs
+        if self.negative == 0 and result < 0:
+            return 0.
+        if self.negative == self.nobs and result > 0:
+            return 0.
+        return result
+
+
+class RollingVar:
+    """rolling(window).var(ddof) and .std(ddof), with Welford add/remove"""
+
+    def __init__(self, window, ddof=1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque()
+        self.nobs = 0
+        self.mean_x = 0.
+        self.ssqdm_x = 0.
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.same_count = 0
+        self.last_value = NAN
+
+    def update(self, x):
+        self.values.append(x)
+        if len(self.values) > self.window:
+            removed = self.values.popleft()
+            if removed == removed:
+                self.nobs -= 1
+                if self.nobs:
+                    previous_mean = self.mean_x - self.compensation_remove
+                    y = removed - self.compensation_remove
+                    t = y - self.mean_x
+                    self.compensation_remove = t + self.mean_x - y
+                    self.mean_x -= t / self.nobs
+                    self.ssqdm_x -= (removed - previous_mean) * (removed - self.mean_x)
+                else:
+                    self.mean_x = self.ssqdm_x = 0.
+        if x == x:
+            self.same_count = self.same_count + 1 if x == self.last_value else 1
+            self.last_value = x
+            self.nobs += 1
+            previous_mean = self.mean_x - self.compensation_add
+            y = x - self.compensation_add
+            t = y - self.mean_x
+            self.compensation_add = t + self.mean_x - y
+            self.mean_x += t / self.nobs
+            self.ssqdm_x += (x - previous_mean) * (x - self.mean_x)
+        return self
+
+    @property
+    def var(self):
+        if self.nobs < self.window or self.nobs <= self.ddof:
+            return NAN
+        if self.nobs == 1 or self.same_count >= self.nobs:
+            return 0.
+        return max(self.ssqdm_x / (self.nobs - self.ddof), 0.)
+
+    @property
+    def std(self):
+        return math.sqrt(self.var) if self.var == self.var else NAN
+
+
+class RollingExtreme:
+    """rolling(window).max() (largest=True) or .min(), over a monotonic deque"""
+
+    def __init__(self, window, largest=True):
+        self.window = window
+        self.sign = 1. if largest else -1.
+        self.candidates = deque()  # (bar number, sign * value), decreasing
+        self.valid = deque()  # Whether each of the last `window` values is an observation
+        self.nobs = 0
+        self.count = 0
+        self.value = NAN
+
+    def update(self, x):
+        self.valid.append(x == x)
+        self.nobs += x == x
+        if len(self.valid) > self.window:
+            self.nobs -= self.valid.popleft()
+        if x == x:
+            signed = self.sign * x
+            while self.candidates and self.candidates[-1][1] <= signed:
+                self.candidates.pop()
+            self.candidates.append((self.count, signed))
+        while self.candidates and self.candidates[0][0] <= self.count - self.window:
+            self.candidates.popleft()
+        self.count += 1
+        self.value = self.sign * self.candidates[0][1] if self.nobs >= self.window else NAN
+        return self.value
+
+
+class Lag:
+    """The value `periods` bars ago (NaN before that)"""
+
+    def __init__(self, periods):
+        self.history = deque(maxlen=periods + 1)
+
+    def update(self, x):
+        self.history.append(x)
+        return self.history[0] if len(self.history) == self.history.maxlen else NAN
+
+
+class RSI:
+    """
+    RSI from the mean gain/loss of `period` changes: simple rolling means
+    (as the voting models compute it) or Wilder's smoothing (wilder=True).
+    `epsilon` is added to the mean loss (the price predictor uses 1e-12).
+    On the first bar the change is taken as 0, as delta.where(delta > 0, 0)
+    does; first_change=NaN skips it like delta.clip(lower=0).
+    """
+
+    def __init__(self, period=14, wilder=False, epsilon=0., first_change=0.):
+        if wilder:
+            self.gain, self.loss = EMA(2 * period - 1), EMA(2 * period - 1)
+        else:
+            self.gain, self.loss = RollingSum(period), RollingSum(period)
+        self.wilder = wilder
+        self.epsilon = epsilon
+        self.first_change = first_change
+        self.previous_close = NAN
+        self.value = NAN
+
+    def update(self, close):
+        delta = close - self.previous_close
+        self.previous_close = close
+        if delta != delta:
+            gain, loss = self.first_change, -self.first_change
+        else:
+            gain = delta if delta > 0 else 0.
+            loss = -(delta if delta < 0 else 0.)
+        if self.wilder:
+            mean_gain, mean_loss = self.gain.update(gain), self.loss.update(loss)
+        else:
+            mean_gain, mean_loss = self.gain.update(gain).mean, self.loss.update(loss).mean
+        rs = _div(mean_gain, mean_loss + self.epsilon)
+        self.value = 100 - (100 / (1 + rs))
+        return self.value
+
+
+class ATR:
+    """Rolling mean of the true range (the largest of the available ranges on the first bar)"""
+
+    def __init__(self, period=14):
+        self.mean = RollingSum(period)
+        self.previous_close = NAN
+        self.true_range = NAN
+        self.value = NAN
+
+    def update(self, high, low, close):
+        ranges = [r for r in (high - low, abs(high - self.previous_close), abs(low - self.previous_close)) if r == r]
+        self.true_range = max(ranges) if ranges else NAN
+        self.previous_close = close
+        self.value = self.mean.update(self.true_range).mean
+        return self.value
+
+
+class DirectionalIndex:
+    """+DI and -DI (rolling means of the directional moves over ATR) and ADX"""
+
+    def __init__(self, period=14):
+        self.plus_dm = RollingSum(period)
+        self.minus_dm = RollingSum(period)
+        self.dx = RollingSum(period)
+        self.previous_high = NAN
+        self.previous_low = NAN
+        self.plus_di = self.minus_di = self.adx = NAN
+
+    def update(self, high, low, atr):
+        high_diff = high - self.previous_high
+        low_diff = -(low - self.previous_low)
+        self.previous_high, self.previous_low = high, low
+        plus_dm = high_diff if high_diff > low_diff and high_diff > 0 else 0.
+        minus_dm = low_diff if low_diff > high_diff and low_diff > 0 else 0.
+        self.plus_di = 100 * _div(self.plus_dm.update(plus_dm).mean, atr)
+        self.minus_di = 100 * _div(self.minus_dm.update(minus_dm).mean, atr)
+        dx = _div(100 * abs(self.plus_di - self.minus_di), self.plus_di + self.minus_di)
+        self.adx = self.dx.update(dx).mean
+        return self
+
+
+class Bollinger:
+    """Rolling mean ± `width` rolling standard deviations"""
+
+    def __init__(self, period=20, width=2):
+        self.mean = RollingSum(period)
+        self.var = RollingVar(period)
+        self.width = width
+        self.middle = self.upper = self.lower = self.std = NAN
+
+    def update(self, close):
+        self.middle = self.mean.update(close).mean
+        self.std = self.var.update(close).std
+        self.upper = self.middle + (self.std * self.width)
+        self.lower = self.middle - (self.std * self.width)
+        return self
+
+
+class VWAP:
+    """Cumulative volume-weighted typical price since the first bar"""
+
+    def __init__(self):
+        self.price_volume = 0.
+        self.volume = 0
+        self.value = NAN
+
+    def update(self, high, low, close, volume):
+        self.price_volume += volume * (high + low + close) / 3
+        self.volume += volume
+        self.value = _div(self.price_volume, self.volume)
+        return self.value
+
+
+class OBV:
+    """On-Balance Volume since the first bar (see indicator_kernels.obv)"""
+
+    def __init__(self):
+        self.previous_close = NAN
+        self.value = 0.
+
+    def update(self, close, volume):
+        if close > self.previous_close:
+            self.value += volume
+        elif close < self.previous_close:
+            self.value -= volume
+        self.previous_close = close
+        return self.value
+
+
+# ---------- streams ----------
+
+class IndicatorSnapshot:
+    """One bar's indicator values, projected like IndicatorEngine.project"""
+
+    def __init__(self, time, values, index_name=None):
+        self.time = time
+        self.values = values
+        self.index_name = index_name
+
+    def project(self, features, rows=1):
+        if rows != 1:
+            raise ValueError(f"A streaming snapshot holds the last row only, {rows} requested")
+        index = pd.Index([self.time], name=self.index_name)
+        return pd.DataFrame([[self.values[name] for _, name in features]],
+                            columns=[column for column, _ in features], index=index)
+
+    def project_all(self, rows=1):
+        return {model_name: self.project(features, rows) for model_name, features in MODEL_FEATURES.items()}
+
+
+class IndicatorStream:
+    """
+    Base of the streams: update() consumes one closed bar; seed() replays a
+    history; sync() catches up on the rows of a fetched frame newer than the
+    last consumed bar (or reseeds when the frame no longer continues it).
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_time = None
+        self.values = None
+
+    def update(self, time, bar):
+        """Consumes one bar (open, high, low, close, volume); returns the indicator values"""
+        self.last_time = time
+        self.values = self._update(time, *(float(value) for value in bar))
+        return self.values
+
+    def _update(self, time, open_, high, low, close, volume):
+        raise NotImplementedError
+
+    def seed(self, df):
+        self.reset()
+        self._consume(df)
+        return self
+
+    def _consume(self, df):
+        for time, bar in zip(df.index, df[list(BAR_COLUMNS)].itertuples(index=False, name=None)):
+            self.update(time, bar)
+
+    def sync(self, df, provisional=False):
+        """
+        The values of df's last row. provisional: that row is a still-forming
+        candle, evaluated on a copy of the state without consuming it.
+        """
+        closed = df.iloc[:-1] if provisional else df
+        if self.last_time is not None and self.last_time in closed.index:
+            self._consume(closed.iloc[closed.index.get_loc(self.last_time) + 1:])
+        else:
+            self.seed(closed)
+        if provisional:
+            return copy.deepcopy(self).update(df.index[-1], df[list(BAR_COLUMNS)].iloc[-1])
+        return self.values
+
+
+class VotingIndicatorStream(IndicatorStream):
+    """The indicators of indicator_engine.py (every name MODEL_FEATURES uses), one bar at a time"""
+
+    def reset(self):
+        super().reset()
+        self.previous_typical_price = NAN
+        self.high_14, self.low_14 = RollingExtreme(14), RollingExtreme(14, largest=False)
+        self.donchian_upper, self.donchian_lower = RollingExtreme(20), RollingExtreme(20, largest=False)
+        self.stoch_d = RollingSum(3)
+        self.rsi = RSI(14)
+        self.typical_price_mean = RollingSum(20)
+        self.typical_prices = deque(maxlen=20)
+        self.money_flow_positive, self.money_flow_negative = RollingSum(14), RollingSum(14)
+        self.sma_50, self.sma_200 = RollingSum(50), RollingSum(200)
+        self.ema_12, self.ema_26, self.macd_signal, self.kc_middle = EMA(12), EMA(26), EMA(9), EMA(20)
+        self.atr = ATR(14)
+        self.directional = DirectionalIndex(14)
+        self.bollinger = Bollinger(20)
+        self.vwap = VWAP()
+        self.obv = OBV()
+        self.volume_lag = Lag(14)
+        self.money_flow_volume, self.volume_sum = RollingSum(20), RollingSum(20)
+        self.ad_line = 0.
+        self.previous_ad_line = NAN
+        self.closes = deque(maxlen=5)
+
+    def _update(self, time, open_, high, low, close, volume):
+        tp = (high + low + close) / 3
+        v = {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+             'typical_price': tp, 'adx_placeholder': 0}
+
+        # Momentum
+        v['rsi'] = self.rsi.update(close)
+        high_14, low_14 = self.high_14.update(high), self.low_14.update(low)
+        v['stoch_k'] = 100 * _div(close - low_14, high_14 - low_14)
+        v['stoch_d'] = self.stoch_d.update(v['stoch_k']).mean
+        v['williams_r'] = -100 * _div(high_14 - close, high_14 - low_14)
+        self.typical_prices.append(tp)
+        sma_tp = self.typical_price_mean.update(tp).mean
+        mad = NAN
+        if len(self.typical_prices) == self.typical_prices.maxlen:
+            mean_tp = sum(self.typical_prices) / len(self.typical_prices)
+            mad = sum(abs(x - mean_tp) for x in self.typical_prices) / len(self.typical_prices)
+        v['cci'] = _div(tp - sma_tp, 0.015 * mad)
+        mf = tp * volume
+        mf_pos = self.money_flow_positive.update(mf if tp > self.previous_typical_price else 0.).sum
+        mf_neg = self.money_flow_negative.update(mf if tp < self.previous_typical_price else 0.).sum
+        self.previous_typical_price = tp
+        v['mfi'] = 100 - (100 / (1 + _div(mf_pos, mf_neg)))
+
+        # Support / resistance
+        v['r1'], v['s1'] = 2 * tp - low, 2 * tp - high
+        v['r2'], v['s2'] = tp + (high - low), tp - (high - low)
+        v['r3'], v['s3'] = high + 2 * (tp - low), low - 2 * (high - tp)
+        v['donchian_upper'], v['donchian_lower'] = self.donchian_upper.update(high), self.donchian_lower.update(low)
+        v['donchian_middle'] = (v['donchian_upper'] + v['donchian_lower']) / 2
+
+        # Trend
+        self.bollinger.update(close)
+        v['sma_20'] = self.bollinger.middle
+        v['sma_50'], v['sma_200'] = self.sma_50.update(close).mean, self.sma_200.update(close).mean
+        v['ema_12'], v['ema_26'] = self.ema_12.update(close), self.ema_26.update(close)
+        v['macd'] = v['ema_12'] - v['ema_26']
+        v['macd_histogram'] = v['macd'] - self.macd_signal.update(v['macd'])
+        v['atr'] = self.atr.update(high, low, close)
+        self.directional.update(high, low, v['atr'])
+        v['plus_di'], v['minus_di'], v['adx'] = self.directional.plus_di, self.directional.minus_di, \
+            self.directional.adx
+        self.closes.append(close)
+        v['trend_slope'] = NAN
+        if len(self.closes) == self.closes.maxlen:
+            v['trend_slope'] = sum((i - 2) * x for i, x in enumerate(self.closes)) / 10
+
+        # Volatility
+        v['bb_upper'], v['bb_lower'] = self.bollinger.upper, self.bollinger.lower
+        v['bb_width'] = v['bb_upper'] - v['bb_lower']
+        kc_middle = self.kc_middle.update(close)
+        v['kc_upper'], v['kc_lower'] = kc_middle + (v['atr'] * 2), kc_middle - (v['atr'] * 2)
+        v['bb_squeeze'] = int(v['bb_width'] < (v['kc_upper'] - v['kc_lower']))
+
+        # Volume
+        v['vwap'] = self.vwap.update(high, low, close, volume)
+        v['volume_roc'] = (_div(volume, self.volume_lag.update(volume)) - 1) * 100
+        mf_volume = _div((close - low) - (high - close), high - low) * volume
+        v['cmf'] = _div(self.money_flow_volume.update(mf_volume).sum, self.volume_sum.update(volume).sum)
+        ad_line = NAN
+        if mf_volume == mf_volume:
+            self.ad_line += mf_volume
+            ad_line = self.ad_line
+        v['ad_line_change'] = ad_line - self.previous_ad_line
+        self.previous_ad_line = ad_line
+        v['obv'] = self.obv.update(close, volume)
+        return v
+
+    def snapshot(self, df):
+        """IndicatorSnapshot of df's last row; that row is treated as the still-forming candle"""
+        return IndicatorSnapshot(df.index[-1], self.sync(df, provisional=True), df.index.name)
+
+
+class PriceFeatureStream(IndicatorStream):
+    """The features of PricePredictionSystem._add_features (without the target), one bar at a time"""
+
+    RETURN_PERIODS = (1, 3, 5, 10, 20)
+
+    def reset(self):
+        super().reset()
+        self.log_close_lags = {k: Lag(k) for k in self.RETURN_PERIODS}
+        self.sma_s, self.sma_m, self.sma_l = RollingSum(5), RollingSum(20), RollingSum(60)
+        self.ema_s, self.ema_m, self.ema_l = EMA(5), EMA(20), EMA(60)
+        self.true_range = RollingSum(14)
+        self.previous_close = NAN
+        self.return_var = RollingVar(30)
+        self.close_var = RollingVar(20)
+        self.rsi = RSI(14, epsilon=1e-12, first_change=NAN)
+
+    def _update(self, time, open_, high, low, close, volume):
+        c = close
+        x = {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+
+        log_close = math.log(c)
+        for k, lag in self.log_close_lags.items():
+            x[f'ret_{k}'] = log_close - lag.update(log_close)
+
+        x['sma_s'], x['sma_m'], x['sma_l'] = (self.sma_s.update(c).mean, self.sma_m.update(c).mean,
+                                              self.sma_l.update(c).mean)
+        x['ema_s'], x['ema_m'], x['ema_l'] = self.ema_s.update(c), self.ema_m.update(c), self.ema_l.update(c)
+        x['sma_spread_sm'] = (x['sma_s'] - x['sma_m']) / c
+        x['sma_spread_ml'] = (x['sma_m'] - x['sma_l']) / c
+        x['ema_spread_sm'] = (x['ema_s'] - x['ema_m']) / c
+        x['ema_spread_ml'] = (x['ema_m'] - x['ema_l']) / c
+
+        # np.maximum propagates the NaN of the first bar's previous close
+        tr = max(high - low, abs(high - self.previous_close), abs(low - self.previous_close))
+        if self.previous_close != self.previous_close:
+            tr = NAN
+        self.previous_close = c
+        x['atr14'] = self.true_range.update(tr).mean / c
+        x['vol_sd'] = self.return_var.update(x['ret_1']).std
+
+        ma = self.sma_m.mean
+        sd = self.close_var.update(c).std
+        x['bb_z'] = (c - ma) / (sd + 1e-12)
+        x['rsi'] = self.rsi.update(c)
+
+        dow, dom = time.dayofweek, time.day
+        x['sin_dow'] = math.sin(2 * math.pi * dow / 7)
+        x['cos_dow'] = math.cos(2 * math.pi * dow / 7)
+        x['sin_dom'] = math.sin(2 * math.pi * dom / 31)
+        x['cos_dom'] = math.cos(2 * math.pi * dom / 31)
+        return x
+
+    @property
+    def ready(self):
+        """Whether every feature of the last bar is available (past the 60-bar warm-up)"""
+        return self.values is not None and all(value == value for value in self.values.values())
@@ -0,0 +1,85 @@
+'''
+Consistency tests of the streaming indicators (streaming_indicators.py)
+against the batch versions they replace, column by column:
+- VotingIndicatorStream vs IndicatorEngine over the whole frame
+- live sync (last candle forming) vs IndicatorEngine's last row, per model
+- PriceFeatureStream vs PricePredictionSystem._add_features
+
+Run:
+    python -m pytest -q tests
+'''
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_indicators import DEFAULT_CSV, load_ohlcv
+from benchmark_kernels import random_bars
+from benchmark_streaming import LIVE_CANDLES, RANDOM_BARS, TOLERANCE, VOTING_INDICATORS, stream_all
+from indicator_engine import MODEL_FEATURES, IndicatorEngine
+from Run_PricePredictor import PricePredictionSystem
+from streaming_indicators import PriceFeatureStream, VotingIndicatorStream
+
+HISTORIES = ('csv', 'random walk')
+
+
+@pytest.fixture(scope='module', params=HISTORIES)
+def history(request):
+    if request.param == 'csv':
+        if not os.path.exists(DEFAULT_CSV):
+            pytest.skip(f"{DEFAULT_CSV} not found")
+        return load_ohlcv(DEFAULT_CSV)
+    return random_bars(RANDOM_BARS)
+
+
+def column_differences(expected, actual):
+    """'column: reason' for every column whose NaN warm-up or values (beyond TOLERANCE) differ"""
+    differences = []
+    for column in expected.columns:
+        if column not in actual.columns:
+            differences.append(f"{column}: missing")
+            continue
+        e = expected[column].to_numpy(dtype=np.float64)
+        a = actual[column].to_numpy(dtype=np.float64)
+        if len(e) != len(a):
+            differences.append(f"{column}: {len(a)} rows instead of {len(e)}")
+        elif not np.array_equal(np.isnan(e), np.isnan(a)):
+            differences.append(f"{column}: NaN at {int((np.isnan(e) != np.isnan(a)).sum())} other rows")
+        else:
+            relative = np.abs(e - a) / np.maximum(1., np.abs(e))
+            worst = np.nanmax(relative) if (~np.isnan(relative)).any() else 0.
+            if worst > TOLERANCE:
+                differences.append(f"{column}: max relative difference {worst:.1e}")
+    return differences
+
+
+def test_voting_stream_matches_engine(history):
+    expected = pd.DataFrame({name: IndicatorEngine(history).get(name) for name in VOTING_INDICATORS})
+    actual = stream_all(VotingIndicatorStream(), history)
+    differences = column_differences(expected, actual)
+    assert differences == [], differences
+
+
+def test_live_sync_matches_engine_last_row():
+    df = random_bars(RANDOM_BARS)
+    stream = VotingIndicatorStream()
+    for end in range(len(df) - LIVE_CANDLES, len(df) + 1):
+        frame = df.iloc[:end]
+        engine, snapshot = IndicatorEngine(frame), stream.snapshot(frame)
+        for model_name, features in MODEL_FEATURES.items():
+            differences = column_differences(engine.project(features), snapshot.project(features))
+            assert differences == [], f"{model_name} at {frame.index[-1]}: {differences}"
+
+
+def test_price_stream_matches_add_features(history):
+    expected = PricePredictionSystem._add_features(history).drop(columns='target_r1')
+    actual = stream_all(PriceFeatureStream(), history).dropna()
+    # _add_features also drops the last bar, whose next close (target) is unknown
+    assert actual.index[:-1].equals(expected.index)
+    differences = column_differences(expected, actual.loc[expected.index])
+    assert differences == [], differences
@@ -0,0 +1,377 @@
+"""
+tree_predictor.py - Compiled LightGBM Tree Ensembles
+====================================================
+
+Flattens a trained LightGBM model into plain NumPy arrays (split feature,
+threshold, decision type, children and leaf values of every node) and scores
+it with vectorized NumPy, without importing lightgbm or sklearn:
+- CompiledTrees.predict() matches Booster.predict() (or the sklearn
+  wrapper's predict() when exported from an LGBMClassifier/LGBMRegressor)
+- CompiledTrees.predict_proba() matches LGBMClassifier.predict_proba()
+Both agree with lightgbm to 1e-9.
+
+The NumPy walk wins on the live path (a few rows, no lightgbm import) but is
+several times slower than lightgbm's C++ on large batches, so batches of
+LIGHTGBM_MIN_ROWS rows or more go through lightgbm when it is installed
+(a Booster rebuilt from the model text kept in the .npz). The NumPy walk is
+the fallback wherever lightgbm is missing.
+
+The compiled model is stored as an .npz (no pickle), which loads in a few
+milliseconds. A LightGBM text model (save_model() output) can also be parsed
+directly, still without lightgbm.
+
+Usage (export, then verify against lightgbm when it is installed):
+    python tree_predictor.py <MODEL.txt | MODEL.joblib> [OUTPUT.npz]
+    python tree_predictor.py saved_model_single_train_Full/XAUUSD_lgbm_model.txt
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+COMPILED_SUFFIX = '.npz'
+ZERO_THRESHOLD = 1e-35  # LightGBM's kZeroThreshold for missing_type=Zero
+CHUNK_CELLS = 1 << 20  # Rows x trees evaluated at once (bounds memory on large batches)
+LIGHTGBM_MIN_ROWS = 256  # Batches at least this large are scored by lightgbm when it is installed
+
+# decision_type bits (LightGBM tree.h)
+CATEGORICAL_MASK = 1
+DEFAULT_LEFT_MASK = 2
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+
+IDENTITY_OBJECTIVES = {'regression', 'regression_l1', 'huber', 'fair', 'quantile', 'mape', 'lambdarank',
+                       'rank_xendcg', 'custom'}
+EXP_OBJECTIVES = {'poisson', 'gamma', 'tweedie'}
+SIGMOID_OBJECTIVES = {'binary', 'cross_entropy', 'multiclassova'}
+
+NODE_ARRAYS = ('split_feature', 'threshold', 'decision_type', 'left_child', 'right_child')
+TREE_ARRAYS = ('tree_root', 'tree_class')
+
+
+def _parse_values(text, dtype):
+    return np.array(text.split(), dtype=dtype) if text.strip() else np.empty(0, dtype=dtype)
+
+
+def _parse_sections(model_string):
+    """Header key/values and one key/value dict per 'Tree=' block"""
+    header, trees, current = {}, [], None
+    for line in model_string.splitlines():
+        line = line.strip()
+        if line == 'end of trees':
+            break
+        if line.startswith('Tree='):
+            current = {}
+            trees.append(current)
+            continue
+        if '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        (current if current is not None else header)[key] = value
+    return header, trees
+
+
+class CompiledTrees:
+    """
+    All trees of one model in flat arrays. Internal nodes are numbered
+    globally across trees; a child (or tree root) < 0 is a leaf, stored as
+    ~global_leaf_index.
+    """
+
+    def __init__(self, arrays, meta, model_string=None):
+        for name in NODE_ARRAYS + TREE_ARRAYS + ('leaf_value',):
+            setattr(self, name, arrays[name])
+        self.model_string = model_string
+        self._booster = None  # lightgbm Booster for batch scoring; False once it is unavailable
+        self.meta = meta
+        self.objective = meta['objective']
+        self.num_class = meta['num_class']
+        self.num_features = meta['num_features']
+        self.feature_names = meta.get('feature_names') or []
+        self.average_output = meta.get('average_output', False)
+        classes = meta.get('classes')
+        self.classes_ = np.array(classes) if classes is not None else None
+
+        self._default_left = (self.decision_type & DEFAULT_LEFT_MASK) != 0
+        self._missing_type = (self.decision_type >> 2) & 3
+
+    # ---------- construction ----------
+
+    @classmethod
+    def from_model_string(cls, model_string, classes=None):
+        header, trees = _parse_sections(model_string)
+        nodes = {name: [] for name in NODE_ARRAYS}
+        leaf_values, tree_root, tree_class = [], [], []
+        num_class = int(header.get('num_tree_per_iteration', header.get('num_class', 1)))
+        node_offset = leaf_offset = 0
+
+        for index, tree in enumerate(trees):
+            if int(tree.get('is_linear', 0)):
+                raise ValueError("Linear trees are not supported by the compiled predictor")
+            leaves = _parse_values(tree['leaf_value'], np.float64)
+            num_internal = int(tree['num_leaves']) - 1
+            if num_internal > 0:
+                decision_type = _parse_values(tree['decision_type'], np.int8)
+                if (decision_type & CATEGORICAL_MASK).any():
+                    raise ValueError("Categorical splits are not supported by the compiled predictor")
+                nodes['split_feature'].append(_parse_values(tree['split_feature'], np.int32))
+                nodes['threshold'].append(_parse_values(tree['threshold'], np.float64))
+                nodes['decision_type'].append(decision_type)
+                for side in ('left_child', 'right_child'):
+                    child = _parse_values(tree[side], np.int64)
+                    nodes[side].append(np.where(child >= 0, child + node_offset, ~(~child + leaf_offset)))
+                tree_root.append(node_offset)
+            else:
+                tree_root.append(~leaf_offset)
+            tree_class.append(index % num_class)
+            leaf_values.append(leaves)
+            node_offset += num_internal
+            leaf_offset += len(leaves)
+
+        node_dtypes = {'split_feature': np.int32, 'threshold': np.float64, 'decision_type': np.int8,
+                       'left_child': np.int64, 'right_child': np.int64}
+        arrays = {name: np.concatenate(parts) if parts else np.empty(0, dtype=node_dtypes[name])
+                  for name, parts in nodes.items()}
+        arrays['leaf_value'] = np.concatenate(leaf_values) if leaf_values else np.empty(0)
+        arrays['tree_root'] = np.array(tree_root, dtype=np.int64)
+        arrays['tree_class'] = np.array(tree_class, dtype=np.int32)
+
+        meta = {
+            'objective': header.get('objective', 'regression'),
+            'num_class': num_class,
+            'num_features': int(header.get('max_feature_idx', -1)) + 1,
+            'feature_names': header.get('feature_names', '').split(),
+            'average_output': 'average_output' in header,
+            'classes': None if classes is None else np.asarray(classes).tolist(),
+        }
+        return cls(arrays, meta, model_string=model_string)
+
+    @classmethod
+    def from_model_file(cls, path):
+        """Parses a LightGBM text model (Booster.save_model() output)"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_model_string(f.read())
+
+    @classmethod
+    def from_lightgbm(cls, model):
+        """From an lgb.Booster or a fitted sklearn LGBM model (its classes_ are kept)"""
+        booster = getattr(model, 'booster_', model)
+        return cls.from_model_string(booster.model_to_string(), classes=getattr(model, 'classes_', None))
+
+    # ---------- persistence ----------
+
+    def save(self, path):
+        """Writes the arrays, metadata and model text to an .npz (no pickle), replaced atomically"""
+        arrays = {name: getattr(self, name) for name in NODE_ARRAYS + TREE_ARRAYS + ('leaf_value',)}
+        if self.model_string is not None:
+            arrays['model_string'] = np.frombuffer(self.model_string.encode('utf-8'), dtype=np.uint8)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.savez(f, meta=np.array(json.dumps(self.meta)), **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if name not in ('meta', 'model_string')}
+            meta = json.loads(str(data['meta']))
+            model_string = data['model_string'].tobytes().decode('utf-8') if 'model_string' in data.files else None
+        return cls(arrays, meta, model_string=model_string)
+
+    # ---------- evaluation ----------
+
+    def _as_matrix(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.num_features:
+            raise ValueError(f"The number of features in data ({X.shape[1]}) is not the same as it was "
+                             f"in training data ({self.num_features})")
+        return X
+
+    def leaf_indices(self, X):
+        """(n_rows, n_trees) global leaf index reached in every tree, all rows and trees at once"""
+        X = self._as_matrix(X)
+        node = np.broadcast_to(self.tree_root, (len(X), len(self.tree_root))).copy()
+        rows, trees = np.nonzero(node >= 0)
+        while len(rows):
+            current = node[rows, trees]
+            value = X[rows, self.split_feature[current]]
+            missing_type = self._missing_type[current]
+            is_nan = np.isnan(value)
+            # NaN counts as 0.0 unless the split routes NaN explicitly
+            value = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, value)
+            is_missing = (((missing_type == MISSING_ZERO) & (np.abs(value) <= ZERO_THRESHOLD))
+                          | ((missing_type == MISSING_NAN) & is_nan))
+            go_left = np.where(is_missing, self._default_left[current], value <= self.threshold[current])
+            current = np.where(go_left, self.left_child[current], self.right_child[current])
+            node[rows, trees] = current
+            internal = current >= 0
+            rows, trees = rows[internal], trees[internal]
+        return ~node
+
+    def _lightgbm_booster(self):
+        """lgb.Booster rebuilt from the model text, or None without lightgbm (or without the text)"""
+        if self._booster is None:
+            self._booster = False
+            if self.model_string is not None:
+                try:
+                    import lightgbm as lgb
+                    self._booster = lgb.Booster(model_str=self.model_string)
+                except ImportError:
+                    pass
+        return self._booster or None
+
+    def raw_score(self, X):
+        """Sum of the leaf values per class: (n_rows,) or (n_rows, num_class)"""
+        X = self._as_matrix(X)
+        booster = self._lightgbm_booster() if len(X) >= LIGHTGBM_MIN_ROWS else None
+        if booster is not None:
+            return booster.predict(X, raw_score=True)
+        return self._numpy_raw_score(X)
+
+    def _numpy_raw_score(self, X):
+        scores = np.zeros((len(X), self.num_class))
+        chunk = max(1, CHUNK_CELLS // max(1, len(self.tree_root)))
+        for start in range(0, len(X), chunk):
+            values = self.leaf_value[self.leaf_indices(X[start:start + chunk])]
+            for k in range(self.num_class):
+                scores[start:start + chunk, k] = values[:, self.tree_class == k].sum(axis=1)
+        if self.average_output and len(self.tree_root):
+            scores /= len(self.tree_root) // self.num_class
+        return scores[:, 0] if self.num_class == 1 else scores
+
+    def _transform(self, scores):
+        name, *params = self.objective.split()
+        params = dict(param.split(':', 1) for param in params)
+        if name in SIGMOID_OBJECTIVES:
+            return 1.0 / (1.0 + np.exp(-float(params.get('sigmoid', 1.0)) * scores))
+        if name in ('multiclass', 'softmax'):
+            exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        if name in EXP_OBJECTIVES:
+            return np.exp(scores)
+        if name in IDENTITY_OBJECTIVES:
+            return scores
+        raise ValueError(f"Objective '{self.objective}' is not supported by the compiled predictor")
+
+    def predict(self, X, raw_score=False):
+        """
+        Booster.predict() output; class labels (like the sklearn wrapper's
+        predict()) when the model was exported from a classifier.
+        """
+        scores = self.raw_score(X)
+        if raw_score:
+            return scores
+        output = self._transform(scores)
+        if self.classes_ is None:
+            return output
+        return self.classes_[self._class_index(output)]
+
+    def predict_proba(self, X):
+        """(n_rows, n_classes) class probabilities, as LGBMClassifier.predict_proba()"""
+        output = self._transform(self.raw_score(X))
+        if output.ndim == 1:
+            return np.column_stack([1.0 - output, output])
+        return output
+
+    def _class_index(self, output):
+        return (output > 0.5).astype(int) if output.ndim == 1 else output.argmax(axis=1)
+
+
+def compiled_path(model_path):
+    """Where the compiled copy of a model file is kept (model.txt -> model.npz)"""
+    return os.path.splitext(model_path)[0] + COMPILED_SUFFIX
+
+
+def export_model(model, path):
+    """Compiles an lgb.Booster, a fitted sklearn LGBM model or a text model file and saves it to `path`"""
+    compiled = CompiledTrees.from_model_file(model) if isinstance(model, str) else CompiledTrees.from_lightgbm(model)
+    compiled.save(path)
+    return compiled
+
+
+def load_predictor(model_path):
+    """
+    The compiled predictor for a LightGBM text model: its .npz copy when it is
+    at least as new as the model, otherwise the text model parsed (and the
+    .npz written for the next load).
+    """
+    npz_path = compiled_path(model_path)
+    if os.path.exists(npz_path) and (not os.path.exists(model_path)
+                                     or os.path.getmtime(npz_path) >= os.path.getmtime(model_path)):
+        compiled = CompiledTrees.load(npz_path)
+        # Copies written before the model text was kept are recompiled once
+        if compiled.model_string is not None or not os.path.exists(model_path):
+            return compiled
+    compiled = CompiledTrees.from_model_file(model_path)
+    try:
+        compiled.save(npz_path)
+    except OSError:
+        pass
+    return compiled
+
+
+def _load_reference(model_path):
+    """The lightgbm model behind a model file, for verification"""
+    if model_path.endswith('.txt'):
+        import lightgbm as lgb
+        return lgb.Booster(model_file=model_path)
+    import joblib
+    return joblib.load(model_path)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    model_path = sys.argv[1]
+    output_path = sys.argv[2] if len(sys.argv) > 2 else compiled_path(model_path)
+    reference = None if model_path.endswith('.txt') else _load_reference(model_path)
+    compiled = export_model(model_path if reference is None else reference, output_path)
+    print(f"✅ Compiled {len(compiled.tree_root)} trees ({len(compiled.threshold)} splits) to {output_path}")
+
+    start = time.perf_counter()
+    compiled = CompiledTrees.load(output_path)
+    print(f"Loaded the compiled model in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    try:
+        reference = reference or _load_reference(model_path)
+    except ImportError:
+        print("lightgbm is not installed - skipping the verification")
+        return
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(10_000, compiled.num_features))
+    X[rng.random(X.shape) < 0.01] = np.nan
+    X[rng.random(X.shape) < 0.01] = 0.0
+
+    checks = [('predict', reference.predict, compiled.predict)]
+    if hasattr(reference, 'predict_proba'):
+        checks.append(('predict_proba', reference.predict_proba, compiled.predict_proba))
+    # The NumPy walk on its own (what scores everything when lightgbm is missing)
+    checks.append(('raw_score (NumPy walk)', lambda data: reference.predict(data, raw_score=True),
+                   lambda data: compiled._numpy_raw_score(compiled._as_matrix(data))))
+    for name, expected_fn, actual_fn in checks:
+        start = time.perf_counter()
+        expected = np.asarray(expected_fn(X))
+        reference_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = actual_fn(X)
+        compiled_time = time.perf_counter() - start
+        if expected.dtype.kind in 'fc':
+            error = float(np.max(np.abs(expected - actual)))
+            status = '✅' if error <= 1e-9 else '❌'
+            detail = f"max abs diff {error:.2e}"
+        else:
+            status = '✅' if np.array_equal(expected, actual) else '❌'
+            detail = f"{int((expected != actual).sum())} labels differ"
+        print(f"{status} {name}: {detail} on {len(X)} rows "
+              f"(lightgbm {reference_time * 1000:.0f} ms, compiled {compiled_time * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+zone_index.py - Price Lookup over FVG Zones
+===========================================
+
+ZoneIndex is an immutable snapshot of a zone list that answers "which zones
+contain price P for direction D" with a centered interval tree per
+direction: every zone is stored once (O(n) memory, O(n log n) build, also
+for heavily overlapping zones stacked in a trend), and a query walks one
+root-to-leaf path plus the k matching zones (O(log n + k)).
+
+Writers build a new snapshot and swap the reference (copy-on-write), so
+readers can query whatever snapshot they hold without taking a lock.
+"""
+
+DIRECTIONS = ('BUY', 'SELL')
+
+
+class _Node:
+    """
+    Zones containing `center`, sorted by bottom (ascending) and by top
+    (descending); zones entirely below/above it are in the left/right subtree
+    """
+    __slots__ = ('center', 'by_bottom', 'by_top', 'left', 'right')
+
+    def __init__(self, center, by_bottom, by_top, left, right):
+        self.center = center
+        self.by_bottom = by_bottom
+        self.by_top = by_top
+        self.left = left
+        self.right = right
+
+
+def _build(members):
+    """Interval tree over (index, bottom, top) members; zones are stored by their original index"""
+    if not members:
+        return None
+    # The median bound is a bound of some zone, so every node holds at least one zone
+    bounds = sorted(price for _, bottom, top in members for price in (bottom, top))
+    center = bounds[len(bounds) // 2]
+    below = [member for member in members if member[2] < center]
+    above = [member for member in members if member[1] > center]
+    here = [member for member in members if member[1] <= center <= member[2]]
+    return _Node(
+        center,
+        sorted((bottom, index) for index, bottom, _ in here),
+        sorted(((top, index) for index, _, top in here), key=lambda item: (-item[0], item[1])),
+        _build(below),
+        _build(above),
+    )
+
+
+class ZoneIndex:
+    def __init__(self, zones=()):
+        self.zones = tuple(zones)
+        self._by_direction = {}
+        for direction in DIRECTIONS:
+            members = [
+                (index, zone['fvg_bottom'], zone['fvg_top']) for index, zone in enumerate(self.zones)
+                if zone.get('direction') == direction
+                and zone.get('fvg_bottom') is not None and zone.get('fvg_top') is not None
+                and zone['fvg_bottom'] <= zone['fvg_top']
+            ]
+            self._by_direction[direction] = _build(members)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _matching_indices(self, price, direction):
+        """Original indices of the zones containing price (unordered)"""
+        node = self._by_direction.get(direction) if price is not None else None
+        indices = []
+        while node is not None:
+            if price < node.center:
+                for bottom, index in node.by_bottom:
+                    if bottom > price:
+                        break
+                    indices.append(index)
+                node = node.left
+            elif price > node.center:
+                for top, index in node.by_top:
+                    if top < price:
+                        break
+                    indices.append(index)
+                node = node.right
+            else:
+                indices.extend(index for _, index in node.by_bottom)
+                break
+        return indices
+
+    def containing(self, price, direction):
+        """Zones for `direction` with fvg_bottom <= price <= fvg_top, in their original order"""
+        return [self.zones[i] for i in sorted(self._matching_indices(price, direction))]
+
+    def zones_at(self, bid, ask):
+        """BUY zones containing the ask and SELL zones containing the bid, in their original order"""
+        indices = self._matching_indices(ask, 'BUY') + self._matching_indices(bid, 'SELL')
+        return [self.zones[i] for i in sorted(indices)]